@@ -1,24 +1,73 @@
 # -*- coding: utf-8 -*-
 import time, traceback
 import numpy as np
-import psutil
-from multiprocessing import get_context
+from scipy.stats import qmc
 from PyQt5.QtCore import QThread, pyqtSignal
 
-from .helpers import ACORConfig
+from .helpers import ACORConfig, ProgressEvent
+from .colony_scheduler import ColonyScheduler
+from .evaluators import make_pool, calibrate, default_worker_count
+
+TWO_PI = 2 * np.pi
+
+def wrap_periodic(X, low, high, periodic):
+    """Envuelve los parámetros periódicos (periodo 2π) dentro de [low, low + 2π) y recorta el resto.
+
+    Un parámetro periódico cuyo rango es menor que un periodo completo se recorta como los demás.
+    """
+    X = np.array(X, dtype=float)
+    wrap = np.asarray(periodic, dtype=bool) & ((high - low) >= TWO_PI - 1e-9)
+    X = np.where(wrap, low + np.mod(X - low, TWO_PI), np.clip(X, low, high))
+    return X
+
+def normalized_distances(X, Y, low, rng, periodic=None):
+    """Distancia RMS entre cada fila de X y cada fila de Y, normalizada por el rango de cada parámetro.
+
+    En los parámetros marcados como periódicos se usa la distancia circular.
+    """
+    rng = np.where(rng == 0, 1.0, rng)
+    Xn = (np.atleast_2d(X) - low) / rng
+    Yn = (np.atleast_2d(Y) - low) / rng
+    d = np.abs(Xn[:, None, :] - Yn[None, :, :])
+    if periodic is not None and np.any(periodic):
+        period = TWO_PI / rng
+        d_mod = np.mod(d, period)
+        d = np.where(periodic, np.minimum(d_mod, period - d_mod), d)
+    return np.sqrt(np.mean(d ** 2, axis=2))
+
+def find_duplicates(candidates, reference, low, rng, tol, periodic=None):
+    """Máscara de candidatos casi duplicados: respecto a `reference` o a un candidato anterior del lote."""
+    candidates = np.atleast_2d(candidates)
+    dup = np.zeros(len(candidates), dtype=bool)
+    if len(candidates) == 0: return dup
+    if reference is not None and len(reference) > 0:
+        dup |= (normalized_distances(candidates, reference, low, rng, periodic) < tol).any(axis=1)
+    d_self = normalized_distances(candidates, candidates, low, rng, periodic)
+    for i in range(1, len(candidates)):
+        if not dup[i] and np.any((d_self[i, :i] < tol) & ~dup[:i]): dup[i] = True
+    return dup
 
 class ACOROptimizer:
     """Implementa el algoritmo de optimizaci0n ACOR multi-colonia."""
-    def __init__(self, fitness_func, bounds, config: ACORConfig, warm_start_params=None):
+    def __init__(self, fitness_func, bounds, config: ACORConfig, warm_start_params=None, periodic=None, canonicalize=None,
+                 batch_fitness=None, initial_archive=None):
         self.fitness = fitness_func
+        # Si se da, evalúa un lote entero (matriz de soluciones) en este proceso, sin pool de workers
+        self.batch_fitness = batch_fitness
         self.bounds = bounds
         self.config = config
-        self.warm_start_params = warm_start_params
         
         self.DIM = bounds.shape[0]
         self.LOW = bounds[:, 0]
         self.HIGH = bounds[:, 1]
         self.RANGE = self.HIGH - self.LOW
+
+        # Parámetros circulares (periodo 2π) y función que lleva cada solución a su forma canónica
+        self.periodic = np.zeros(self.DIM, dtype=bool) if periodic is None else np.asarray(periodic, dtype=bool)
+        self.canonicalize = canonicalize
+        self.warm_start_params = None if warm_start_params is None else self._repair(np.asarray(warm_start_params, dtype=float)[None, :])[0]
+        # Soluciones con las que se llena el archivo de la colonia 0 en lugar del diseño inicial + OBL
+        self.initial_archive = None if initial_archive is None else self._repair(np.atleast_2d(np.asarray(initial_archive, dtype=float)))
         
         self.best_params_global = None
         self.best_cost_global = float("inf")
@@ -26,54 +75,107 @@ class ACOROptimizer:
         self.history_best_params = []
         
         self.progress_callback = None
+        # Si se da, trajectory_func(params) -> (t, I) calcula la curva del mejor ajuste que viaja en los eventos
+        self.trajectory_func = None
         self._stop_requested = False
+        self._pause_requested = False
+        self.duration = 0.0
         self.archives = []
         self.colony_costs = []
 
+        # Estadísticas de evaluación y diversidad
+        self.n_evaluations = 0
+        self.duplicates_skipped = 0
+        self.cache_hits = 0
+        self.n_timeouts = 0
+        self._cost_cache = {}
+        self.parallel_info = {}
+        self.colony_diversity = []
+        self.history_diversity = []
+        self.history_allocation = []
+
+        # Diagnóstico de convergencia por colonia
+        self.colony_active = []
+        self.colony_stall = []
+        self.colony_diagnostics = []
+
     def __getstate__(self):
         # Permite que la clase sea "picklable" para multiprocessing
         s = self.__dict__.copy()
         s["progress_callback"] = None
+        s["trajectory_func"] = None
         s["fitness"] = None
+        s["batch_fitness"] = None
+        s["canonicalize"] = None
+        s["_cost_cache"] = {}
         return s
 
     def clear_stop(self): self._stop_requested = False
     def request_stop(self): self._stop_requested = True
     def should_stop(self): return self._stop_requested
+    def request_pause(self): self._pause_requested = True
+    def resume(self): self._pause_requested = False
+    def is_paused(self): return self._pause_requested
     def _get_opposite_solution(self, solution): return self.LOW + self.HIGH - solution
 
     def optimize(self, tmax_seconds=None, plateau_K=None):
+        start_time = time.time()
+        try:
+            return self._optimize(tmax_seconds, plateau_K)
+        finally:
+            self.duration = time.time() - start_time
+
+    def _optimize(self, tmax_seconds=None, plateau_K=None):
         self.clear_stop()
         self.history_best_cost.clear()
         self.history_best_params.clear()
+        self.history_diversity.clear()
+        self.history_allocation.clear()
+        self.n_evaluations = 0
+        self.duplicates_skipped = 0
+        self.cache_hits = 0
+        self.n_timeouts = 0
+        self._cost_cache.clear()
+        self._plateau, self._last_progress, self._progress_pending, self._trajectory_params = 0, -float("inf"), False, None
         start_time = time.time()
         cfg = self.config
-        n_workers = max(1, int(psutil.cpu_count(logical=True) * 0.8))
-        ctx = get_context("spawn")
 
-        with ctx.Pool(n_workers) as pool:
+        scheduler = ColonyScheduler(cfg.colonies_count, cfg.n_ants * cfg.colonies_count, cfg.allocation_min_share, cfg.allocation_decay)
+
+        self.parallel_info = info = self._choose_parallelism()
+        mode = "serial" if info["mode"] == "batch" else info["mode"]
+        with make_pool(info["workers"], cfg.eval_timeout, info["chunksize"], mode, cfg.worker_threads,
+                       cfg.pin_workers, cfg.reserved_cores, cfg.remote_address, cfg.remote_authkey) as pool:
+            if mode == "remote":
+                info["address"] = "%s:%d" % tuple(pool.address)
+                self._emit_progress(0, f"Coordinador remoto en {info['address']}. Para unir workers: "
+                                       f"python -m clases.remote {info['address']} --authkey {pool.authkey.decode()}")
             self._initialize_colonies(pool)
             no_improve_global = 0
 
             for it in range(1, cfg.max_iter + 1):
+                start_time += self._wait_while_paused(it)  # el tiempo en pausa no cuenta para tmax
                 if self._check_stop_conditions(it, start_time, tmax_seconds, no_improve_global, plateau_K): break
 
-                for c in range(cfg.colonies_count):
+                allocation = scheduler.allocate() if cfg.adaptive_allocation else np.where(self.colony_active, cfg.n_ants, 0)
+                for c in self._active_colonies():
                     archive, costs = self.archives[c], self.colony_costs[c]
+                    prev_best = costs[0]
                     lam = cfg.archive_size / 2
                     P = np.exp(-np.arange(cfg.archive_size) / lam)
                     P /= P.sum()
                     
-                    new_sols = self._generate_solutions(archive, P)
-                    new_costs = np.array(pool.map(self.fitness, new_sols))
-
-                    combined = np.vstack((archive, new_sols))
-                    comb_costs = np.hstack((costs, new_costs))
-                    elite_idx = np.argsort(comb_costs)[:cfg.archive_size]
-                    self.archives[c], self.colony_costs[c] = combined[elite_idx], comb_costs[elite_idx]
+                    new_sols = self._filter_duplicates(self._generate_solutions(archive, P, allocation[c]), archive)
+                    new_costs = self._evaluate(pool, new_sols)
+                    self.archives[c], self.colony_costs[c] = self._insert_into_archive(archive, costs, new_sols, new_costs)
 
                     if cfg.local_search_enabled and it % cfg.local_search_frequency == 0:
                         self.archives[c], self.colony_costs[c] = self._apply_local_search(self.archives[c], self.colony_costs[c], pool)
+                    scheduler.update(c, prev_best, self.colony_costs[c][0], allocation[c])
+                    improved = self.colony_costs[c][0] + 1e-12 < prev_best
+                    self.colony_stall[c] = 0 if improved else self.colony_stall[c] + 1
+                scheduler.step()
+                self.history_allocation.append(allocation)
 
                 if it % cfg.migration_interval == 0:
                     self._apply_migration()
@@ -94,92 +196,274 @@ class ACOROptimizer:
 
                 self.history_best_cost.append(self.best_cost_global)
                 self.history_best_params.append(self.best_params_global.copy())
+                self.colony_diversity = [self._archive_diversity(a) for a in self.archives]
+                self.history_diversity.append(np.array(self.colony_diversity))
+
+                self._plateau = no_improve_global
+                self.colony_diagnostics = [self._colony_diagnostics(c, scheduler) for c in range(cfg.colonies_count)]
+                self._emit_progress(it)
 
-                if self.progress_callback:
-                    prog = int(it * 100 / cfg.max_iter)
-                    msg = f"Iter {it}/{cfg.max_iter} — Best Cost: {self.best_cost_global:.3e} (Global Plateau: {no_improve_global})"
-                    self.progress_callback(prog, msg, self.best_params_global if (it % 10 == 0) else None)
+                if cfg.colony_retirement_enabled and self._retire_converged_colonies(it, scheduler): break
 
+        # La última iteración agrupada por el intervalo de progreso también se publica
+        if self._progress_pending: self._emit_progress(len(self.history_best_cost), force=True)
         return self.best_params_global, self.best_cost_global
 
+    def _choose_parallelism(self):
+        """Decide cómo evaluar (en serie, con hilos, con procesos o con workers remotos) y el tamaño de trozo.
+
+        En modo "auto" se calibra con unas pocas soluciones al azar (ver `evaluators.calibrate`).
+        La decisión y sus medidas quedan en `parallel_info`.
+        """
+        cfg = self.config
+        if self.batch_fitness is not None:
+            return {"mode": "batch", "workers": 1, "chunksize": 1}
+        if cfg.parallel_mode == "remote":
+            n = default_worker_count(cfg.reserved_cores) if cfg.n_workers is None else max(0, int(cfg.n_workers))
+            return {"mode": "remote", "workers": n, "chunksize": cfg.eval_chunksize or 1}
+        n = default_worker_count(cfg.reserved_cores) if cfg.n_workers is None else max(1, int(cfg.n_workers))
+        if cfg.parallel_mode != "auto" or n == 1:
+            mode = "serial" if n == 1 else cfg.parallel_mode
+            return {"mode": mode, "workers": 1 if mode == "serial" else n, "chunksize": cfg.eval_chunksize or 1}
+        rng = np.random.default_rng(cfg.init_seed)
+        samples = self._repair(self.LOW + rng.random((5, self.DIM)) * self.RANGE)
+        info = calibrate(self.fitness, samples, n, cfg.n_ants * cfg.colonies_count)
+        if cfg.eval_chunksize: info["chunksize"] = cfg.eval_chunksize
+        return info
+
+    def _colony_grid(self):
+        """Rejilla de regiones disjuntas, una por colonia: los factores primos de `colonies_count` se
+        reparten entre las dimensiones (p. ej. 6 colonias -> 2 x 3 en dos dimensiones).
+
+        Sólo se cortan dimensiones no periódicas que la forma canónica no modifica: cortar una
+        amplitud o frecuencia que se refleja juntaría dos regiones en una.
+        """
+        probe = self.LOW + self.RANGE * np.random.default_rng(0).random((64, self.DIM))
+        fixed = np.all(self._repair(probe) == probe, axis=0) & ~self.periodic
+        dims = np.flatnonzero(fixed) if np.any(fixed) else np.arange(self.DIM)
+        shape = np.ones(self.DIM, dtype=int)
+        n, factor, d = self.config.colonies_count, 2, 0
+        while n > 1:
+            while n % factor: factor += 1
+            shape[dims[d % len(dims)]] *= factor
+            n //= factor; d += 1
+        return shape
+
+    def _initial_design(self, n_per_colony):
+        """Genera los puntos iniciales de cada colonia en su propia región del espacio.
+
+        El espacio se divide en una rejilla de `colonies_count` celdas (`_colony_grid`) y cada
+        colonia recibe un diseño aleatorizado independiente ('sobol', 'halton', 'lhs' o
+        'uniform', con semilla `init_seed + c`) escalado a su celda, de modo que las colonias
+        cubren regiones disjuntas en lugar de repetir la misma cobertura.
+        """
+        cfg = self.config
+        seed = cfg.init_seed if cfg.init_seed is not None else np.random.randint(2**31 - 1 - cfg.colonies_count)
+        method = cfg.init_method.lower()
+        shape = self._colony_grid()
+        designs = []
+        for c in range(cfg.colonies_count):
+            if method == "sobol":
+                sampler = qmc.Sobol(d=self.DIM, scramble=True, seed=seed + c)
+                unit = sampler.random_base2(int(np.ceil(np.log2(max(n_per_colony, 2)))))[:n_per_colony]
+            elif method == "halton":
+                unit = qmc.Halton(d=self.DIM, scramble=True, seed=seed + c).random(n_per_colony)
+            elif method == "lhs":
+                unit = qmc.LatinHypercube(d=self.DIM, seed=seed + c).random(n_per_colony)
+            else:
+                unit = np.random.default_rng(seed + c).uniform(size=(n_per_colony, self.DIM))
+            cell = np.array(np.unravel_index(c, shape))
+            designs.append(self._repair(self.LOW + (cell + unit) / shape * self.RANGE))
+        return designs
+
     def _initialize_colonies(self, pool):
         cfg = self.config
         self.archives = []
         self.colony_costs = []
-        for i in range(cfg.colonies_count):
-            base_size = cfg.archive_size
-            if cfg.obl_enabled:
-                half_size = (base_size + 1) // 2
-                initial_sols = np.random.uniform(self.LOW, self.HIGH, size=(half_size, self.DIM))
-                opposite_sols = self._get_opposite_solution(initial_sols)
+        base_size = cfg.archive_size
+        n_design = (base_size + 1) // 2 if cfg.obl_enabled else base_size
+        for i, initial_sols in enumerate(self._initial_design(n_design)):
+            if i == 0 and self.initial_archive is not None:
+                # Archivo sembrado: se evalúa tal cual y, si es corto, se completa hasta `archive_size` con
+                # el diseño (y sus opuestos con OBL, porque entonces el diseño sólo tiene la mitad de filas)
+                seeds = [self.initial_archive, initial_sols]
+                if cfg.obl_enabled: seeds.append(self._repair(self._get_opposite_solution(initial_sols)))
+                if self.warm_start_params is not None: seeds.insert(0, self.warm_start_params[None, :])
+                archive = np.vstack(seeds)[:base_size]
+                costs = self._evaluate(pool, archive)
+            else:
                 if i == 0 and self.warm_start_params is not None:
                     initial_sols[0] = self.warm_start_params.copy()
-                    opposite_sols[0] = self._get_opposite_solution(initial_sols[0])
-                combined_sols = np.vstack((initial_sols, opposite_sols))
-                costs = np.array(pool.map(self.fitness, combined_sols))
-                best_indices = np.argsort(costs)[:base_size]
-                archive = combined_sols[best_indices]
-            else:
-                archive = np.random.uniform(self.LOW, self.HIGH, size=(base_size, self.DIM))
-                if i == 0 and self.warm_start_params is not None: archive[0] = self.warm_start_params.copy()
-            
-            costs = np.array(pool.map(self.fitness, archive))
+                if cfg.obl_enabled:
+                    combined_sols = np.vstack((initial_sols, self._repair(self._get_opposite_solution(initial_sols))))
+                    costs = self._evaluate(pool, combined_sols)
+                    best_indices = np.argsort(costs)[:base_size]
+                    archive, costs = combined_sols[best_indices], costs[best_indices]
+                else:
+                    archive = initial_sols
+                    costs = self._evaluate(pool, archive)
+
             idx = np.argsort(costs)
             self.archives.append(archive[idx])
             self.colony_costs.append(costs[idx])
         
-        self.best_cost_global = self.colony_costs[0][0]
-        self.best_params_global = self.archives[0][0].copy()
+        self.colony_active = [True] * cfg.colonies_count
+        self.colony_stall = [0] * cfg.colonies_count
+        self.colony_diagnostics = []
+        self.colony_diversity = [self._archive_diversity(a) for a in self.archives]
+        self.best_cost_global = min(costs[0] for costs in self.colony_costs)
+        best_colony = int(np.argmin([costs[0] for costs in self.colony_costs]))
+        self.best_params_global = self.archives[best_colony][0].copy()
+
+    def _active_colonies(self):
+        return [c for c in range(self.config.colonies_count) if self.colony_active[c]]
+
+    def _colony_diagnostics(self, c, scheduler):
+        """Resume el estado de convergencia de una colonia.
+
+        - spread: rango del archivo en cada parámetro, relativo a RANGE.
+        - sigma: desviación media del kernel gaussiano de muestreo, relativa a RANGE.
+        - improvement: media exponencial de la mejora relativa por hormiga (del planificador).
+        """
+        cfg = self.config
+        archive = self.archives[c]
+        rng = np.where(self.RANGE == 0, 1.0, self.RANGE)
+        spread = (archive.max(axis=0) - archive.min(axis=0)) / rng
+        if np.any(self.periodic):
+            # En las fases, el rango circular es el periodo menos el mayor hueco entre valores consecutivos
+            vals = np.sort(archive[:, self.periodic], axis=0)
+            gaps = np.vstack((np.diff(vals, axis=0), vals[:1] + TWO_PI - vals[-1:]))
+            spread[self.periodic] = (TWO_PI - gaps.max(axis=0)) / rng[self.periodic]
+        sigma = cfg.q * np.abs(self._delta(archive, archive[0])).sum(axis=0) / max(len(archive) - 1, 1) / rng
+        return {
+            "spread": spread,
+            "max_spread": float(spread.max()),
+            "sigma": float(sigma.mean()),
+            "improvement": float(scheduler.rewards[c]),
+            "stall": int(self.colony_stall[c]),
+            "active": bool(self.colony_active[c]),
+        }
+
+    def _colony_converged(self, c):
+        cfg = self.config
+        diag = self.colony_diagnostics[c]
+        return diag["max_spread"] < cfg.convergence_spread_tol and diag["stall"] >= cfg.colony_patience
+
+    def _retire_converged_colonies(self, it, scheduler):
+        """Retira las colonias colapsadas y fusiona su élite en la mejor colonia activa.
+
+        Devuelve True cuando todas las colonias han convergido y la ejecución debe terminar.
+        """
+        cfg = self.config
+        for c in self._active_colonies():
+            if not self._colony_converged(c): continue
+            others = [o for o in self._active_colonies() if o != c]
+            if not others:
+                self._emit_progress(it, "Todas las colonias convergieron.", "warning")
+                return True
+            target = min(others, key=lambda o: self.colony_costs[o][0])
+            elite = self.archives[c][:cfg.migration_size]
+            elite_costs = self.colony_costs[c][:cfg.migration_size]
+            self.archives[target], self.colony_costs[target] = self._insert_into_archive(self.archives[target], self.colony_costs[target], elite, elite_costs)
+            self.colony_active[c] = False
+            scheduler.retire(c, cfg.retirement_redistributes)
+            self.colony_diagnostics[c]["active"] = False
+            self._emit_progress(it, f"Colonia {c + 1} retirada por convergencia (fusionada en colonia {target + 1}).", "warning")
+        return False
 
     def _apply_migration(self):
         cfg = self.config
-        if cfg.colonies_count <= 1: return
-        for i in range(cfg.colonies_count):
+        active = self._active_colonies()
+        if len(active) <= 1: return
+        for pos, i in enumerate(active):
             source_colony_idx = i
-            target_colony_idx = (i + 1) % cfg.colonies_count
+            target_colony_idx = active[(pos + 1) % len(active)]
             
             migrants = self.archives[source_colony_idx][:cfg.migration_size]
-            target_archive = self.archives[target_colony_idx]
-            target_costs = self.colony_costs[target_colony_idx]
-            
-            target_archive[-cfg.migration_size:] = migrants
             migrant_costs = self.colony_costs[source_colony_idx][:cfg.migration_size]
-            target_costs[-cfg.migration_size:] = migrant_costs
+            target_archive = self.archives[target_colony_idx].copy()
+            target_costs = self.colony_costs[target_colony_idx].copy()
+
+            # Los migrantes que ya tienen un clon en el archivo destino no se copian
+            if cfg.dedup_enabled:
+                keep = ~find_duplicates(migrants, target_archive[:-cfg.migration_size], self.LOW, self.RANGE, cfg.dedup_tolerance, self.periodic)
+                migrants, migrant_costs = migrants[keep], migrant_costs[keep]
+            n_mig = len(migrants)
+            if n_mig == 0: continue
+            target_archive[-n_mig:] = migrants
+            target_costs[-n_mig:] = migrant_costs
             
             idx = np.argsort(target_costs)
             self.archives[target_colony_idx] = target_archive[idx]
             self.colony_costs[target_colony_idx] = target_costs[idx]
 
+    def _emit_progress(self, it, message="", level="info", force=False):
+        """Publica un `ProgressEvent` por `progress_callback`.
+
+        Los eventos por iteración se agrupan: sale como mucho uno cada `config.progress_interval`
+        segundos. Los avisos (`message`) salen siempre. La curva del mejor ajuste sólo se calcula
+        cuando el mejor cambió desde la última enviada.
+        """
+        if self.progress_callback is None: return
+        now = time.monotonic()
+        if not message and not force and now - self._last_progress < self.config.progress_interval:
+            self._progress_pending = True
+            return
+        best = self.best_params_global
+        event = ProgressEvent(it, self.config.max_iter, float(self.best_cost_global), message, level, self._plateau,
+                              float(np.mean(self.colony_diversity)) if len(self.colony_diversity) else float("nan"),
+                              [float(c[0]) for c in self.colony_costs], [bool(a) for a in self.colony_active],
+                              None if best is None else best.copy(), colony_diagnostics=[dict(d) for d in self.colony_diagnostics])
+        if not message and best is not None and self.trajectory_func is not None and \
+                (self._trajectory_params is None or not np.array_equal(best, self._trajectory_params)):
+            try:
+                event.trajectory = self.trajectory_func(best)
+                self._trajectory_params = best.copy()
+            except Exception:
+                pass  # una curva que no se puede integrar no detiene la optimización
+        if not message: self._last_progress, self._progress_pending = now, False
+        self.progress_callback(event)
+
+    def _wait_while_paused(self, it):
+        """Bloquea entre iteraciones mientras haya una pausa pedida. Devuelve los segundos en pausa."""
+        if not self._pause_requested or self._stop_requested: return 0.0
+        start = time.time()
+        self._emit_progress(it, "En pausa.", "warning")
+        while self._pause_requested and not self._stop_requested: time.sleep(0.1)
+        self._emit_progress(it, "Reanudado.", "warning")
+        return time.time() - start
+
     def _check_stop_conditions(self, it, start_time, tmax_seconds, no_improve, plateau_K):
         if self.should_stop():
-            if self.progress_callback: self.progress_callback(int(it*100/self.config.max_iter), "Detenido.", None)
+            self._emit_progress(it, "Detenido.", "warning")
             return True
         if tmax_seconds is not None and (time.time() - start_time) >= tmax_seconds:
-            if self.progress_callback: self.progress_callback(int(it*100/self.config.max_iter), "L0mite de tiempo.", None)
+            self._emit_progress(it, "Límite de tiempo.", "warning")
             return True
         if plateau_K is not None and no_improve >= int(plateau_K):
-            if self.progress_callback: self.progress_callback(int(it*100/self.config.max_iter), f"Plateau global (K={plateau_K}).", None)
+            self._emit_progress(it, f"Plateau global (K={plateau_K}).", "warning")
             return True
         return False
 
-    def _generate_solutions(self, archive, P):
+    def _generate_solutions(self, archive, P, n_ants=None):
         cfg = self.config
-        new_sols = np.zeros((cfg.n_ants, self.DIM))
-        for k in range(cfg.n_ants):
+        n_ants = cfg.n_ants if n_ants is None else int(n_ants)
+        new_sols = np.zeros((n_ants, self.DIM))
+        for k in range(n_ants):
             i_sel = np.random.choice(cfg.archive_size, p=P)
             mu = archive[i_sel]
-            sigma = cfg.q * (np.abs(archive - mu).sum(axis=0) / (cfg.archive_size - 1) + 1e-12)
-            sol = np.random.normal(mu, sigma)
-            new_sols[k] = np.clip(sol, self.LOW, self.HIGH)
-        return new_sols
+            sigma = cfg.q * (np.abs(self._delta(archive, mu)).sum(axis=0) / (cfg.archive_size - 1) + 1e-12)
+            new_sols[k] = np.random.normal(mu, sigma)
+        return self._repair(new_sols)
 
     def _apply_local_search(self, archive, costs, pool):
         best_params = archive[0].copy()
         radius = self.config.local_search_radius
         n_points = self.config.local_search_points
         perturbations = np.random.normal(0, radius * self.RANGE, size=(n_points, self.DIM))
-        candidates = np.clip(best_params + perturbations, self.LOW, self.HIGH)
-        candidate_costs = np.array(pool.map(self.fitness, candidates))
+        candidates = self._filter_duplicates(self._repair(best_params + perturbations), archive)
+        if len(candidates) == 0: return archive, costs
+        candidate_costs = self._evaluate(pool, candidates)
         best_local_idx = np.argmin(candidate_costs)
         if candidate_costs[best_local_idx] < costs[0]:
             archive[0], costs[0] = candidates[best_local_idx], candidate_costs[best_local_idx]
@@ -187,21 +471,107 @@ class ACOROptimizer:
             archive, costs = archive[idx], costs[idx]
         return archive, costs
 
+    def _repair(self, sols):
+        """Lleva las soluciones al dominio: envuelve las fases, recorta el resto y aplica la forma canónica."""
+        sols = wrap_periodic(sols, self.LOW, self.HIGH, self.periodic)
+        if self.canonicalize is not None:
+            sols = wrap_periodic(self.canonicalize(sols), self.LOW, self.HIGH, self.periodic)
+        return sols
+
+    def _delta(self, X, mu):
+        """Diferencia X - mu, tomando el camino corto en los parámetros periódicos."""
+        d = X - mu
+        return np.where(self.periodic, np.mod(d + np.pi, TWO_PI) - np.pi, d)
+
+    def _evaluate(self, pool, sols):
+        """Evalúa un lote de soluciones en el pool y lleva la cuenta de evaluaciones.
+
+        Los costos se guardan en una caché indexada por la forma canónica de cada solución,
+        así que las soluciones repetidas (p. ej. candidatos del pulido) no se vuelven a integrar.
+        """
+        if len(sols) == 0: return np.empty(0)
+        cfg = self.config
+        costs = np.empty(len(sols))
+        if not cfg.eval_cache_enabled:
+            self.n_evaluations += len(sols)
+            costs[:] = self._map_fitness(pool, sols)
+            return costs
+        pending = {}
+        for i, x in enumerate(sols):
+            key = np.round(x, 12).tobytes()
+            if key in self._cost_cache:
+                costs[i] = self._cost_cache[key]
+                self.cache_hits += 1
+            elif key in pending:
+                pending[key].append(i)
+                self.cache_hits += 1
+            else:
+                pending[key] = [i]
+        if pending:
+            self.n_evaluations += len(pending)
+            new_costs = self._map_fitness(pool, [sols[idx[0]] for idx in pending.values()])
+            for (key, idx), cost in zip(pending.items(), new_costs):
+                costs[idx] = cost
+                if len(self._cost_cache) >= cfg.eval_cache_size: self._cost_cache.pop(next(iter(self._cost_cache)))
+                self._cost_cache[key] = cost
+        return costs
+
+    def _map_fitness(self, pool, sols):
+        if self.batch_fitness is not None:
+            return list(self.batch_fitness(np.asarray(sols, dtype=float)))
+        costs = pool.map(self.fitness, list(sols))
+        self.n_timeouts = getattr(pool, "timeouts", 0)
+        return costs
+
+    def _filter_duplicates(self, sols, archive):
+        """Descarta candidatos casi idénticos (entre sí o respecto al archivo) antes de evaluarlos."""
+        cfg = self.config
+        if not cfg.dedup_enabled or len(sols) == 0: return sols
+        dup = find_duplicates(sols, archive, self.LOW, self.RANGE, cfg.dedup_tolerance, self.periodic)
+        self.duplicates_skipped += int(dup.sum())
+        return sols[~dup]
+
+    def _insert_into_archive(self, archive, costs, new_sols, new_costs):
+        """Combina archivo y nuevas soluciones conservando las mejores sin clones.
+
+        Si no hay suficientes soluciones distintas para llenar el archivo, se completa
+        con los clones de menor costo para mantener su tamaño fijo.
+        """
+        size = self.config.archive_size
+        combined = np.vstack((archive, new_sols)) if len(new_sols) else archive
+        comb_costs = np.hstack((costs, new_costs)) if len(new_sols) else costs
+        order = np.argsort(comb_costs, kind="stable")
+        if not self.config.dedup_enabled:
+            elite_idx = order[:size]
+            return combined[elite_idx], comb_costs[elite_idx]
+        dup = find_duplicates(combined[order], None, self.LOW, self.RANGE, self.config.dedup_tolerance, self.periodic)
+        elite_idx = np.concatenate((order[~dup], order[dup]))[:size]
+        elite_idx = elite_idx[np.argsort(comb_costs[elite_idx], kind="stable")]
+        return combined[elite_idx], comb_costs[elite_idx]
+
+    def _archive_diversity(self, archive):
+        """Diversidad de una colonia: distancia normalizada media entre pares de soluciones del archivo."""
+        n = len(archive)
+        if n < 2: return 0.0
+        d = normalized_distances(archive, archive, self.LOW, self.RANGE, self.periodic)
+        return float(d.sum() / (n * (n - 1)))
+
     def _apply_greedy_refinement(self, pool, it):
-        if self.progress_callback: self.progress_callback(int(it*100/self.config.max_iter), "Aplicando pulido codicioso...", None)
+        self._emit_progress(it, "Aplicando pulido codicioso...", "info")
         best_sol = self.best_params_global.copy()
         best_cost = self.best_cost_global
         candidates = []
         step_sizes = self.RANGE * self.config.refinement_step
         for i in range(self.DIM):
             p_plus = best_sol.copy()
-            p_plus[i] = min(p_plus[i] + step_sizes[i], self.HIGH[i])
+            p_plus[i] = p_plus[i] + step_sizes[i]
             candidates.append(p_plus)
             p_minus = best_sol.copy()
-            p_minus[i] = max(p_minus[i] - step_sizes[i], self.LOW[i])
+            p_minus[i] = p_minus[i] - step_sizes[i]
             candidates.append(p_minus)
         
-        candidate_costs = np.array(pool.map(self.fitness, candidates))
+        candidates = self._filter_duplicates(self._repair(np.array(candidates)), best_sol[None, :])
+        candidate_costs = self._evaluate(pool, candidates)
         for i in range(len(candidates)):
             if candidate_costs[i] < best_cost:
                 best_cost = candidate_costs[i]
@@ -210,12 +580,12 @@ class ACOROptimizer:
         if best_cost < self.best_cost_global:
             self.best_cost_global = best_cost
             self.best_params_global = best_sol
-            if self.progress_callback: self.progress_callback(int(it*100/self.config.max_iter), f"Pulido encontr0 mejora: {best_cost:.3e}", None)
+            self._emit_progress(it, f"Pulido encontró mejora: {best_cost:.3e}", "success")
 
 
 class ACORWorker(QThread):
     """Ejecuta el optimizador ACOR en un hilo separado para no bloquear la GUI."""
-    progress_signal = pyqtSignal(int, str, object)
+    progress_signal = pyqtSignal(object)
     finished_signal = pyqtSignal(object)
 
     def __init__(self, optimizer: ACOROptimizer, tmax_seconds, plateau_K):
@@ -225,17 +595,20 @@ class ACORWorker(QThread):
         self.plateau_K = plateau_K
         self.optimizer.progress_callback = self.handle_progress
 
-    def handle_progress(self, pct: int, msg: str, params):
-        self.progress_signal.emit(pct, msg, params)
+    def handle_progress(self, event: ProgressEvent):
+        self.progress_signal.emit(event)
 
     def stop(self):
         self.optimizer.request_stop()
 
+    def pause(self): self.optimizer.request_pause()
+    def resume(self): self.optimizer.resume()
+
     def run(self):
         try:
             self.optimizer.optimize(self.tmax_seconds, self.plateau_K)
             self.finished_signal.emit(self.optimizer)
         except Exception as e:
             error_msg = f"Error en worker: {e}\n{traceback.format_exc()}"
-            self.progress_signal.emit(0, error_msg, None)
+            self.progress_signal.emit(ProgressEvent(0, self.optimizer.config.max_iter, self.optimizer.best_cost_global, error_msg, "error"))
             self.finished_signal.emit(self.optimizer)
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""
+Ajuste por lotes: un ajuste independiente por cada conjunto de datos, con una misma
+configuración ACOR y un presupuesto fijo de procesos.
+
+Uso sin interfaz gráfica:
+    python -m clases.batch "Seciones Guardadas/Datos" --N 128700000 --workers 8 --out lote.json
+    python -m clases.batch "Seciones Guardadas/Datos" --N 128700000 --joint --shared gamma0,sigma0,k
+"""
+import json
+import time
+from dataclasses import replace
+import numpy as np
+
+from .datasets import load_dataset, collect_dataset_paths
+from .fit_jobs import FitJob, FitResult, run_jobs
+from .seir_model import SEIRModel, ENGINES, FREQUENCY_GUARDS
+from .acor_optimizer import ACOROptimizer
+
+DEFAULT_SHARED_PARAMS = ("gamma0", "sigma0", "k")
+
+def build_batch_jobs(paths, acor_config, harmonic_config=None, loss_type="MSE", huber_delta=1.0, N=None,
+                     bounds=None, tmax_seconds=None, plateau_K=None, engine="odeint", job_options=None):
+    """Crea un `FitJob` por archivo de datos. Devuelve (jobs, errores) donde errores es [(archivo, mensaje)].
+
+    `job_options` son campos adicionales de `FitJob` (p. ej. la guardia de frecuencias).
+    """
+    jobs, errors = [], []
+    for path in collect_dataset_paths(paths):
+        try:
+            data = load_dataset(path, N)
+        except Exception as e:
+            errors.append((path, str(e))); continue
+        kwargs = {} if harmonic_config is None else {"harmonic_config": dict(harmonic_config)}
+        jobs.append(FitJob(data["name"], data["t"], data["I"], data["N"], replace(acor_config), loss_type=loss_type,
+                           huber_delta=huber_delta, bounds=bounds, tmax_seconds=tmax_seconds, plateau_K=plateau_K,
+                           source=data["source"], engine=engine, **kwargs, **(job_options or {})))
+    return jobs, errors
+
+def run_batch(paths, acor_config, harmonic_config=None, loss_type="MSE", huber_delta=1.0, N=None, bounds=None,
+              tmax_seconds=None, plateau_K=None, max_workers=None, callback=None, should_stop=None, engine="odeint",
+              job_options=None):
+    """Ajusta cada conjunto de datos de `paths` (archivos y/o carpetas) y devuelve un `FitResult` por archivo."""
+    jobs, errors = build_batch_jobs(paths, acor_config, harmonic_config, loss_type, huber_delta, N, bounds, tmax_seconds, plateau_K, engine,
+                                    job_options)
+    results = [r for r in run_jobs(jobs, max_workers, callback, should_stop) if r is not None]
+    for path, msg in errors:
+        results.append(FitResult(path, dict(harmonic_config or {}), float('inf'), None, [], source=path, error=msg))
+    return results
+
+def run_joint_fit(paths, acor_config, shared_params=DEFAULT_SHARED_PARAMS, harmonic_config=None, loss_type="MSE",
+                  huber_delta=1.0, N=None, bounds=None, tmax_seconds=None, plateau_K=None, progress_callback=None,
+                  on_optimizer=None, guard_options=None):
+    """Ajusta todas las series de `paths` a la vez, con los parámetros `shared_params` comunes a todas.
+
+    Devuelve (FitResult, modelo); `modelo.split_joint_params(result.best_params)` da los parámetros de cada serie.
+    `on_optimizer(optimizer)` se llama antes de optimizar (p. ej. para poder detenerlo desde la interfaz)
+    y `guard_options` configura la guardia de rigidez del modelo (ver `SEIRModel.guard_options`).
+    """
+    start = time.time()
+    datasets = [load_dataset(path, N) for path in collect_dataset_paths(paths)]
+    model = SEIRModel(dict(harmonic_config) if harmonic_config else None)
+    model.loss_type = loss_type
+    model.huber_delta = huber_delta
+    if bounds is not None: model.bounds = np.asarray(bounds, dtype=float)
+    for name, value in (guard_options or {}).items(): setattr(model, name, value)
+    model.set_series(datasets, shared_params)
+    labels, joint_bounds, _ = model.joint_layout()
+
+    optimizer = ACOROptimizer(model.joint_fitness, joint_bounds, acor_config, periodic=model.joint_periodic_mask())
+    optimizer.progress_callback = progress_callback
+    if on_optimizer: on_optimizer(optimizer)
+    best_params, best_cost = optimizer.optimize(tmax_seconds, plateau_K)
+    result = FitResult("conjunto", dict(model.harmonic_config), float(best_cost), best_params, labels,
+                       iterations=len(optimizer.history_best_cost), duration=time.time() - start,
+                       source=";".join(d["source"] for d in datasets))
+    if np.isfinite(best_cost) and loss_type == "MSE":
+        result.aic, result.bic = model.calculate_joint_aic_bic(model.joint_losses(best_params), len(labels))
+    return result, model
+
+def batch_results_to_dict(results):
+    """Serializa los resultados de un lote para guardarlos como JSON."""
+    def num(x): return float(x) if np.isfinite(x) else None
+    return [{"name": r.name, "source": r.source, "structure": r.harmonic_config, "best_cost": num(r.best_cost),
+             "aic": num(r.aic), "bic": num(r.bic), "iterations": r.iterations, "duration": r.duration,
+             "timeouts": r.timeouts, "labels": r.labels, "best_params": None if r.best_params is None else r.best_params.tolist(),
+             "error": r.error} for r in results]
+
+def save_batch_results(results, file_path):
+    with open(file_path, "w") as f: json.dump(batch_results_to_dict(results), f, indent=4)
+
+def main(argv=None):
+    import argparse
+    from .helpers import ACORConfig
+
+    parser = argparse.ArgumentParser(description="Ajuste SEIR-ACOR por lotes de conjuntos de datos.")
+    parser.add_argument("paths", nargs="+", help="Archivos .xlsx/.json y/o carpetas que los contienen.")
+    parser.add_argument("--N", type=int, default=None, help="Población para los archivos que no la incluyen (.xlsx).")
+    parser.add_argument("--max-iter", type=int, default=ACORConfig.max_iter)
+    parser.add_argument("--n-ants", type=int, default=ACORConfig.n_ants)
+    parser.add_argument("--archive-size", type=int, default=ACORConfig.archive_size)
+    parser.add_argument("--plateau", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=None, help="Ajustes simultáneos (procesos).")
+    parser.add_argument("--loss", default="MSE", choices=["MSE", "MAE", "Huber"])
+    parser.add_argument("--engine", default="odeint", choices=ENGINES, help="Motor de integración (no aplica al ajuste conjunto).")
+    parser.add_argument("--frequency-guard", default="off", choices=FREQUENCY_GUARDS,
+                        help="Rechazar (penalty) o excluir de los límites (bounds) las frecuencias que el muestreo no resuelve.")
+    parser.add_argument("--joint", action="store_true", help="Ajustar todas las series a la vez (ajuste conjunto).")
+    parser.add_argument("--shared", default=",".join(DEFAULT_SHARED_PARAMS), help="Parámetros compartidos en el ajuste conjunto.")
+    parser.add_argument("--out", default="resultados_lote.json")
+    args = parser.parse_args(argv)
+
+    config = ACORConfig(n_ants=args.n_ants, archive_size=args.archive_size, max_iter=args.max_iter)
+    if args.joint:
+        shared = [p.strip() for p in args.shared.split(",") if p.strip()]
+        result, model = run_joint_fit(args.paths, config, shared, loss_type=args.loss, N=args.N, plateau_K=args.plateau,
+                                      guard_options={"frequency_guard": args.frequency_guard})
+        save_batch_results([result], args.out)
+        for serie, loss in zip(model.series, model.joint_losses(result.best_params)):
+            print(f"{serie['name']}: pérdida {loss:.4e}")
+        print(f"Costo conjunto {result.best_cost:.4e} ({len(result.labels)} parámetros). Resultados guardados en {args.out}")
+        return
+    results = run_batch(args.paths, config, loss_type=args.loss, N=args.N, plateau_K=args.plateau, max_workers=args.workers, engine=args.engine,
+                        job_options={"frequency_guard": args.frequency_guard},
+                        callback=lambda d, n, r: print(f"[{d}/{n}] {r.name}: costo {r.best_cost:.4e} ({r.duration:.1f} s)", flush=True))
+    save_batch_results(results, args.out)
+    for r in results:
+        if r.error: print(f"Error en {r.source}: {r.error.splitlines()[0]}")
+    print(f"Resultados guardados en {args.out}")
+
+if __name__ == "__main__":
+    main()
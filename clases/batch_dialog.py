@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+import os
+from dataclasses import replace
+import numpy as np
+import psutil
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QFormLayout, QSpinBox, QLineEdit, QListWidget, QPushButton,
+    QDialogButtonBox, QTextEdit, QProgressBar, QTableWidget, QTableWidgetItem, QHeaderView,
+    QFileDialog, QMessageBox, QLabel
+)
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from .batch import run_batch, run_joint_fit, save_batch_results, DEFAULT_SHARED_PARAMS
+from .evaluators import default_worker_count
+
+class BatchWorker(QThread):
+    """Ejecuta un lote de ajustes en un hilo separado."""
+    progress_signal = pyqtSignal(int, str)
+    finished_signal = pyqtSignal(object)
+
+    def __init__(self, paths, acor_config, harmonic_config, bounds, loss_type, huber_delta, N, plateau_K, tmax_seconds, max_workers,
+                 engine="odeint", job_options=None):
+        super().__init__()
+        self.engine = engine
+        self.job_options = job_options
+        self.paths = paths
+        self.bounds = bounds
+        self.acor_config = acor_config
+        self.harmonic_config = harmonic_config
+        self.loss_type = loss_type
+        self.huber_delta = huber_delta
+        self.N = N
+        self.plateau_K = plateau_K
+        self.tmax_seconds = tmax_seconds
+        self.max_workers = max_workers
+        self._is_running = True
+
+    def stop(self):
+        self._is_running = False
+
+    def run(self):
+        try:
+            def on_progress(done, total, result):
+                self.progress_signal.emit(int(done * 100 / total), f"[{done}/{total}] {result.name}: costo {result.best_cost:.4e} ({result.duration:.1f} s)")
+            results = run_batch(self.paths, self.acor_config, self.harmonic_config, self.loss_type, self.huber_delta, self.N,
+                                bounds=self.bounds, tmax_seconds=self.tmax_seconds, plateau_K=self.plateau_K, max_workers=self.max_workers,
+                                callback=on_progress, should_stop=lambda: not self._is_running, engine=self.engine,
+                                job_options=self.job_options)
+            self.finished_signal.emit(results)
+        except Exception as e:
+            self.progress_signal.emit(0, f"Error en el lote: {e}")
+            self.finished_signal.emit(None)
+
+class JointFitWorker(QThread):
+    """Ejecuta el ajuste conjunto de varias series en un hilo separado."""
+    progress_signal = pyqtSignal(int, str)
+    finished_signal = pyqtSignal(object)
+
+    def __init__(self, paths, acor_config, shared_params, harmonic_config, bounds, loss_type, huber_delta, N, plateau_K, tmax_seconds,
+                 guard_options=None):
+        super().__init__()
+        self.args = (paths, acor_config, shared_params, harmonic_config, loss_type, huber_delta, N, bounds, tmax_seconds, plateau_K)
+        self.guard_options = guard_options
+        self.optimizer = None
+
+    def stop(self):
+        if self.optimizer: self.optimizer.request_stop()
+
+    def handle_progress(self, event):
+        self.progress_signal.emit(event.percent, event.describe())
+
+    def run(self):
+        try:
+            result, model = run_joint_fit(*self.args, progress_callback=self.handle_progress,
+                                          on_optimizer=lambda opt: setattr(self, "optimizer", opt),
+                                          guard_options=self.guard_options)
+            self.finished_signal.emit((result, model))
+        except Exception as e:
+            self.progress_signal.emit(0, f"Error en el ajuste conjunto: {e}")
+            self.finished_signal.emit(None)
+
+class BatchDialog(QDialog):
+    """Diálogo para ajustar muchos conjuntos de datos con la misma configuración ACOR."""
+    def __init__(self, model, acor_config, plateau_K=None, tmax_seconds=None, parent=None):
+        super().__init__(parent)
+        self.model = model
+        self.acor_config = acor_config
+        self.plateau_K = plateau_K
+        self.tmax_seconds = tmax_seconds
+        self.worker = None
+        self.results = []
+        self.setWindowTitle("Ajuste por Lotes")
+        self.setGeometry(420, 240, 900, 650)
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel("Un ajuste independiente por archivo (.xlsx / .json), con la configuración ACOR y la estructura actuales."))
+        self.list_paths = QListWidget()
+        layout.addWidget(self.list_paths, 1)
+        paths_buttons = QHBoxLayout()
+        btn_add_files = QPushButton("Añadir Archivos..."); btn_add_files.clicked.connect(self.add_files)
+        btn_add_folder = QPushButton("Añadir Carpeta..."); btn_add_folder.clicked.connect(self.add_folder)
+        btn_clear = QPushButton("Limpiar Lista"); btn_clear.clicked.connect(self.list_paths.clear)
+        for btn in (btn_add_files, btn_add_folder, btn_clear): paths_buttons.addWidget(btn)
+        layout.addLayout(paths_buttons)
+
+        form_layout = QFormLayout()
+        self.in_N = QLineEdit(str(model.N)); self.in_N.setToolTip("Población usada para los archivos que no la incluyen (.xlsx).")
+        self.spin_workers = QSpinBox(); self.spin_workers.setRange(1, psutil.cpu_count(logical=True) or 1); self.spin_workers.setValue(default_worker_count())
+        form_layout.addRow("Población (N) para .xlsx:", self.in_N)
+        form_layout.addRow("Ajustes simultáneos (procesos):", self.spin_workers)
+        self.in_shared = QLineEdit(", ".join(DEFAULT_SHARED_PARAMS))
+        self.in_shared.setToolTip("Etiquetas de los parámetros comunes a todas las series en el ajuste conjunto.")
+        form_layout.addRow("Parámetros compartidos (ajuste conjunto):", self.in_shared)
+        layout.addLayout(form_layout)
+
+        self.progress_bar = QProgressBar()
+        self.log_text = QTextEdit(); self.log_text.setReadOnly(True)
+        self.table = QTableWidget(0, 6)
+        self.table.setHorizontalHeaderLabels(["Archivo", "Costo Final", "AIC", "BIC", "Iteraciones", "Tiempo (s)"])
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        layout.addWidget(self.progress_bar)
+        layout.addWidget(self.log_text, 1)
+        layout.addWidget(self.table, 2)
+
+        self.btn_run = QPushButton("Ejecutar Lote"); self.btn_run.clicked.connect(self.run_batch)
+        self.btn_joint = QPushButton("Ajuste Conjunto"); self.btn_joint.clicked.connect(self.run_joint_fit)
+        self.btn_joint.setToolTip("Ajusta todas las series a la vez, compartiendo los parámetros indicados.")
+        self.btn_stop = QPushButton("Detener"); self.btn_stop.setEnabled(False); self.btn_stop.clicked.connect(self.stop_batch)
+        self.btn_export = QPushButton("Exportar Resultados..."); self.btn_export.setEnabled(False); self.btn_export.clicked.connect(self.export_results)
+        button_box = QDialogButtonBox()
+        for btn in (self.btn_run, self.btn_joint, self.btn_stop, self.btn_export): button_box.addButton(btn, QDialogButtonBox.ActionRole)
+        button_box.addButton(QDialogButtonBox.Close).clicked.connect(self.close)
+        layout.addWidget(button_box)
+
+    def add_files(self):
+        files, _ = QFileDialog.getOpenFileNames(self, "Seleccionar Datos", "", "Datos (*.xlsx *.xls *.json)")
+        for f in files: self.list_paths.addItem(f)
+
+    def add_folder(self):
+        folder = QFileDialog.getExistingDirectory(self, "Seleccionar Carpeta de Datos")
+        if folder: self.list_paths.addItem(folder)
+
+    def _get_inputs(self):
+        paths = [self.list_paths.item(i).text() for i in range(self.list_paths.count())]
+        if not paths:
+            QMessageBox.warning(self, "Sin Datos", "Añada archivos o carpetas al lote."); return None
+        try:
+            N = int(self.in_N.text()) if self.in_N.text().strip() else None
+        except ValueError:
+            QMessageBox.warning(self, "Error de Entrada", "Población (N) inválida."); return None
+        self.table.setRowCount(0); self.btn_export.setEnabled(False)
+        self.btn_run.setEnabled(False); self.btn_joint.setEnabled(False); self.btn_stop.setEnabled(True)
+        return paths, N
+
+    def run_joint_fit(self):
+        shared = [p.strip() for p in self.in_shared.text().split(",") if p.strip()]
+        inputs = self._get_inputs()
+        if inputs is None: return
+        paths, N = inputs
+        self.log_text.append(f"Iniciando ajuste conjunto (compartidos: {', '.join(shared) or 'ninguno'})...")
+        self.worker = JointFitWorker(paths, replace(self.acor_config), shared, dict(self.model.harmonic_config), self.model.bounds.copy(),
+                                     self.model.loss_type, self.model.huber_delta, N, self.plateau_K, self.tmax_seconds,
+                                     self.model.guard_options())
+        self.worker.progress_signal.connect(self.update_progress)
+        self.worker.finished_signal.connect(self.on_joint_finished)
+        self.worker.start()
+
+    def on_joint_finished(self, output):
+        self.btn_run.setEnabled(True); self.btn_joint.setEnabled(True); self.btn_stop.setEnabled(False)
+        self.worker = None
+        if output is None:
+            self.log_text.append("El ajuste conjunto no produjo resultados."); return
+        result, model = output
+        self.on_batch_finished([result])
+        for serie, loss in zip(model.series, model.joint_losses(result.best_params)):
+            self.log_text.append(f"  - {serie['name']}: pérdida {loss:.4e}")
+        self.log_text.append(f"Ajuste conjunto: {len(result.labels)} parámetros para {len(model.series)} series.")
+
+    def run_batch(self):
+        inputs = self._get_inputs()
+        if inputs is None: return
+        paths, N = inputs
+        self.log_text.append(f"Iniciando lote con {len(paths)} entradas...")
+        self.worker = BatchWorker(paths, replace(self.acor_config), dict(self.model.harmonic_config), self.model.bounds.copy(), self.model.loss_type,
+                                  self.model.huber_delta, N, self.plateau_K, self.tmax_seconds, self.spin_workers.value(), self.model.engine,
+                                  self.model.guard_options())
+        self.worker.progress_signal.connect(self.update_progress)
+        self.worker.finished_signal.connect(self.on_batch_finished)
+        self.worker.start()
+
+    def stop_batch(self):
+        if self.worker:
+            self.worker.stop()
+            self.log_text.append("Deteniendo: se terminarán los ajustes en curso...")
+            self.btn_stop.setEnabled(False)
+
+    def update_progress(self, pct, msg):
+        self.progress_bar.setValue(pct)
+        self.log_text.append(msg)
+
+    def on_batch_finished(self, results):
+        self.btn_run.setEnabled(True); self.btn_joint.setEnabled(True); self.btn_stop.setEnabled(False)
+        self.worker = None
+        if not results:
+            self.log_text.append("El lote no produjo resultados."); return
+        self.results = results
+        for r in results:
+            row = self.table.rowCount(); self.table.insertRow(row)
+            item = QTableWidgetItem(os.path.basename(r.source) or r.name); item.setToolTip(r.source)
+            self.table.setItem(row, 0, item)
+            self.table.setItem(row, 1, QTableWidgetItem(f"{r.best_cost:.4e}" if not r.error else "Error"))
+            self.table.setItem(row, 2, QTableWidgetItem(f"{r.aic:.2f}" if np.isfinite(r.aic) else "N/A"))
+            self.table.setItem(row, 3, QTableWidgetItem(f"{r.bic:.2f}" if np.isfinite(r.bic) else "N/A"))
+            self.table.setItem(row, 4, QTableWidgetItem(str(r.iterations)))
+            self.table.setItem(row, 5, QTableWidgetItem(f"{r.duration:.1f}"))
+            if r.error: self.log_text.append(f"Error en {r.source}: {r.error.splitlines()[0]}")
+        self.btn_export.setEnabled(True)
+        self.log_text.append("Lote finalizado.")
+
+    def export_results(self):
+        file, _ = QFileDialog.getSaveFileName(self, "Exportar Resultados del Lote", "resultados_lote.json", "JSON Files (*.json)")
+        if not file: return
+        try:
+            save_batch_results(self.results, file)
+            self.log_text.append(f"Resultados exportados a {os.path.basename(file)}")
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"{e}")
+
+    def closeEvent(self, event):
+        self.stop_batch()
+        super().closeEvent(event)
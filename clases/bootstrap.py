@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+Intervalos de confianza por bootstrap del mejor ajuste.
+
+Se generan B series a partir de la curva ajustada, remuestreando sus residuos ("residual") o
+con ruido gaussiano de la varianza estimada ("parametric"), y cada una se vuelve a ajustar con
+una corrida corta de ACOR cuyo archivo se siembra alrededor del mejor ajuste original (el
+archivo final de esa ejecución o una bola de puntos perturbados): el óptimo de una serie
+remuestreada está cerca, así que bastan pocas iteraciones y no se gastan evaluaciones en el
+diseño inicial. Los reajustes son `FitJob` independientes y se reparten entre procesos con
+`run_jobs`. Antes de tomar percentiles, los términos armónicos de cada reajuste se ordenan como
+los del mejor ajuste (la forma canónica los ordena por frecuencia, y dos frecuencias parecidas
+pueden intercambiarse entre réplicas). Los intervalos no dependen de la hipótesis gaussiana de AIC/BIC.
+"""
+import itertools, time
+from dataclasses import dataclass, field, replace
+import numpy as np
+
+from .fit_jobs import FitJob, run_jobs
+
+BOOTSTRAP_KINDS = ("residual", "parametric")
+
+@dataclass
+class BootstrapResult:
+    """Parámetros reajustados e intervalos percentiles de cada parámetro."""
+    labels: list
+    best_params: np.ndarray
+    samples: np.ndarray
+    costs: np.ndarray
+    lower: np.ndarray
+    upper: np.ndarray
+    median: np.ndarray
+    std: np.ndarray
+    level: float = 0.95
+    kind: str = "residual"
+    n_failed: int = 0
+    duration: float = 0.0
+    errors: list = field(default_factory=list)
+
+    def rows(self):
+        """(etiqueta, mejor valor, mediana, límite inferior, límite superior) de cada parámetro."""
+        return list(zip(self.labels, self.best_params, self.median, self.lower, self.upper))
+
+def bootstrap_series(model, best_params, n_samples, kind="residual", rng=None):
+    """Series remuestreadas (n_samples, n_datos) alrededor del ajuste de `best_params`.
+
+    El primer dato se conserva porque fija la condición inicial. "residual" remuestrea los
+    residuos centrados e inflados por sqrt(n / (n - p)); "parametric" suma ruido normal con
+    sigma^2 = SSE / (n - p). Los valores negativos se recortan a cero.
+    """
+    if kind not in BOOTSTRAP_KINDS: raise ValueError(f"Tipo de bootstrap desconocido: {kind!r}")
+    rng = np.random.default_rng() if rng is None else rng
+    fitted = model.simulate(best_params)[:, 2]
+    residuals = (model.I_data - fitted)[1:]
+    n, p = len(model.I_data), len(best_params)
+    if n <= p: raise ValueError(f"Hacen falta más datos ({n}) que parámetros ({p}).")
+    if kind == "residual":
+        pool = (residuals - residuals.mean()) * np.sqrt(n / (n - p))
+        noise = rng.choice(pool, size=(n_samples, n - 1))
+    else:
+        noise = np.sqrt(np.sum(residuals ** 2) / (n - p)) * rng.standard_normal((n_samples, n - 1))
+    series = np.empty((n_samples, n))
+    series[:, 0] = model.I_data[0]
+    series[:, 1:] = np.maximum(fitted[1:] + noise, 0.0)
+    return series
+
+def refit_archive(model, best_params, size, archive=None, costs=None, jitter=0.01, rng=None):
+    """Semillas (size - 1, p) para el archivo de cada reajuste; el mejor ajuste entra como warm start.
+
+    Se toman los mejores puntos de `archive` (el archivo final de la ejecución original, con sus
+    `costs`) y, si no alcanzan, se completan con puntos normales alrededor de `best_params` de
+    desviación `jitter` veces el ancho de los límites.
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    best_params = np.asarray(best_params, dtype=float)
+    seeds = np.empty((0, len(best_params)))
+    if archive is not None:
+        archive = np.asarray(archive, dtype=float)
+        costs = np.zeros(len(archive)) if costs is None else np.asarray(costs, dtype=float)
+        keep = np.isfinite(costs) & np.any(archive != best_params, axis=1)
+        seeds = archive[keep][np.argsort(costs[keep], kind="stable")][:size - 1]
+    missing = size - 1 - len(seeds)
+    if missing > 0:
+        span = model.HIGH - model.LOW
+        seeds = np.vstack([seeds, best_params + jitter * span * rng.standard_normal((missing, len(best_params)))])
+    return seeds
+
+def align_terms(model, samples, reference):
+    """Permuta los términos intercambiables de cada fila de `samples` para que se parezcan a los de `reference`.
+
+    En cada grupo de `SEIRModel.exchangeable_terms` se elige, fila a fila, la permutación de los
+    términos (b, w, p) más cercana a `reference` en distancia normalizada por los límites (las
+    fases, módulo 2π).
+    """
+    X = np.array(samples, dtype=float)
+    reference = np.asarray(reference, dtype=float)
+    span = np.where(model.HIGH > model.LOW, model.HIGH - model.LOW, 1.0)
+    rows = np.arange(len(X))[:, None]
+    for terms in model.exchangeable_terms():
+        cols = np.array(terms)  # (n_terms, 3)
+        perms = np.array(list(itertools.permutations(range(len(terms)))))
+        T = X[:, cols]  # (n, n_terms, 3)
+        d = T[:, perms] - reference[cols]  # (n, n_perms, n_terms, 3)
+        periodic = model.periodic_mask[cols]
+        d = np.where(periodic, (d + np.pi) % (2 * np.pi) - np.pi, d) / span[cols]
+        best = np.argmin(np.sum(d ** 2, axis=(2, 3)), axis=1)
+        X[:, cols] = T[rows, perms[best]]
+    return X
+
+def run_bootstrap(model, best_params, acor_config, n_samples=200, kind="residual", refit_iter=30, level=0.95,
+                  max_workers=None, seed=None, plateau_K=None, callback=None, should_stop=None, archive=None,
+                  archive_costs=None):
+    """Reajusta `n_samples` series remuestreadas desde `best_params` y devuelve un `BootstrapResult`.
+
+    Cada reajuste usa `acor_config` con `refit_iter` iteraciones y una sola colonia, cuyo archivo
+    se siembra con `refit_archive` (a partir de `archive`/`archive_costs`, el archivo final de la
+    ejecución, si se dan). `callback(hechos, total, FitResult)` y `should_stop()` son los de
+    `run_jobs`. Antes de tomar percentiles los términos se alinean con `align_terms` y las fases
+    se expresan en el periodo centrado en el mejor ajuste.
+    """
+    start = time.time()
+    best_params = np.asarray(best_params, dtype=float)
+    rng = np.random.default_rng(seed)
+    series = bootstrap_series(model, best_params, n_samples, kind, rng)
+    config = replace(acor_config, max_iter=int(refit_iter), colonies_count=1)
+    seeds = refit_archive(model, best_params, config.archive_size, archive, archive_costs, rng=rng)
+    jobs = [FitJob(f"bootstrap-{b + 1}", model.t_data, I, model.N, config, dict(model.harmonic_config), model.loss_type,
+                   model.huber_delta, bounds=model.bounds.copy(), warm_start_params=best_params, initial_archive=seeds,
+                   plateau_K=plateau_K, engine=model.engine, **model.guard_options())
+            for b, I in enumerate(series)]
+    results = [r for r in run_jobs(jobs, max_workers, callback, should_stop) if r is not None]
+    ok = [r for r in results if r.best_params is not None and np.isfinite(r.best_cost)]
+    if not ok: raise ValueError("Ningún reajuste del bootstrap terminó con éxito.")
+
+    samples = align_terms(model, np.array([r.best_params for r in ok]), best_params)
+    periodic = model.periodic_mask
+    samples[:, periodic] = best_params[periodic] + (samples[:, periodic] - best_params[periodic] + np.pi) % (2 * np.pi) - np.pi
+    alpha = 100 * (1 - level) / 2
+    lower, median, upper = np.percentile(samples, [alpha, 50, 100 - alpha], axis=0)
+    return BootstrapResult(list(model.labels), best_params, samples, np.array([r.best_cost for r in ok]), lower, upper,
+                           median, samples.std(axis=0, ddof=1) if len(ok) > 1 else np.zeros(len(best_params)),
+                           level, kind, len(results) - len(ok), time.time() - start,
+                           [f"{r.name}: {r.error.splitlines()[0]}" for r in results if r.error])
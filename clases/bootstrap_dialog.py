@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+from dataclasses import replace
+import numpy as np
+import psutil
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QFormLayout, QSpinBox, QDoubleSpinBox, QComboBox, QPushButton,
+    QDialogButtonBox, QTextEdit, QProgressBar, QTableWidget, QTableWidgetItem, QHeaderView, QLabel
+)
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from .bootstrap import run_bootstrap
+from .evaluators import default_worker_count
+
+class BootstrapWorker(QThread):
+    """Ejecuta los reajustes del bootstrap en un hilo separado."""
+    progress_signal = pyqtSignal(int, str)
+    finished_signal = pyqtSignal(object)
+
+    def __init__(self, model, best_params, acor_config, n_samples, kind, refit_iter, level, max_workers, plateau_K=None,
+                 archive=None, archive_costs=None):
+        super().__init__()
+        self.model = model
+        self.best_params = best_params
+        self.acor_config = acor_config
+        self.n_samples = n_samples
+        self.kind = kind
+        self.refit_iter = refit_iter
+        self.level = level
+        self.max_workers = max_workers
+        self.plateau_K = plateau_K
+        self.archive = archive
+        self.archive_costs = archive_costs
+        self._is_running = True
+
+    def stop(self):
+        self._is_running = False
+
+    def run(self):
+        try:
+            def on_progress(done, total, result):
+                self.progress_signal.emit(int(done * 100 / total), f"[{done}/{total}] costo {result.best_cost:.4e} ({result.duration:.1f} s)")
+            result = run_bootstrap(self.model, self.best_params, self.acor_config, self.n_samples, self.kind, self.refit_iter,
+                                   self.level, self.max_workers, plateau_K=self.plateau_K, callback=on_progress,
+                                   should_stop=lambda: not self._is_running, archive=self.archive,
+                                   archive_costs=self.archive_costs)
+            self.finished_signal.emit(result)
+        except Exception as e:
+            self.progress_signal.emit(0, f"Error en el bootstrap: {e}")
+            self.finished_signal.emit(None)
+
+class BootstrapDialog(QDialog):
+    """Intervalos de confianza por bootstrap de una ejecución: reajustes cortos sembrados con su archivo final, en paralelo."""
+    def __init__(self, model, result, acor_config, plateau_K=None, parent=None):
+        super().__init__(parent)
+        self.model = model
+        self.result = result
+        self.acor_config = acor_config
+        self.plateau_K = plateau_K
+        self.worker = None
+        self.setWindowTitle(f"Bootstrap - Ejecución #{result.run_id}")
+        self.setGeometry(440, 260, 800, 650)
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel("Se reajusta cada serie remuestreada desde el mejor ajuste, con la configuración ACOR actual."))
+        form_layout = QFormLayout()
+        self.spin_samples = QSpinBox(); self.spin_samples.setRange(10, 5000); self.spin_samples.setValue(200)
+        self.cb_kind = QComboBox()
+        self.cb_kind.addItem("Residuos remuestreados", "residual"); self.cb_kind.addItem("Paramétrico (ruido normal)", "parametric")
+        self.spin_refit_iter = QSpinBox(); self.spin_refit_iter.setRange(1, 10000); self.spin_refit_iter.setValue(30)
+        self.spin_refit_iter.setToolTip("Iteraciones de cada reajuste: al partir del mejor ajuste bastan pocas.")
+        self.spin_level = QDoubleSpinBox(); self.spin_level.setRange(0.5, 0.999); self.spin_level.setSingleStep(0.01); self.spin_level.setDecimals(3)
+        self.spin_level.setValue(0.95)
+        self.spin_workers = QSpinBox(); self.spin_workers.setRange(1, psutil.cpu_count(logical=True) or 1); self.spin_workers.setValue(default_worker_count())
+        form_layout.addRow("Réplicas (B):", self.spin_samples)
+        form_layout.addRow("Tipo:", self.cb_kind)
+        form_layout.addRow("Iteraciones por reajuste:", self.spin_refit_iter)
+        form_layout.addRow("Nivel de confianza:", self.spin_level)
+        form_layout.addRow("Reajustes simultáneos (procesos):", self.spin_workers)
+        layout.addLayout(form_layout)
+
+        self.progress_bar = QProgressBar()
+        self.log_text = QTextEdit(); self.log_text.setReadOnly(True)
+        self.table = QTableWidget(0, 5)
+        self.table.setHorizontalHeaderLabels(["Parámetro", "Mejor Ajuste", "Mediana", "Inferior", "Superior"])
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        layout.addWidget(self.progress_bar)
+        layout.addWidget(self.log_text, 1)
+        layout.addWidget(self.table, 2)
+
+        self.btn_run = QPushButton("Ejecutar Bootstrap"); self.btn_run.clicked.connect(self.run_bootstrap)
+        self.btn_stop = QPushButton("Detener"); self.btn_stop.setEnabled(False); self.btn_stop.clicked.connect(self.stop_bootstrap)
+        button_box = QDialogButtonBox()
+        for btn in (self.btn_run, self.btn_stop): button_box.addButton(btn, QDialogButtonBox.ActionRole)
+        button_box.addButton(QDialogButtonBox.Close).clicked.connect(self.close)
+        layout.addWidget(button_box)
+
+    def run_bootstrap(self):
+        self.table.setRowCount(0)
+        self.btn_run.setEnabled(False); self.btn_stop.setEnabled(True)
+        self.log_text.append(f"Iniciando bootstrap con {self.spin_samples.value()} réplicas...")
+        self.worker = BootstrapWorker(self.model, self.result.best_params, replace(self.acor_config), self.spin_samples.value(),
+                                      self.cb_kind.currentData(), self.spin_refit_iter.value(), self.spin_level.value(),
+                                      self.spin_workers.value(), self.plateau_K, self.result.archive, self.result.archive_costs)
+        self.worker.progress_signal.connect(self.update_progress)
+        self.worker.finished_signal.connect(self.on_bootstrap_finished)
+        self.worker.start()
+
+    def stop_bootstrap(self):
+        if self.worker:
+            self.worker.stop()
+            self.log_text.append("Deteniendo: se terminarán los reajustes en curso...")
+            self.btn_stop.setEnabled(False)
+
+    def update_progress(self, pct, msg):
+        self.progress_bar.setValue(pct)
+        self.log_text.append(msg)
+
+    def on_bootstrap_finished(self, boot):
+        self.btn_run.setEnabled(True); self.btn_stop.setEnabled(False)
+        self.worker = None
+        if boot is None:
+            self.log_text.append("El bootstrap no produjo resultados."); return
+        self.result.bootstrap = boot
+        for label, best, median, lower, upper in boot.rows():
+            row = self.table.rowCount(); self.table.insertRow(row)
+            for col, value in enumerate((label, f"{best:.6f}", f"{median:.6f}", f"{lower:.6f}", f"{upper:.6f}")):
+                self.table.setItem(row, col, QTableWidgetItem(value))
+        for error in boot.errors[:5]: self.log_text.append(f"Error en {error}")
+        self.log_text.append(f"Bootstrap finalizado: {len(boot.samples)} reajustes válidos, {boot.n_failed} fallidos, "
+                             f"intervalos al {boot.level:.1%} en {boot.duration:.1f} s "
+                             f"(costo mediano {np.median(boot.costs):.4e}).")
+
+    def closeEvent(self, event):
+        self.stop_bootstrap()
+        super().closeEvent(event)
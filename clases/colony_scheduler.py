@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+
+class ColonyScheduler:
+    """Reparte el presupuesto de hormigas de cada generación entre colonias.
+
+    Funciona como un bandit: cada colonia acumula una media exponencial de su mejora
+    relativa por hormiga evaluada y recibe un bono de exploración tipo UCB que crece
+    cuando lleva tiempo recibiendo pocas hormigas. Toda colonia activa conserva una
+    cuota mínima del reparto equitativo para que la exploración no se detenga.
+    Al retirar una colonia (`retire`) su parte del presupuesto desaparece, salvo que se pida
+    repartirla entre las colonias que siguen activas.
+    """
+    def __init__(self, n_colonies, total_ants, min_share=0.3, decay=0.8, exploration=0.5):
+        self.n_colonies = n_colonies
+        self.total_ants = int(total_ants)
+        self.min_share = float(np.clip(min_share, 0.0, 1.0))
+        self.decay = decay
+        self.exploration = exploration
+        self.rewards = np.zeros(n_colonies)
+        self.pulls = np.zeros(n_colonies)
+        self.active = np.ones(n_colonies, dtype=bool)
+        self.steps = 0
+        self._share = self.total_ants / max(n_colonies, 1)
+
+    def retire(self, colony, redistribute=False):
+        """Desactiva una colonia. Sin `redistribute` el presupuesto baja en su parte (total inicial / colonias)."""
+        if not self.active[colony]: return
+        self.active[colony] = False
+        if not redistribute:
+            remaining = int(self.active.sum())
+            self.total_ants = int(round(self._share * remaining))
+
+    def allocate(self):
+        """Devuelve el número de hormigas para cada colonia (suma = presupuesto total)."""
+        alloc = np.zeros(self.n_colonies, dtype=int)
+        active = np.flatnonzero(self.active)
+        if len(active) == 0: return alloc
+        fair = self.total_ants / len(active)
+        alloc[active] = max(1, int(np.floor(self.min_share * fair)))
+        remaining = self.total_ants - alloc.sum()
+        if remaining <= 0: return alloc
+
+        best = self.rewards[active].max()
+        score = self.rewards[active] / best if best > 0 else np.ones(len(active))
+        bonus = self.exploration * np.sqrt(np.log(self.steps + 2) / (self.pulls[active] + 1))
+        weights = score + bonus
+        exact = remaining * weights / weights.sum()
+        extra = np.floor(exact).astype(int)
+        # Reparto de los restos por mayor residuo
+        leftover = remaining - extra.sum()
+        if leftover > 0: extra[np.argsort(extra - exact)[:leftover]] += 1
+        alloc[active] += extra
+        return alloc
+
+    def update(self, colony, prev_best, new_best, n_ants):
+        """Registra la mejora obtenida por una colonia con `n_ants` evaluaciones."""
+        if n_ants <= 0: return
+        if not np.isfinite(prev_best):
+            # Una colonia sin ninguna evaluación válida que encuentra una cuenta como mejora completa
+            gain = 1.0 if np.isfinite(new_best) else 0.0
+        else:
+            gain = max(0.0, prev_best - new_best) / max(abs(prev_best), 1e-12)
+        self.rewards[colony] = self.decay * self.rewards[colony] + (1 - self.decay) * gain / n_ants
+        self.pulls[colony] += n_ants * self.n_colonies / max(self.total_ants, 1)
+
+    def step(self):
+        self.steps += 1
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""
+Carga de series de datos (tiempo, infectados) desde archivos .xlsx o .json.
+"""
+import os
+import json
+import numpy as np
+
+DATA_EXTENSIONS = ('.xlsx', '.xls', '.json')
+
+def load_dataset(file_path, N=None):
+    """Carga una serie desde un archivo y devuelve un dict con 't', 'I', 'N', 'name' y 'source'.
+
+    Los .xlsx contienen dos columnas (tiempo, infectados); su población se toma de `N`.
+    Los .json de sesión incluyen 't', 'I' y 'N'.
+    """
+    name = os.path.splitext(os.path.basename(file_path))[0]
+    if file_path.lower().endswith('.json'):
+        with open(file_path, "r") as f: data = json.load(f)
+        t = np.array(data["t"], dtype=float)
+        I = np.array(data["I"], dtype=float)
+        N = int(data.get("N", N)) if data.get("N", N) is not None else None
+    else:
+        import pandas as pd
+        df = pd.read_excel(file_path, dtype=float).dropna(how="all")
+        t = df.iloc[:, 0].to_numpy(float)
+        I = df.iloc[:, 1].to_numpy(float)
+    if N is None:
+        raise ValueError(f"'{os.path.basename(file_path)}' no define la población (N).")
+    return {"t": t, "I": I, "N": int(N), "name": name, "source": os.path.abspath(file_path)}
+
+def collect_dataset_paths(paths):
+    """Expande una lista de archivos y/o carpetas en la lista ordenada de archivos de datos."""
+    if isinstance(paths, str): paths = [paths]
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            for entry in sorted(os.listdir(path)):
+                full = os.path.join(path, entry)
+                # Se ignoran los archivos de bloqueo de Excel (~$...)
+                if os.path.isfile(full) and entry.lower().endswith(DATA_EXTENSIONS) and not entry.startswith('~$'):
+                    found.append(full)
+        elif path.lower().endswith(DATA_EXTENSIONS):
+            found.append(path)
+    return found
@@ -4,16 +4,16 @@ import pyqtgraph as pg
 from PyQt5.QtWidgets import (
     QDialog, QVBoxLayout, QGroupBox, QLabel, QTableWidget, QTableWidgetItem,
     QGridLayout, QComboBox, QCheckBox, QTabWidget, QSpinBox, QDoubleSpinBox,
-    QDialogButtonBox, QWidget, QMessageBox, QApplication
+    QDialogButtonBox, QWidget, QMessageBox, QApplication, QLineEdit
 )
 from PyQt5.QtCore import Qt
-from scipy.integrate import odeint
 from multiprocessing import Pool
 import psutil
 
 from .helpers import ACORConfig, parse_numeric
 from .seir_model import SEIRModel
 from .acor_optimizer import ACOROptimizer
+from .remote import generate_authkey
 
 class AdvancedACORConfigDialog(QDialog):
     """Di\u00e1logo para configurar par\u00e1metros avanzados de ACOR."""
@@ -44,6 +44,34 @@ class AdvancedACORConfigDialog(QDialog):
         self.spin_mig_size.setRange(1, 10)
         self.spin_mig_size.setValue(2)
         col_layout.addWidget(self.spin_mig_size, 2, 1)
+        self.chk_adaptive_alloc = QCheckBox("Repartir hormigas seg\u00fan la mejora reciente de cada colonia")
+        self.chk_adaptive_alloc.setChecked(True)
+        col_layout.addWidget(self.chk_adaptive_alloc, 3, 0, 1, 2)
+        col_layout.addWidget(QLabel("Cuota m\u00ednima por colonia (fracci\u00f3n):"), 4, 0)
+        self.spin_alloc_min_share = QDoubleSpinBox()
+        self.spin_alloc_min_share.setRange(0.05, 1.0)
+        self.spin_alloc_min_share.setSingleStep(0.05)
+        self.spin_alloc_min_share.setValue(0.3)
+        col_layout.addWidget(self.spin_alloc_min_share, 4, 1)
+        self.chk_retirement = QCheckBox("Retirar colonias colapsadas (fin autom\u00e1tico si todas convergen)")
+        self.chk_retirement.setChecked(True)
+        col_layout.addWidget(self.chk_retirement, 5, 0, 1, 2)
+        col_layout.addWidget(QLabel("Dispersi\u00f3n m\u00ednima (fracci\u00f3n del rango):"), 6, 0)
+        self.spin_spread_tol = QDoubleSpinBox()
+        self.spin_spread_tol.setDecimals(5)
+        self.spin_spread_tol.setRange(1e-5, 0.1)
+        self.spin_spread_tol.setSingleStep(1e-3)
+        self.spin_spread_tol.setValue(1e-3)
+        col_layout.addWidget(self.spin_spread_tol, 6, 1)
+        col_layout.addWidget(QLabel("Paciencia por colonia (iters):"), 7, 0)
+        self.spin_colony_patience = QSpinBox()
+        self.spin_colony_patience.setRange(5, 1000)
+        self.spin_colony_patience.setValue(30)
+        col_layout.addWidget(self.spin_colony_patience, 7, 1)
+        self.chk_redistribute = QCheckBox("Repartir las hormigas de las colonias retiradas entre las activas")
+        self.chk_redistribute.setToolTip("Desactivado: retirar una colonia ahorra sus evaluaciones en cada generaci\u00f3n.")
+        self.chk_redistribute.setChecked(False)
+        col_layout.addWidget(self.chk_redistribute, 8, 0, 1, 2)
         colony_layout.addWidget(colony_group)
         colony_layout.addStretch()
         tab_widget.addTab(colony_tab, "Modelo de Colonias")
@@ -54,6 +82,14 @@ class AdvancedACORConfigDialog(QDialog):
         self.chk_obl = QCheckBox("Activar Aprendizaje Basado en Oposici\u00f3n (OBL)")
         self.chk_obl.setChecked(True)
         intensification_layout.addWidget(self.chk_obl)
+        init_group = QGroupBox("Inicializaci\u00f3n de Colonias")
+        init_layout = QGridLayout(init_group)
+        init_layout.addWidget(QLabel("Dise\u00f1o inicial:"), 0, 0)
+        self.cb_init_method = QComboBox()
+        self.cb_init_method.addItems(["sobol", "halton", "lhs", "uniform"])
+        self.cb_init_method.setToolTip("Dise\u00f1os de baja discrepancia repartidos en bloques disjuntos entre colonias.")
+        init_layout.addWidget(self.cb_init_method, 0, 1)
+        intensification_layout.addWidget(init_group)
         refine_group = QGroupBox("Pulido Codicioso de Mejor Soluci\u00f3n")
         refine_layout = QGridLayout(refine_group)
         self.chk_refine = QCheckBox("Activar Pulido")
@@ -93,9 +129,81 @@ class AdvancedACORConfigDialog(QDialog):
         self.spin_local_search_freq.setValue(5)
         ls_layout.addWidget(self.spin_local_search_freq, 3, 1)
         intensification_layout.addWidget(local_search_group)
+        dedup_group = QGroupBox("Diversidad del Archivo")
+        dedup_layout = QGridLayout(dedup_group)
+        self.chk_dedup = QCheckBox("Descartar candidatos duplicados y clones del archivo")
+        self.chk_dedup.setChecked(True)
+        dedup_layout.addWidget(self.chk_dedup, 0, 0, 1, 2)
+        dedup_layout.addWidget(QLabel("Tolerancia (distancia normalizada):"), 1, 0)
+        self.spin_dedup_tol = QDoubleSpinBox()
+        self.spin_dedup_tol.setDecimals(6)
+        self.spin_dedup_tol.setRange(1e-6, 0.05)
+        self.spin_dedup_tol.setSingleStep(1e-4)
+        self.spin_dedup_tol.setValue(1e-4)
+        dedup_layout.addWidget(self.spin_dedup_tol, 1, 1)
+        intensification_layout.addWidget(dedup_group)
         intensification_layout.addStretch()
         tab_widget.addTab(intensification_tab, "Estrategias de Intensificaci\u00f3n")
 
+        # Pesta\u00f1a de Evaluaci\u00f3n
+        eval_tab = QWidget()
+        eval_layout = QVBoxLayout(eval_tab)
+        eval_group = QGroupBox("Evaluaci\u00f3n en Paralelo")
+        ev_layout = QGridLayout(eval_group)
+        ev_layout.addWidget(QLabel("Modo de evaluaci\u00f3n:"), 2, 0)
+        self.cb_parallel_mode = QComboBox()
+        for text, mode in (("Autom\u00e1tico (calibrado)", "auto"), ("En serie", "serial"), ("Hilos", "thread"), ("Procesos", "process"),
+                           ("Remoto (workers por TCP)", "remote")):
+            self.cb_parallel_mode.addItem(text, mode)
+        self.cb_parallel_mode.setToolTip("Autom\u00e1tico: mide al inicio el costo de evaluar frente al de enviar a otro proceso.")
+        ev_layout.addWidget(self.cb_parallel_mode, 2, 1)
+        ev_layout.addWidget(QLabel("Tiempo m\u00e1ximo por evaluaci\u00f3n (s, 0 = sin l\u00edmite):"), 0, 0)
+        self.spin_eval_timeout = QDoubleSpinBox()
+        self.spin_eval_timeout.setRange(0.0, 3600.0)
+        self.spin_eval_timeout.setSingleStep(1.0)
+        self.spin_eval_timeout.setValue(0.0)
+        self.spin_eval_timeout.setToolTip("Una integraci\u00f3n que supera este tiempo se abandona con costo infinito.")
+        ev_layout.addWidget(self.spin_eval_timeout, 0, 1)
+        ev_layout.addWidget(QLabel("Soluciones por env\u00edo a cada worker (0 = autom\u00e1tico):"), 1, 0)
+        self.spin_eval_chunksize = QSpinBox()
+        self.spin_eval_chunksize.setRange(0, 64)
+        self.spin_eval_chunksize.setValue(0)
+        self.spin_eval_chunksize.setToolTip("Trozos peque\u00f1os reparten mejor la carga cuando hay integraciones lentas.")
+        ev_layout.addWidget(self.spin_eval_chunksize, 1, 1)
+        eval_layout.addWidget(eval_group)
+        cpu_group = QGroupBox("Uso de N\u00facleos")
+        cpu_layout = QGridLayout(cpu_group)
+        cpu_layout.addWidget(QLabel("N\u00facleos reservados (interfaz y bucle principal):"), 0, 0)
+        self.spin_reserved_cores = QSpinBox()
+        self.spin_reserved_cores.setRange(0, 8)
+        self.spin_reserved_cores.setValue(1)
+        cpu_layout.addWidget(self.spin_reserved_cores, 0, 1)
+        cpu_layout.addWidget(QLabel("Hilos BLAS/OpenMP por worker (0 = sin l\u00edmite):"), 1, 0)
+        self.spin_worker_threads = QSpinBox()
+        self.spin_worker_threads.setRange(0, 64)
+        self.spin_worker_threads.setValue(1)
+        self.spin_worker_threads.setToolTip("Con varios procesos, m\u00e1s de un hilo por worker sobresuscribe la m\u00e1quina.")
+        cpu_layout.addWidget(self.spin_worker_threads, 1, 1)
+        self.chk_pin_workers = QCheckBox("Fijar cada worker a un n\u00facleo (afinidad de CPU)")
+        self.chk_pin_workers.setChecked(False)
+        cpu_layout.addWidget(self.chk_pin_workers, 2, 0, 1, 2)
+        eval_layout.addWidget(cpu_group)
+        remote_group = QGroupBox("Evaluaci\u00f3n Remota (modo Remoto)")
+        remote_layout = QGridLayout(remote_group)
+        remote_layout.addWidget(QLabel("Escuchar en (host:puerto, 0 = libre):"), 0, 0)
+        self.edit_remote_address = QLineEdit("127.0.0.1:0")
+        self.edit_remote_address.setToolTip("Use la IP de una red de confianza y un puerto fijo para aceptar workers de otras m\u00e1quinas\n"
+                                            "(python -m clases.remote HOST:PUERTO --authkey CLAVE). Fuera de localhost hace falta una clave propia.")
+        remote_layout.addWidget(self.edit_remote_address, 0, 1)
+        remote_layout.addWidget(QLabel("Clave de acceso:"), 1, 0)
+        # Clave aleatoria nueva cada vez: se muestra para poder lanzar los workers con ella
+        self.edit_remote_authkey = QLineEdit(generate_authkey())
+        self.edit_remote_authkey.setToolTip("El coordinador ejecuta lo que le env\u00eden quienes conozcan esta clave.")
+        remote_layout.addWidget(self.edit_remote_authkey, 1, 1)
+        eval_layout.addWidget(remote_group)
+        eval_layout.addStretch()
+        tab_widget.addTab(eval_tab, "Evaluaci\u00f3n")
+
         layout.addWidget(tab_widget)
         btn_box = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
         btn_box.accepted.connect(self.accept)
@@ -107,14 +215,31 @@ class AdvancedACORConfigDialog(QDialog):
         base_config.colonies_count = self.spin_colonies_count.value()
         base_config.migration_interval = self.spin_mig_interval.value()
         base_config.migration_size = self.spin_mig_size.value()
+        base_config.adaptive_allocation = self.chk_adaptive_alloc.isChecked()
+        base_config.allocation_min_share = self.spin_alloc_min_share.value()
+        base_config.colony_retirement_enabled = self.chk_retirement.isChecked()
+        base_config.convergence_spread_tol = self.spin_spread_tol.value()
+        base_config.colony_patience = self.spin_colony_patience.value()
+        base_config.retirement_redistributes = self.chk_redistribute.isChecked()
         base_config.local_search_enabled = self.chk_local_search.isChecked()
         base_config.local_search_radius = self.spin_local_search_radius.value()
         base_config.local_search_points = self.spin_local_search_points.value()
         base_config.local_search_frequency = self.spin_local_search_freq.value()
         base_config.obl_enabled = self.chk_obl.isChecked()
+        base_config.init_method = self.cb_init_method.currentText()
         base_config.refinement_enabled = self.chk_refine.isChecked()
         base_config.refinement_frequency = self.spin_refine_freq.value()
         base_config.refinement_step = self.spin_refine_step.value()
+        base_config.dedup_enabled = self.chk_dedup.isChecked()
+        base_config.dedup_tolerance = self.spin_dedup_tol.value()
+        base_config.eval_timeout = self.spin_eval_timeout.value() or None
+        base_config.eval_chunksize = self.spin_eval_chunksize.value() or None
+        base_config.parallel_mode = self.cb_parallel_mode.currentData()
+        base_config.reserved_cores = self.spin_reserved_cores.value()
+        base_config.worker_threads = self.spin_worker_threads.value()
+        base_config.pin_workers = self.chk_pin_workers.isChecked()
+        base_config.remote_address = self.edit_remote_address.text().strip() or "127.0.0.1:0"
+        base_config.remote_authkey = self.edit_remote_authkey.text().strip()
         return base_config
 
 class ResidualsDialog(QDialog):
@@ -159,7 +284,7 @@ class ResidualsDialog(QDialog):
         if params is None or len(self.model.I_data) == 0: return
         t = self.model.t_data
         try:
-            I_pred = odeint(self.model.seir_harmonic, self.model.y0, t, args=tuple(params[:21]), mxstep=200_000)[:, 2]
+            I_pred = self.model.simulate(params, t)[:, 2]
         except Exception: I_pred = np.full_like(self.model.I_data, np.nan)
         resid = self.model.I_data - I_pred
         self.plot_res.plot(t, resid, pen=None, symbol='o', symbolBrush='b', symbolPen='k')
@@ -241,13 +366,8 @@ class RtDialog(QDialog):
         self.plot_Rt.addItem(pg.InfiniteLine(angle=0, pos=1.0, pen=pg.mkPen('b', style=Qt.DashLine)))
         if params is None or len(self.model.t_data) == 0: return
         t_sim = np.linspace(self.model.t_data[0], self.model.t_data[-1], 300)
-        p = params[:21]
-        beta = np.exp(p[0] + p[1]*np.cos(p[2]*t_sim + p[3]) + p[4]*np.cos(p[5]*t_sim + p[6]))
-        gamma = np.exp(p[7] + p[8]*np.cos(p[9]*t_sim + p[10]) + p[11]*np.cos(p[12]*t_sim + p[13]))
-        sigma = np.exp(p[14] + p[15]*np.cos(p[16]*t_sim + p[17]) + p[18]*np.cos(p[19]*t_sim + p[20]))
-        k = params[21]
-        self.model.set_initial_conditions(k)
-        sol = odeint(self.model.seir_harmonic, self.model.y0, t_sim, args=tuple(p), mxstep=200_000)
+        beta, gamma, sigma = (r[0] for r in self.model.harmonic_rates(params, t_sim))
+        sol = self.model.simulate(params, t_sim)
         S = sol[:, 0]
         Rt = beta * S / (gamma * self.model.N)
         self.plot_beta.plot(t_sim, beta, pen=pg.mkPen('b', width=2))
@@ -360,11 +480,39 @@ class ParametersDialog(QDialog):
             self.table.setItem(i, 2, QTableWidgetItem(str(model.bounds[i, 1])))
         self.table.resizeColumnsToContents()
         layout.addWidget(self.table)
+
+        group_guard = QGroupBox("Guardia de Rigidez")
+        guard_layout = QGridLayout(group_guard)
+        self.cb_freq_guard = QComboBox()
+        for text, mode in (("Desactivada", "off"), ("Rechazar antes de integrar", "penalty"), ("Recortar l\u00edmites de w", "bounds")):
+            self.cb_freq_guard.addItem(text, mode)
+        self.cb_freq_guard.setCurrentIndex(max(0, self.cb_freq_guard.findData(model.frequency_guard)))
+        self.cb_freq_guard.setToolTip("Frecuencias |w| que el muestreo de los datos no puede resolver.")
+        self.spin_min_samples = QDoubleSpinBox(); self.spin_min_samples.setRange(2.0, 52.0); self.spin_min_samples.setSingleStep(0.5)
+        self.spin_min_samples.setValue(model.min_samples_per_period)
+        self.spin_min_samples.setToolTip("Muestras exigidas por periodo de cada arm\u00f3nico (2 = l\u00edmite de Nyquist).")
+        self.lbl_max_w = QLabel()
+        self.spin_min_samples.valueChanged.connect(self._update_max_frequency)
+        self.spin_step_budget = QSpinBox(); self.spin_step_budget.setRange(0, 10_000_000); self.spin_step_budget.setSingleStep(5000)
+        self.spin_step_budget.setValue(model.step_budget or 0)
+        self.spin_step_budget.setToolTip("Evaluaciones de la EDO por ajuste antes de abandonarlo con costo infinito. Desactivado por defecto (0 = sin l\u00edmite).")
+        guard_layout.addWidget(QLabel("Frecuencias no resolubles:"), 0, 0); guard_layout.addWidget(self.cb_freq_guard, 0, 1)
+        guard_layout.addWidget(QLabel("Muestras por periodo:"), 1, 0); guard_layout.addWidget(self.spin_min_samples, 1, 1)
+        guard_layout.addWidget(self.lbl_max_w, 2, 0, 1, 2)
+        guard_layout.addWidget(QLabel("Presupuesto de pasos:"), 3, 0); guard_layout.addWidget(self.spin_step_budget, 3, 1)
+        layout.addWidget(group_guard)
+        self._update_max_frequency()
+
         btn_box = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
         btn_box.accepted.connect(self.save_parameters)
         btn_box.rejected.connect(self.reject)
         layout.addWidget(btn_box)
 
+    def _update_max_frequency(self):
+        if len(self.model.t_data) < 2: self.lbl_max_w.setText(""); return
+        dt = float(np.median(np.diff(self.model.t_data)))
+        self.lbl_max_w.setText(f"|w| m\u00e1xima resoluble: {2 * np.pi / (self.spin_min_samples.value() * dt):.3f} rad por unidad de tiempo")
+
     def save_parameters(self):
         try:
             new_bounds = self.model.bounds.copy()
@@ -375,7 +523,16 @@ class ParametersDialog(QDialog):
                     raise ValueError(f"En '{self.model.labels[i]}', el m\u00e1ximo es menor que el m\u00ednimo.")
                 new_bounds[i, 0] = vmin
                 new_bounds[i, 1] = vmax
+            previous = (self.model.bounds, self.model.frequency_guard, self.model.min_samples_per_period, self.model.step_budget)
             self.model.bounds = new_bounds
+            self.model.frequency_guard = self.cb_freq_guard.currentData()
+            self.model.min_samples_per_period = self.spin_min_samples.value()
+            self.model.step_budget = self.spin_step_budget.value() or None
+            try:
+                self.model.guarded_bounds()
+            except ValueError:
+                self.model.bounds, self.model.frequency_guard, self.model.min_samples_per_period, self.model.step_budget = previous
+                raise
             self.accept()
         except ValueError as e:
             QMessageBox.warning(self, "Error de Valor", str(e))
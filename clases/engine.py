@@ -0,0 +1,306 @@
+# -*- coding: utf-8 -*-
+"""
+Motor de optimización fuera de proceso.
+
+El optimizador ACOR corre en un proceso aparte (`python -m clases.engine`) que la interfaz
+controla por un canal de `multiprocessing.connection`. La interfaz envía órdenes (start,
+stop, pause, resume, status, shutdown) y el motor devuelve eventos (progress, finished,
+error, state). Así el bucle maestro no compite con el bucle de eventos de Qt, un fallo del
+optimizador no tumba la interfaz y una corrida sigue viva si la interfaz se cierra: al volver
+a conectarse, el motor le envía su estado y el resultado que no se llegó a entregar.
+
+Mensajes: tuplas (tipo, datos); el progreso y los errores viajan como `helpers.ProgressEvent`. `EngineClient` es el extremo de la interfaz (un `QThread`
+que lee los eventos y los reemite como señales, con la misma forma que `ACORWorker`).
+"""
+import json
+import os
+import queue
+import secrets
+import subprocess
+import sys
+import threading
+import time
+import traceback
+from multiprocessing.connection import Client, Listener
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from .acor_optimizer import ACOROptimizer
+from .helpers import ProgressEvent
+
+AUTHKEY_ENV = "ACOR_ENGINE_AUTHKEY"
+SESSION_PATH = os.path.join(os.path.expanduser("~"), ".acor_seir", "engine_session.json")
+
+def build_optimizer(model, config, warm_start_params=None):
+    """Crea el optimizador para ajustar `model` (límites con guardia de frecuencias y evaluación por lotes con el motor discreto).
+
+    Los eventos de progreso traen la curva del mejor ajuste, calculada del lado del optimizador.
+    """
+    optimizer = ACOROptimizer(model.fitness, model.guarded_bounds(), config, warm_start_params,
+                              periodic=model.periodic_mask, canonicalize=model.canonicalize,
+                              batch_fitness=model.fitness_batch if model.engine == "discrete" else None)
+    optimizer.trajectory_func = model.fit_curve
+    return optimizer
+
+class EngineServer:
+    """Proceso motor: atiende a un cliente a la vez y ejecuta una corrida a la vez.
+
+    Los eventos de la corrida se encolan desde el hilo del optimizador y sólo el bucle
+    principal escribe en la conexión. Sin cliente conectado se guarda el último progreso y el
+    resultado final hasta que alguien se conecte. El proceso termina con "shutdown" o tras
+    `idle_timeout` segundos sin cliente ni corrida. Los mensajes son pickle, así que la clave
+    `authkey` es obligatoria.
+    """
+    def __init__(self, address=("127.0.0.1", 0), authkey=None, idle_timeout=3600.0):
+        if not authkey: raise ValueError("El motor necesita una clave de acceso: sin ella cualquiera podría enviarle órdenes.")
+        self.listener = Listener(tuple(address), authkey=authkey)
+        self.address = self.listener.address
+        self.idle_timeout = idle_timeout
+        self.state = "idle"
+        self.optimizer = None
+        self.model = None
+        self._thread = None
+        self._conn = None
+        self._new_conns = queue.Queue()
+        self._events = queue.Queue()
+        self._last_progress = None
+        self._result = None  # evento "finished" aún no entregado
+        self._shutdown = threading.Event()
+
+    def serve_forever(self):
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+        idle_since = time.monotonic()
+        while not self._shutdown.is_set():
+            self._adopt_connection()
+            conn = self._conn
+            if conn is not None:
+                try:
+                    if conn.poll(0.05): self._handle(*conn.recv())
+                except (EOFError, OSError):
+                    self._drop()
+            else:
+                time.sleep(0.05)
+            self._flush()
+            if self._conn is not None or self.state in ("running", "paused"):
+                idle_since = time.monotonic()
+            elif time.monotonic() - idle_since > self.idle_timeout:
+                break
+        if self.optimizer is not None: self.optimizer.request_stop()
+        if self._thread is not None: self._thread.join(timeout=10.0)
+        self._drop()
+        self.listener.close()
+
+    def _accept_loop(self):
+        while not self._shutdown.is_set():
+            try:
+                self._new_conns.put(self.listener.accept())
+            except OSError:
+                if self._shutdown.is_set(): return
+            except Exception:
+                continue  # clave incorrecta o cliente que se corta durante el saludo
+
+    def _adopt_connection(self):
+        try: conn = self._new_conns.get_nowait()
+        except queue.Empty: return
+        # Una interfaz nueva reemplaza a la anterior (p. ej. tras reiniciarla)
+        self._drop()
+        self._conn = conn
+        self._send(self._snapshot())
+        if self._result is not None and self._send(self._result): self._result = None
+
+    def _drop(self):
+        if self._conn is None: return
+        try: self._conn.close()
+        except OSError: pass
+        self._conn = None
+
+    def _send(self, message):
+        if self._conn is None: return False
+        try:
+            self._conn.send(message)
+            return True
+        except (OSError, EOFError, ValueError):
+            self._drop()
+            return False
+
+    def _snapshot(self):
+        state = "paused" if self.state == "running" and self.optimizer.is_paused() else self.state
+        return ("state", {"state": state, "pid": os.getpid(), "progress": self._last_progress,
+                          "model": self.model if self.state != "idle" else None})
+
+    def _flush(self):
+        while True:
+            try: event = self._events.get_nowait()
+            except queue.Empty: return
+            kind, data = event
+            if kind == "progress": self._last_progress = data
+            delivered = self._send(event)
+            if kind == "finished" and not delivered: self._result = event
+
+    def _handle(self, command, data=None):
+        if command == "start":
+            if self.state in ("running", "paused"):
+                self._send(("error", ProgressEvent(0, 0, float("inf"), "Ya hay una optimización en curso en el motor.", "error")))
+                return
+            self._start(**data)
+        elif command == "stop":
+            if self.optimizer is not None: self.optimizer.request_stop()
+        elif command == "pause":
+            if self.optimizer is not None: self.optimizer.request_pause()
+        elif command == "resume":
+            if self.optimizer is not None: self.optimizer.resume()
+        elif command == "status":
+            self._send(self._snapshot())
+        elif command == "shutdown":
+            self._shutdown.set()
+        else:
+            self._send(("error", ProgressEvent(0, 0, float("inf"), f"Orden desconocida: {command!r}", "error")))
+
+    def _start(self, model, config, warm_start_params=None, tmax_seconds=None, plateau_K=None):
+        self.model = model
+        self.optimizer = build_optimizer(model, config, warm_start_params)
+        self.optimizer.progress_callback = self._on_progress
+        self._last_progress, self._result = None, None
+        self.state = "running"
+        self._thread = threading.Thread(target=self._run, args=(tmax_seconds, plateau_K), daemon=True)
+        self._thread.start()
+
+    def _on_progress(self, event):
+        self._events.put(("progress", event))
+
+    def _run(self, tmax_seconds, plateau_K):
+        try:
+            self.optimizer.optimize(tmax_seconds, plateau_K)
+        except Exception as e:
+            self._events.put(("error", ProgressEvent(0, self.optimizer.config.max_iter, self.optimizer.best_cost_global,
+                                                     f"Error en el motor: {e}\n{traceback.format_exc()}", "error")))
+        self.state = "finished"
+        self._events.put(("finished", self.optimizer))
+
+def launch_engine(host="127.0.0.1", timeout=30.0):
+    """Lanza un motor en un proceso independiente (sobrevive a la interfaz). Devuelve (dirección, clave)."""
+    authkey = secrets.token_bytes(16)
+    env = dict(os.environ, **{AUTHKEY_ENV: authkey.hex()})
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    kwargs = {"start_new_session": True} if os.name == "posix" else \
+        {"creationflags": subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP}
+    process = subprocess.Popen([sys.executable, "-m", "clases.engine", "--host", host], cwd=root, env=env,
+                               stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, **kwargs)
+    # El motor escribe su puerto en la primera línea de la salida estándar
+    result = []
+    reader = threading.Thread(target=lambda: result.append(process.stdout.readline()), daemon=True)
+    reader.start(); reader.join(timeout)
+    process.stdout.close()
+    if not result or not result[0].strip():
+        process.kill()
+        raise RuntimeError("El motor de optimización no arrancó.")
+    return (host, int(result[0].split()[-1])), authkey
+
+def save_session(address, authkey, path=SESSION_PATH):
+    """Guarda la dirección y la clave del motor en curso para reconectarse tras reiniciar la interfaz.
+
+    La clave da acceso a un canal que deserializa lo que recibe: el archivo se crea con permisos
+    0600 (carpeta 0700) y nunca va a la configuración compartida (QSettings).
+    """
+    os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    if os.name == "posix": os.fchmod(fd, 0o600)  # por si el archivo ya existía con otros permisos
+    with os.fdopen(fd, "w") as f:
+        json.dump({"host": address[0], "port": int(address[1]), "authkey": authkey.hex()}, f)
+
+def load_session(path=SESSION_PATH):
+    """(dirección, clave) guardadas por `save_session`, o None si no hay una sesión válida."""
+    try:
+        with open(path) as f:
+            data = json.load(f)
+        return (data["host"], int(data["port"])), bytes.fromhex(data["authkey"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+def forget_session(path=SESSION_PATH):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+class EngineClient(QThread):
+    """Extremo de la interfaz: envía órdenes al motor y reemite sus eventos como señales."""
+    progress_signal = pyqtSignal(object)
+    finished_signal = pyqtSignal(object)
+    state_signal = pyqtSignal(dict)
+    disconnected_signal = pyqtSignal()
+
+    def __init__(self, address, authkey, timeout=5.0):
+        super().__init__()
+        self.address = tuple(address)
+        self.authkey = authkey
+        self._conn = self._connect(timeout)
+        self._closing = False
+
+    def _connect(self, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                return Client(self.address, authkey=self.authkey)
+            except (ConnectionError, OSError):
+                if time.monotonic() > deadline: raise
+                time.sleep(0.1)
+
+    def send(self, command, data=None):
+        try:
+            self._conn.send((command, data))
+            return True
+        except (OSError, EOFError, ValueError):
+            return False
+
+    def start_run(self, model, config, warm_start_params=None, tmax_seconds=None, plateau_K=None):
+        return self.send("start", {"model": model, "config": config, "warm_start_params": warm_start_params,
+                                   "tmax_seconds": tmax_seconds, "plateau_K": plateau_K})
+
+    def stop(self): self.send("stop")
+    def pause(self): self.send("pause")
+    def resume(self): self.send("resume")
+
+    def shutdown(self):
+        """Pide al motor que termine y cierra la conexión."""
+        self.send("shutdown")
+        self.close()
+
+    def close(self):
+        self._closing = True
+        self.wait(2000)
+        try: self._conn.close()
+        except OSError: pass
+
+    def run(self):
+        while not self._closing:
+            try:
+                if not self._conn.poll(0.1): continue
+                kind, data = self._conn.recv()
+            except (EOFError, OSError):
+                if not self._closing: self.disconnected_signal.emit()
+                return
+            if kind in ("progress", "error"): self.progress_signal.emit(data)
+            elif kind == "finished": self.finished_signal.emit(data)
+            elif kind == "state": self.state_signal.emit(data)
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Motor de optimización SEIR-ACOR controlado por un canal local.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--idle-timeout", type=float, default=3600.0, help="Segundos sin cliente ni corrida antes de terminar.")
+    args = parser.parse_args(argv)
+    generated = AUTHKEY_ENV not in os.environ
+    authkey = secrets.token_bytes(16) if generated else bytes.fromhex(os.environ.pop(AUTHKEY_ENV))
+    server = EngineServer((args.host, args.port), authkey, args.idle_timeout)
+    print(f"ENGINE {server.address[0]} {server.address[1]}", flush=True)
+    # Lanzado a mano: la clave generada se muestra para poder conectarse (launch_engine la pasa por el entorno)
+    if generated: print(f"AUTHKEY {authkey.hex()}", flush=True)
+    # Nadie lee ya la salida: se redirige para que una escritura posterior no falle
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    server.serve_forever()
+
+if __name__ == "__main__":
+    main()
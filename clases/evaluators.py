@@ -0,0 +1,302 @@
+# -*- coding: utf-8 -*-
+"""
+Ejecutores para evaluar lotes de soluciones (funciones de costo) en paralelo o en serie.
+
+Cada evaluación puede tener un tiempo máximo: el tiempo límite se publica por hilo y las
+funciones de costo largas lo consultan con `check_deadline()` (el modelo SEIR lo hace en el
+lado derecho de la EDO). Una evaluación que lo supera recibe costo infinito.
+"""
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import partial
+import psutil
+from threadpoolctl import threadpool_limits
+from multiprocessing import get_context, Pipe, TimeoutError as PoolTimeoutError
+from multiprocessing.pool import ThreadPool
+
+PARALLEL_MODES = ("auto", "serial", "thread", "process", "remote")
+
+# Variables que fijan los hilos de BLAS/OpenMP al importar NumPy/SciPy en un proceso nuevo
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS",
+                   "VECLIB_MAXIMUM_THREADS", "NUMEXPR_NUM_THREADS")
+
+_local = threading.local()
+
+class EvaluationTimeout(Exception):
+    """La evaluación en curso superó su tiempo máximo."""
+
+def check_deadline():
+    """Lanza `EvaluationTimeout` si la evaluación en curso en este hilo superó su tiempo máximo."""
+    deadline = getattr(_local, "deadline", None)
+    if deadline is not None and time.monotonic() > deadline:
+        raise EvaluationTimeout()
+
+def timed_call(func, x, timeout=None):
+    """Evalúa `func(x)` con un tiempo máximo. Devuelve (costo, agotado)."""
+    start = time.monotonic()
+    _local.deadline = None if timeout is None else start + timeout
+    try:
+        cost = func(x)
+    except EvaluationTimeout:
+        cost = float("inf")
+    finally:
+        _local.deadline = None
+    timed_out = timeout is not None and time.monotonic() - start > timeout
+    return (float("inf") if timed_out else cost), timed_out
+
+class SerialPool:
+    """Sustituto en proceso de `multiprocessing.Pool`: evalúa en serie, sin procesos ni pickling."""
+    def __init__(self, timeout=None):
+        self.timeout = timeout
+        self.timeouts = 0
+
+    def map(self, func, items):
+        results = []
+        for x in items:
+            cost, timed_out = timed_call(func, x, self.timeout)
+            self.timeouts += timed_out
+            results.append(cost)
+        return results
+
+    def close(self): pass
+    def join(self): pass
+    def terminate(self): pass
+
+    def __enter__(self): return self
+    def __exit__(self, *exc): return False
+
+# --- Configuración de los procesos worker ---
+
+@contextmanager
+def worker_environment(threads=1):
+    """Fija las variables de hilos de BLAS/OpenMP mientras se lanzan procesos nuevos.
+
+    Con "spawn" el worker importa NumPy antes de correr su inicializador, así que el límite
+    tiene que estar ya en el entorno heredado. Al salir se restaura el entorno del proceso actual.
+    """
+    if not threads:
+        yield
+        return
+    saved = {var: os.environ.get(var) for var in THREAD_ENV_VARS}
+    os.environ.update({var: str(int(threads)) for var in THREAD_ENV_VARS})
+    try:
+        yield
+    finally:
+        for var, value in saved.items():
+            if value is None: os.environ.pop(var, None)
+            else: os.environ[var] = value
+
+def worker_cores(reserved_cores=1):
+    """Núcleos disponibles para los workers: los permitidos a este proceso menos los `reserved_cores`
+    primeros, que quedan para la interfaz y el bucle principal del optimizador."""
+    process = psutil.Process()
+    if hasattr(process, "cpu_affinity"): cores = sorted(process.cpu_affinity())
+    else: cores = list(range(psutil.cpu_count(logical=True) or 1))
+    return cores[max(0, int(reserved_cores)):] or cores
+
+def configure_worker(threads=1, cores=None, slot=None):
+    """Inicializa un proceso worker: limita sus pools de hilos y, si se dan `cores`, lo fija a uno.
+
+    `slot` es un contador compartido (`multiprocessing.Value`) que reparte los núcleos en turno
+    rotatorio entre los workers; un worker que reemplaza a otro toma el siguiente núcleo.
+    """
+    if threads:
+        # Cubre también las librerías cargadas antes de leer las variables de entorno
+        threadpool_limits(int(threads))
+    if cores and slot is not None:
+        with slot.get_lock():
+            index = slot.value
+            slot.value += 1
+        try:
+            psutil.Process().cpu_affinity([cores[index % len(cores)]])
+        except (AttributeError, psutil.Error, OSError):
+            pass  # Plataforma sin afinidad (macOS) o núcleo no permitido: se sigue sin fijar
+
+# --- Lado del worker de EvaluationPool ---
+
+_worker_func = None
+
+def _init_worker(func, threads=1, cores=None, slot=None):
+    global _worker_func
+    _worker_func = func
+    configure_worker(threads, cores, slot)
+
+def _evaluate_with(func, chunk):
+    """Evalúa un trozo de tareas (índice, solución, tiempo máximo) y devuelve [(índice, costo, agotado)]."""
+    return [(i, *timed_call(func, x, timeout)) for i, x, timeout in chunk]
+
+def _evaluate_indexed(chunk):
+    return _evaluate_with(_worker_func, chunk)
+
+class EvaluationPool:
+    """Pool de procesos (o de hilos, con `threads=True`) con reparto dinámico y tiempo máximo por evaluación.
+
+    Las soluciones se despachan en trozos pequeños (`chunksize`) y se recogen en orden de
+    llegada, así una integración lenta sólo retrasa su trozo. La función de costo se instala
+    una vez por worker (no viaja con cada tarea). Si durante `timeout * chunksize + grace`
+    segundos no llega ningún resultado (una evaluación que no consulta `check_deadline`), el
+    pool se reinicia y las soluciones pendientes se reenvían una vez; si vuelve a ocurrir,
+    reciben costo infinito. Los hilos no se pueden matar: una evaluación colgada en un hilo se
+    abandona y sigue corriendo en segundo plano.
+
+    Cada proceso worker limita BLAS/OpenMP a `worker_threads` hilos (0 = sin límite) para no
+    sobresuscribir la máquina y, con `pin=True`, se fija a un núcleo fuera de los `reserved_cores`.
+    """
+    def __init__(self, n_workers, timeout=None, chunksize=1, grace=5.0, threads=False,
+                 worker_threads=1, pin=False, reserved_cores=1):
+        self.n_workers = n_workers
+        self.timeout = timeout
+        self.chunksize = max(1, int(chunksize))
+        self.grace = grace
+        self.threads = threads
+        self.worker_threads = worker_threads
+        self.pin = pin
+        self.reserved_cores = reserved_cores
+        self.timeouts = 0
+        self.restarts = 0
+        self._pool = None
+        self._func = None
+        self._call = None
+
+    def _start(self, func):
+        self._shutdown(terminate=True)
+        if self.threads:
+            self._pool = ThreadPool(self.n_workers)
+            self._call = partial(_evaluate_with, func)
+        else:
+            ctx = get_context("spawn")
+            cores = worker_cores(self.reserved_cores) if self.pin else None
+            slot = ctx.Value("i", 0) if self.pin else None
+            with worker_environment(self.worker_threads):
+                self._pool = ctx.Pool(self.n_workers, initializer=_init_worker,
+                                      initargs=(func, self.worker_threads, cores, slot))
+            self._call = _evaluate_indexed
+        self._func = func
+
+    def _shutdown(self, terminate=False):
+        if self._pool is None: return
+        if terminate: self._pool.terminate()
+        else: self._pool.close()
+        self._pool.join()
+        self._pool = None
+
+    def map(self, func, items):
+        items = list(items)
+        results = [float("inf")] * len(items)
+        if not items: return results
+        if func is not self._func or self._pool is None: self._start(func)
+        pending = set(range(len(items)))
+        backstop = None if self.timeout is None else self.timeout * self.chunksize + self.grace
+        for attempt in range(2):
+            tasks = [(i, items[i], self.timeout) for i in sorted(pending)]
+            chunks = [tasks[k:k + self.chunksize] for k in range(0, len(tasks), self.chunksize)]
+            iterator = self._pool.imap_unordered(self._call, chunks)
+            try:
+                for _ in range(len(chunks)):
+                    for i, cost, timed_out in iterator.next(backstop):
+                        results[i] = cost
+                        self.timeouts += timed_out
+                        pending.discard(i)
+                break
+            except PoolTimeoutError:
+                self.restarts += 1
+                self._start(func)
+        self.timeouts += len(pending)
+        return results
+
+    def close(self): self._shutdown()
+    def join(self): pass
+    def terminate(self): self._shutdown(terminate=True)
+
+    def __enter__(self): return self
+    def __exit__(self, *exc):
+        self.terminate()
+        return False
+
+def default_worker_count(reserved_cores=1):
+    """80% de los núcleos lógicos, dejando siempre libres `reserved_cores` para la interfaz y el bucle principal."""
+    cpus = psutil.cpu_count(logical=True) or 1
+    return max(1, min(int(cpus * 0.8), cpus - int(reserved_cores)))
+
+def make_pool(n_workers=None, timeout=None, chunksize=1, mode="process", worker_threads=1, pin=False, reserved_cores=1,
+              address=None, authkey=None):
+    """Crea el pool de evaluación: `SerialPool` en modo "serial" o con un solo worker; si no, un
+    `EvaluationPool` de procesos ("process") o de hilos ("thread"). En modo "remote" crea un
+    `remote.RemotePool` que escucha en `address` con `n_workers` workers locales (0 = sólo remotos)."""
+    if mode == "remote":
+        from .remote import RemotePool, DEFAULT_ADDRESS  # remote importa este módulo
+        return RemotePool(address or DEFAULT_ADDRESS, authkey, n_workers or 0, timeout, chunksize,
+                          worker_threads=worker_threads)
+    n = default_worker_count(reserved_cores) if n_workers is None else max(1, int(n_workers))
+    if n == 1 or mode == "serial": return SerialPool(timeout)
+    return EvaluationPool(n, timeout, chunksize, threads=(mode == "thread"),
+                          worker_threads=worker_threads, pin=pin, reserved_cores=reserved_cores)
+
+# --- Calibración: serie, hilos o procesos ---
+
+def _ipc_round_trip(x, repeats=20):
+    """Tiempo medio de enviar una tarea por una tubería y recibir su resultado (pickling incluido)."""
+    a, b = Pipe()
+    try:
+        start = time.perf_counter()
+        for i in range(repeats):
+            a.send((i, x, None)); b.recv()
+            b.send((i, 0.0, False)); a.recv()
+        return (time.perf_counter() - start) / repeats
+    finally:
+        a.close(); b.close()
+
+def _dispatch_overhead(repeats=200):
+    """Tiempo por tarea de la maquinaria de reparto del pool (colas e hilos auxiliares), sin la tubería."""
+    with ThreadPool(1) as pool:
+        start = time.perf_counter()
+        for _ in pool.imap_unordered(abs, range(repeats)): pass
+        return (time.perf_counter() - start) / repeats
+
+def _thread_speedup(func, samples, eval_time):
+    """Aceleración medida al evaluar `samples` en dos hilos a la vez (~1 si la función retiene el GIL)."""
+    threads = [threading.Thread(target=lambda: [func(x) for x in samples]) for _ in range(2)]
+    start = time.perf_counter()
+    for th in threads: th.start()
+    for th in threads: th.join()
+    wall = time.perf_counter() - start
+    return 2 * len(samples) * eval_time / wall if wall > 0 else 1.0
+
+def calibrate(func, samples, n_workers=None, batch_size=None, budget=0.5):
+    """Mide el costo de una evaluación y el de enviarla a otro proceso, y elige cómo evaluar.
+
+    Evalúa en serie algunas `samples` (hasta agotar `budget` segundos), mide el viaje de ida y
+    vuelta de una tarea y la aceleración con dos hilos, y estima el tiempo por evaluación de cada
+    modo: serie `t`, procesos `t/n + ipc/chunksize` (con `n` limitado a los núcleos disponibles;
+    el envío pasa por el proceso principal) e hilos `t/aceleración`. El tamaño de trozo es el menor que deja el envío por debajo del 10%
+    del costo, sin bajar de cuatro trozos por worker en un lote de `batch_size`.
+    Devuelve un dict con 'mode', 'workers', 'chunksize', 'eval_time', 'ipc_overhead' y 'thread_speedup'.
+    """
+    n = default_worker_count() if n_workers is None else max(1, int(n_workers))
+    samples = list(samples)
+    evaluated, start = [], time.perf_counter()
+    for x in samples:
+        func(x); evaluated.append(x)
+        if time.perf_counter() - start > budget: break
+    eval_time = max((time.perf_counter() - start) / len(evaluated), 1e-9)
+    dispatch = _dispatch_overhead()
+    info = {"mode": "serial", "workers": 1, "chunksize": 1, "eval_time": eval_time,
+            "ipc_overhead": dispatch + _ipc_round_trip(samples[0]), "thread_speedup": 1.0}
+    if n == 1: return info
+
+    if eval_time * len(evaluated) <= budget:
+        speedup2 = _thread_speedup(func, evaluated, eval_time)
+        # Por debajo de 1.2 la diferencia es ruido de medida: la función retiene el GIL
+        if speedup2 >= 1.2: info["thread_speedup"] = float(min(n, 1.0 + (n - 1) * (speedup2 - 1.0)))
+    batch = batch_size or 4 * n
+    chunksize = int(min(max(1, math.ceil(info["ipc_overhead"] / (0.1 * eval_time))), max(1, batch // (4 * n))))
+    estimates = {"serial": eval_time,
+                 "thread": eval_time / info["thread_speedup"] + dispatch / chunksize if info["thread_speedup"] > 1.0 else float("inf"),
+                 "process": eval_time / min(n, psutil.cpu_count(logical=True) or 1) + info["ipc_overhead"] / chunksize}
+    mode = min(estimates, key=estimates.get)
+    info.update(mode=mode, workers=1 if mode == "serial" else n, chunksize=1 if mode == "serial" else chunksize,
+                estimates={k: float(v) for k, v in estimates.items()})
+    return info
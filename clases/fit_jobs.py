@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+Trabajos de ajuste independientes (un conjunto de datos + una estructura de modelo) y su
+ejecución en paralelo con un presupuesto fijo de procesos.
+
+Cada trabajo corre el optimizador ACOR con evaluación en serie dentro de su proceso, de
+modo que el paralelismo está entre trabajos y no se anidan pools.
+"""
+import time, traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field, replace
+from multiprocessing import get_context
+from typing import Optional
+import numpy as np
+
+from .helpers import ACORConfig
+from .seir_model import SEIRModel
+from .acor_optimizer import ACOROptimizer
+from .evaluators import default_worker_count, configure_worker, worker_environment
+
+@dataclass
+class FitJob:
+    """Describe un ajuste completo del modelo a una serie."""
+    name: str
+    t: np.ndarray
+    I: np.ndarray
+    N: int
+    acor_config: ACORConfig
+    harmonic_config: dict = field(default_factory=lambda: {'beta': 2, 'gamma': 2, 'sigma': 2})
+    loss_type: str = "MSE"
+    huber_delta: float = 1.0
+    bounds: Optional[np.ndarray] = None
+    warm_start_params: Optional[np.ndarray] = None
+    initial_archive: Optional[np.ndarray] = None
+    tmax_seconds: Optional[float] = None
+    plateau_K: Optional[int] = None
+    source: str = ""
+    engine: str = "odeint"
+    frequency_guard: str = "off"
+    min_samples_per_period: float = 8.0
+    step_budget: Optional[int] = None
+
+@dataclass
+class FitResult:
+    """Resultado de un `FitJob`."""
+    name: str
+    harmonic_config: dict
+    best_cost: float
+    best_params: Optional[np.ndarray]
+    labels: list
+    aic: float = float('nan')
+    bic: float = float('nan')
+    iterations: int = 0
+    duration: float = 0.0
+    source: str = ""
+    error: str = ""
+    timeouts: int = 0
+
+def run_fit_job(job: FitJob) -> FitResult:
+    """Ejecuta un ajuste en el proceso actual (evaluación en serie)."""
+    start = time.time()
+    model = SEIRModel(job.harmonic_config)
+    model.t_data = np.asarray(job.t, dtype=float)
+    model.I_data = np.asarray(job.I, dtype=float)
+    model.N = job.N
+    model.loss_type = job.loss_type
+    model.huber_delta = job.huber_delta
+    model.engine = job.engine
+    model.frequency_guard = job.frequency_guard
+    model.min_samples_per_period = job.min_samples_per_period
+    model.step_budget = job.step_budget
+    if job.bounds is not None: model.bounds = np.asarray(job.bounds, dtype=float)
+    try:
+        config = replace(job.acor_config, n_workers=1)
+        optimizer = ACOROptimizer(model.fitness, model.guarded_bounds(), config, job.warm_start_params,
+                                  periodic=model.periodic_mask, canonicalize=model.canonicalize,
+                                  batch_fitness=model.fitness_batch if model.engine == "discrete" else None,
+                                  initial_archive=job.initial_archive)
+        best_params, best_cost = optimizer.optimize(job.tmax_seconds, job.plateau_K)
+        result = FitResult(job.name, dict(job.harmonic_config), float(best_cost), best_params, list(model.labels),
+                           iterations=len(optimizer.history_best_cost), duration=time.time() - start, source=job.source,
+                           timeouts=optimizer.n_timeouts)
+        if np.isfinite(best_cost) and job.loss_type == "MSE":
+            result.aic, result.bic = model.calculate_aic_bic(best_cost, model.DIM, len(model.I_data))
+        return result
+    except Exception as e:
+        return FitResult(job.name, dict(job.harmonic_config), float('inf'), None, list(model.labels),
+                         duration=time.time() - start, source=job.source, error=f"{e}\n{traceback.format_exc()}")
+
+def run_jobs(jobs, max_workers=None, callback=None, should_stop=None):
+    """Ejecuta una lista de trabajos con a lo sumo `max_workers` procesos simultáneos.
+
+    `callback(done, total, result)` se llama en el proceso actual al terminar cada trabajo y
+    `should_stop()` permite cancelar los trabajos que aún no han empezado.
+    Devuelve los resultados en el mismo orden que `jobs`.
+    """
+    jobs = list(jobs)
+    n = default_worker_count() if max_workers is None else max(1, int(max_workers))
+    results = [None] * len(jobs)
+    if n == 1 or len(jobs) <= 1:
+        for i, job in enumerate(jobs):
+            if should_stop and should_stop(): break
+            results[i] = run_fit_job(job)
+            if callback: callback(i + 1, len(jobs), results[i])
+        return results
+
+    # Cada proceso ajusta en serie: BLAS/OpenMP a un hilo para no sobresuscribir los núcleos
+    with worker_environment(1), ProcessPoolExecutor(max_workers=min(n, len(jobs)), mp_context=get_context("spawn"),
+                                                    initializer=configure_worker, initargs=(1,)) as executor:
+        futures = {executor.submit(run_fit_job, job): i for i, job in enumerate(jobs)}
+        done = 0
+        for future in as_completed(futures):
+            i = futures[future]
+            results[i] = future.result()
+            done += 1
+            if callback: callback(done, len(jobs), results[i])
+            if should_stop and should_stop():
+                for f in futures: f.cancel()
+                break
+    return results
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 import math
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import Any, Optional
 
 def parse_numeric(expr: str) -> float:
     """Eval\u00faa de forma segura una expresi\u00f3n matem\u00e1tica simple."""
@@ -25,6 +26,26 @@ class ACORConfig:
     max_iter: int = 1500
     q: float = 0.7
 
+    # Workers de evaluaci\u00f3n (None = 80% de los n\u00facleos l\u00f3gicos, 1 = en serie)
+    n_workers: Optional[int] = None
+    # Modo de evaluaci\u00f3n: "auto" (calibrado al inicio), "serial", "thread", "process" o "remote" (workers por TCP)
+    parallel_mode: str = "auto"
+    # Tiempo m\u00e1ximo por evaluaci\u00f3n en segundos (None = sin l\u00edmite) y soluciones por env\u00edo a cada worker (None = autom\u00e1tico)
+    eval_timeout: Optional[float] = None
+    eval_chunksize: Optional[int] = None
+    # Intervalo m\u00ednimo en segundos entre eventos de progreso por iteraci\u00f3n (los avisos no se agrupan)
+    progress_interval: float = 0.25
+    # N\u00facleos reservados para la interfaz y el bucle principal, hilos de BLAS/OpenMP por worker (0 = sin l\u00edmite)
+    # y fijar cada worker a un n\u00facleo (afinidad de CPU)
+    reserved_cores: int = 1
+    worker_threads: int = 1
+    pin_workers: bool = False
+    # Modo "remote": direcci\u00f3n donde escucha el coordinador ("host:puerto", puerto 0 = libre) y clave de acceso
+    # ("" = aleatoria en cada corrida, s\u00f3lo en localhost);
+    # n_workers es entonces el n\u00famero de workers locales (0 = s\u00f3lo workers de otras m\u00e1quinas)
+    remote_address: str = "127.0.0.1:0"
+    remote_authkey: str = ""
+
     # Modelo Multi-Colonia
     colonies_count: int = 4
     migration_interval: int = 25
@@ -39,7 +60,62 @@ class ACORConfig:
     # Aprendizaje Basado en Oposici\u00f3n (OBL)
     obl_enabled: bool = True
 
+    # Inicializaci\u00f3n de colonias: "sobol", "halton", "lhs" o "uniform"
+    init_method: str = "sobol"
+    init_seed: Optional[int] = None
+
     # Pulido Codicioso (Greedy Refinement)
     refinement_enabled: bool = True
     refinement_frequency: int = 50
     refinement_step: float = 0.05
+
+    # Deduplicaci\u00f3n de candidatos y diversidad del archivo
+    dedup_enabled: bool = True
+    dedup_tolerance: float = 1e-4
+
+    # Cach\u00e9 de costos por soluci\u00f3n can\u00f3nica
+    eval_cache_enabled: bool = True
+    eval_cache_size: int = 50000
+
+    # Reparto adaptativo de hormigas entre colonias
+    adaptive_allocation: bool = True
+    allocation_min_share: float = 0.3
+    allocation_decay: float = 0.8
+
+    # Convergencia por colonia: retiro de colonias colapsadas
+    colony_retirement_enabled: bool = True
+    convergence_spread_tol: float = 1e-3
+    colony_patience: int = 30
+    # False: las hormigas de una colonia retirada se ahorran; True: se reparten entre las activas
+    retirement_redistributes: bool = False
+
+@dataclass
+class ProgressEvent:
+    """Progreso del optimizador: el estado de una iteraci\u00f3n o, si trae `message`, un aviso puntual.
+
+    `level` indica c\u00f3mo mostrar el aviso ("info" no se registra, "success", "warning" o "error").
+    `trajectory` es la curva (t, I) del mejor ajuste, calculada del lado del optimizador cuando
+    el mejor cambia, para que la interfaz s\u00f3lo tenga que dibujarla. `colony_diagnostics` son
+    los de `ACOROptimizer._colony_diagnostics` de la misma iteraci\u00f3n.
+    """
+    iteration: int
+    max_iter: int
+    best_cost: float
+    message: str = ""
+    level: str = "info"
+    plateau: int = 0
+    diversity: float = float("nan")
+    colony_best: list = field(default_factory=list)
+    colony_active: list = field(default_factory=list)
+    best_params: Optional[Any] = None
+    trajectory: Optional[Any] = None
+    colony_diagnostics: list = field(default_factory=list)
+
+    @property
+    def percent(self) -> int:
+        return int(self.iteration * 100 / self.max_iter) if self.max_iter else 0
+
+    def describe(self) -> str:
+        if self.message: return self.message
+        return (f"Iter {self.iteration}/{self.max_iter} \u2014 Mejor costo: {self.best_cost:.3e} "
+                f"(plateau global: {self.plateau}) Div: {self.diversity:.3f}")
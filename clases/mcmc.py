@@ -0,0 +1,322 @@
+# -*- coding: utf-8 -*-
+"""
+Muestreo MCMC de la posterior de los parámetros con `emcee`.
+
+El log-posterior es -fitness dentro de los límites del modelo (uniforme) y -inf fuera. Se
+evalúa por lotes: `emcee` entrega en cada medio paso todos los caminantes que se mueven y
+`BatchLogPosterior` los evalúa juntos, con `fitness_batch` (motor discreto, vectorizado) o
+repartidos en un pool persistente de `evaluators`.
+
+Con `tau_factor` el muestreo se detiene solo cuando la cadena mide más de `tau_factor` veces el
+tiempo de autocorrelación integrado (tau) y tau se ha estabilizado; `chain_diagnostics` elige
+entonces el quemado y el adelgazamiento a partir de tau.
+
+La cadena puede guardarse en disco mientras se muestrea (`ChunkedNpzBackend`, o HDF5 si está
+h5py) para reanudar corridas detenidas o caídas y ver resultados parciales sin tenerla en RAM.
+"""
+import json
+import os
+import pickle
+import time
+import numpy as np
+import emcee
+from emcee.backends import Backend
+from emcee.state import State
+
+from .evaluators import calibrate, make_pool, default_worker_count
+
+class BatchLogPosterior:
+    """Log-posterior vectorizado para `emcee.EnsembleSampler(..., vectorize=True)`.
+
+    Sólo se integran las filas dentro de los límites con la guardia de frecuencias aplicada
+    (`guarded_bounds`, los mismos que usan ACOR y el SMC). Con `pool` (cualquier objeto con `map`)
+    las integraciones se reparten; sin él se usa `model.fitness_batch`. Una evaluación que
+    agota su tiempo devuelve costo infinito, es decir log-probabilidad -inf.
+    """
+    def __init__(self, model, pool=None):
+        self.model = model
+        self.pool = pool
+        bounds = model.guarded_bounds()
+        self.low, self.high = bounds[:, 0], bounds[:, 1]
+        # El mismo objeto en cada llamada: el pool instala la función una sola vez por worker
+        self._fitness = model.fitness
+        self.n_evaluations = 0
+
+    def __call__(self, thetas):
+        thetas = np.atleast_2d(thetas)
+        logp = np.full(len(thetas), -np.inf)
+        inside = np.all((self.low <= thetas) & (thetas <= self.high), axis=1)
+        if np.any(inside):
+            X = thetas[inside]
+            costs = self.model.fitness_batch(X) if self.pool is None else np.asarray(self.pool.map(self._fitness, list(X)), dtype=float)
+            logp[inside] = np.where(np.isfinite(costs), -costs, -np.inf)
+            self.n_evaluations += len(X)
+        return logp
+
+def make_mcmc_pool(model, samples, n_walkers, n_workers=None, mode="auto"):
+    """Elige cómo evaluar los caminantes y crea el pool. Devuelve (pool o None, info).
+
+    Con el motor discreto se evalúa cada lote vectorizado en este proceso (sin pool). Si no, en
+    modo "auto" se calibra como en el optimizador (ver `evaluators.calibrate`) con lotes de
+    medio ensemble, que es lo que `emcee` mueve a la vez. Sin tiempo máximo por evaluación: el
+    presupuesto de pasos del modelo ya acota las integraciones rígidas.
+    """
+    if model.engine == "discrete":
+        return None, {"mode": "batch", "workers": 1, "chunksize": 1}
+    n = default_worker_count() if n_workers is None else max(1, int(n_workers))
+    if mode == "auto":
+        info = calibrate(model.fitness, samples, n, max(1, n_walkers // 2))
+    else:
+        info = {"mode": "serial" if n == 1 else mode, "workers": 1 if mode == "serial" else n, "chunksize": 1}
+    return make_pool(info["workers"], None, info["chunksize"], info["mode"]), info
+
+def initial_walkers(n_walkers, best_params, low, high, archive=None, costs=None, ball=1e-4, rng=None):
+    """Posiciones iniciales de los caminantes. Devuelve (posiciones, puntos tomados del archivo).
+
+    Con el archivo final de ACOR (puntos de todas las colonias y sus costos) se toman puntos
+    distintos dentro de los límites, sin reemplazo y con peso exp(-(costo - mínimo) / T), con
+    T = n_dim / 2: la posterior (log = -costo) ocupa típicamente esa franja de costo sobre el
+    mínimo, así que se prefieren los puntos que ya están en ella, de cualquier colonia, y se
+    descartan los de modos tan malos que un caminante nunca saldría de allí. Si faltan puntos
+    para todos los caminantes, el resto se reparte alrededor de los elegidos con un ruido de una
+    décima de su dispersión (y de radio `ball` en las coordenadas en que todos coinciden). Sin
+    archivo, o con menos de dos puntos útiles, se usa la bola de radio `ball` alrededor de
+    `best_params`.
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    best_params = np.asarray(best_params, dtype=float)
+    low, high = np.asarray(low, dtype=float), np.asarray(high, dtype=float)
+    points = np.empty((0, len(best_params)))
+    if archive is not None and costs is not None:
+        points, costs = np.asarray(archive, dtype=float), np.asarray(costs, dtype=float)
+        valid = np.isfinite(costs) & np.all((low <= points) & (points <= high), axis=1)
+        points, costs = points[valid], costs[valid]
+        # Las colonias comparten élites por migración: se quitan los duplicados (a escala de los límites)
+        span = np.where(high > low, high - low, 1.0)
+        _, unique = np.unique(np.round((points - low) / span, 8), axis=0, return_index=True)
+        points, costs = points[unique], costs[unique]
+        # Fuera de la franja plausible (peso < e^-20) un caminante quedaría varado en un modo que la posterior no visita
+        plausible = costs - costs.min() <= 20 * max(1.0, len(best_params) / 2)
+        points, costs = points[plausible], costs[plausible]
+    if len(points) < 2:
+        return best_params + ball * rng.standard_normal((n_walkers, len(best_params))), 0
+
+    delta = costs - costs.min()
+    temperature = max(1.0, len(best_params) / 2)
+    # Muestreo ponderado sin reemplazo (Gumbel top-k), estable aunque los pesos no quepan en float
+    keys = -delta / temperature + rng.gumbel(size=len(points))
+    chosen = points[np.argsort(-keys)[:n_walkers]]
+    # Una coordenada idéntica en todos los caminantes nunca se movería con el stretch move
+    flat = np.std(chosen, axis=0) == 0
+    if np.any(flat):
+        chosen[:, flat] = np.clip(chosen[:, flat] + ball * rng.standard_normal((len(chosen), int(flat.sum()))), low[flat], high[flat])
+    if len(chosen) < n_walkers:
+        extra = chosen[rng.integers(len(chosen), size=n_walkers - len(chosen))]
+        noise = 0.1 * np.std(chosen, axis=0)
+        noise = np.where(noise > 0, noise, ball)
+        extra = np.clip(extra + noise * rng.standard_normal(extra.shape), low, high)
+        chosen = np.vstack([chosen, extra])
+    return chosen, min(len(points), n_walkers)
+
+class ChunkedNpzBackend(Backend):
+    """Backend de `emcee` que escribe la cadena en una carpeta, por trozos de `chunk_steps` pasos.
+
+    En memoria sólo queda el trozo en curso y el último estado del ensemble. Cada trozo lleno se
+    guarda como `chunk_NNNNNN.npz` (cadena y log-probabilidades, en `dtype`; float32 ocupa la
+    mitad) y después `state.pkl` con el último estado en doble precisión, los aceptados y el
+    estado del generador aleatorio. Al abrir una carpeta existente se retoma desde el último
+    trozo escrito: una caída pierde como mucho `chunk_steps` pasos. Con `read_only=True` sólo
+    se lee una cadena ya guardada (`FileNotFoundError` si no la hay) y nunca se escribe.
+    """
+    def __init__(self, path, chunk_steps=100, dtype=None, labels=None, read_only=False):
+        super().__init__(dtype)
+        self.path = path
+        self.read_only = read_only
+        self.chunk_steps = max(1, int(chunk_steps))
+        self.labels = list(labels) if labels is not None else None
+        self._chunks = []
+        self._buffer, self._buffer_log_prob = [], []
+        self._last = None
+        if read_only:
+            if not os.path.exists(self._file("state.pkl")): raise FileNotFoundError(f"No hay ninguna cadena guardada en {path}.")
+        else:
+            os.makedirs(path, exist_ok=True)
+        if os.path.exists(self._file("state.pkl")): self._load()
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def _load(self):
+        with open(self._file("state.pkl"), "rb") as f: state = pickle.load(f)
+        self.nwalkers, self.ndim = state["nwalkers"], state["ndim"]
+        self.dtype = np.dtype(state["dtype"])
+        self.labels = state.get("labels", self.labels)
+        self._chunks = state["chunks"]
+        self.iteration = int(sum(self._chunks))
+        self.accepted = state["accepted"]
+        self.random_state = state["random_state"]
+        self._last = state["last"]
+        self.blobs = None
+        self.initialized = True
+
+    def reset(self, nwalkers, ndim):
+        super().reset(nwalkers, ndim)
+        self.accepted = np.zeros(self.nwalkers)
+        self.chain = self.log_prob = None  # la cadena vive en disco
+        for name in os.listdir(self.path):
+            if name.startswith("chunk_") or name in ("state.pkl", "meta.json"): os.remove(self._file(name))
+        self._chunks, self._buffer, self._buffer_log_prob, self._last = [], [], [], None
+        self.flush()
+
+    def grow(self, ngrow, blobs):
+        if blobs is not None: raise ValueError("ChunkedNpzBackend no guarda blobs.")
+
+    def save_step(self, state, accepted):
+        self._check(state, accepted)
+        self._buffer.append(np.array(state.coords, dtype=self.dtype))
+        self._buffer_log_prob.append(np.array(state.log_prob, dtype=self.dtype))
+        self.accepted += accepted
+        self.random_state = state.random_state
+        self._last = (np.array(state.coords, dtype=float), np.array(state.log_prob, dtype=float))
+        self.iteration += 1
+        if len(self._buffer) >= self.chunk_steps: self.flush()
+
+    def flush(self):
+        """Escribe el trozo en curso (si lo hay) y el estado para reanudar."""
+        if self._buffer:
+            name = self._file(f"chunk_{len(self._chunks):06d}.npz")
+            np.savez(name + ".tmp.npz", chain=np.stack(self._buffer), log_prob=np.stack(self._buffer_log_prob))
+            os.replace(name + ".tmp.npz", name)
+            self._chunks.append(len(self._buffer))
+            self._buffer, self._buffer_log_prob = [], []
+        state = {"nwalkers": self.nwalkers, "ndim": self.ndim, "dtype": np.dtype(self.dtype).str, "labels": self.labels,
+                 "chunks": self._chunks, "accepted": self.accepted, "random_state": self.random_state, "last": self._last}
+        with open(self._file("state.pkl.tmp"), "wb") as f: pickle.dump(state, f)
+        os.replace(self._file("state.pkl.tmp"), self._file("state.pkl"))
+        # Resumen legible para inspeccionar la carpeta sin Python
+        with open(self._file("meta.json"), "w") as f:
+            json.dump({"nwalkers": self.nwalkers, "ndim": self.ndim, "dtype": np.dtype(self.dtype).name,
+                       "steps": int(sum(self._chunks)), "labels": self.labels}, f, indent=2)
+
+    def has_blobs(self):
+        return False
+
+    def get_value(self, name, flat=False, thin=1, discard=0):
+        if self.iteration <= 0:
+            raise AttributeError("you must run the sampler with 'store == True' before accessing the results")
+        if name == "blobs": return None
+        wanted = np.arange(discard + thin - 1, self.iteration, thin)
+        parts, offset = [], 0
+        # Se lee trozo a trozo y sólo se guardan los pasos pedidos (tras descartar y adelgazar)
+        for k, n in enumerate(self._chunks):
+            rows = wanted[(wanted >= offset) & (wanted < offset + n)] - offset
+            if len(rows):
+                with np.load(self._file(f"chunk_{k:06d}.npz")) as data: parts.append(data[name][rows])
+            offset += n
+        rows = wanted[wanted >= offset] - offset
+        if len(rows): parts.append(np.stack(self._buffer if name == "chain" else self._buffer_log_prob)[rows])
+        shape = (0, self.nwalkers, self.ndim) if name == "chain" else (0, self.nwalkers)
+        v = np.concatenate(parts) if parts else np.empty(shape, dtype=self.dtype)
+        if flat: return v.reshape((-1,) + v.shape[2:])
+        return v
+
+    def get_last_sample(self):
+        if not self.initialized or self.iteration <= 0 or self._last is None:
+            raise AttributeError("you must run the sampler with 'store == True' before accessing the results")
+        return State(self._last[0], log_prob=self._last[1], random_state=self.random_state)
+
+    def __exit__(self, *exc):
+        if not self.read_only: self.flush()
+
+def chain_diagnostics(sampler, tau=None):
+    """Resumen de convergencia de una cadena: tau por parámetro, quemado, adelgazamiento y muestras efectivas.
+
+    Sigue la receta habitual de `emcee`: quemado = 2 * max(tau) y adelgazamiento = min(tau) / 2.
+    Si la cadena es demasiado corta para ese quemado se descarta la mitad. Acepta un sampler o
+    directamente un backend (una cadena guardada); `tau` puede venir ya calculado (p. ej. la
+    última estimación de `run_sampler`).
+    """
+    backend = getattr(sampler, "backend", sampler)
+    n = backend.iteration
+    if tau is None:
+        tau = sampler.tau_history[-1][1] if getattr(sampler, "tau_history", None) else sampler.get_autocorr_time(tol=0)
+    tau = np.asarray(tau, dtype=float)
+    finite = np.isfinite(tau).all()
+    burn = int(np.ceil(2 * np.max(tau))) if finite else n // 2
+    if burn >= n: burn = n // 2
+    thin = max(1, int(0.5 * np.min(tau))) if finite else 1
+    return {"steps": n, "tau": tau, "burn": burn, "thin": thin,
+            "chain_over_tau": n / np.max(tau) if finite else 0.0,
+            "n_effective": backend.shape[0] * (n - burn) / np.max(tau) if finite else 0.0,
+            "acceptance": float(np.mean(backend.accepted / n)),
+            "converged": bool(getattr(sampler, "converged", False))}
+
+def partial_samples(sampler, n_burn, n_thin):
+    """Muestras aplanadas de una cadena quizá incompleta: si aún no supera el quemado, se descarta la primera mitad."""
+    n = sampler.iteration
+    if n == 0: return None
+    return sampler.get_chain(discard=n_burn if n > n_burn else n // 2, thin=max(1, int(n_thin)), flat=True)
+
+def open_chain_backend(path, compact=False, chunk_steps=100, labels=None, read_only=False):
+    """Abre (o crea) el almacenamiento en disco de una cadena.
+
+    Una ruta terminada en .h5/.hdf5 usa `emcee.backends.HDFBackend` (requiere h5py); cualquier
+    otra es una carpeta de `ChunkedNpzBackend`. Con `compact=True` la cadena se guarda en float32.
+    Con `read_only=True` (para ver una cadena guardada) no se crea nada: si no existe la cadena
+    se lanza `FileNotFoundError`.
+    """
+    dtype = np.float32 if compact else np.float64
+    if str(path).lower().endswith((".h5", ".hdf5")):
+        if read_only and not os.path.isfile(path): raise FileNotFoundError(f"No existe el archivo de cadena {path}.")
+        return emcee.backends.HDFBackend(path, dtype=dtype, read_only=read_only)
+    return ChunkedNpzBackend(path, chunk_steps, dtype, labels, read_only)
+
+def run_sampler(log_prob, p0, n_steps, callback=None, should_stop=None, report_interval=1.0, backend=None, resume=True,
+                tau_factor=None, check_interval=100, tau_tolerance=0.01, autocorr_callback=None):
+    """Corre el ensemble desde `p0` (n_caminantes, n_dim) hasta `n_steps` pasos o hasta `should_stop()`.
+
+    Con un `backend` que ya tiene pasos y `resume=True` se reanuda desde su último estado (se
+    ignora `p0`) hasta completar `n_steps` en total; con `resume=False` se empieza de cero. Al
+    terminar o detenerse el backend se vuelca a disco. `callback(paso, n_steps,
+    pasos_por_segundo)` se llama como mucho cada `report_interval` segundos y al terminar.
+    Devuelve el `emcee.EnsembleSampler`.
+
+    Con `tau_factor`, `n_steps` pasa a ser un máximo: cada `check_interval` pasos se estima tau
+    y se para cuando todos los parámetros cumplen `tau_factor * tau < pasos` y tau cambió menos
+    de `tau_tolerance` (relativo) desde la estimación anterior. `autocorr_callback(paso, tau,
+    convergió)` recibe cada estimación; quedan en `sampler.tau_history` y `sampler.converged`.
+    """
+    resuming = resume and backend is not None and backend.initialized and backend.iteration > 0
+    if resuming:
+        p0 = backend.get_last_sample()
+        shape = backend.shape
+    else:
+        p0 = np.asarray(p0, dtype=float)
+        shape = p0.shape
+        if backend is not None: backend.reset(*shape)
+    sampler = emcee.EnsembleSampler(shape[0], shape[1], log_prob, vectorize=True, backend=backend)
+    done = sampler.iteration
+    start = last = time.perf_counter()
+    step = done
+    sampler.tau_history, sampler.converged = [], False
+    previous = None
+    try:
+        for step, _ in enumerate(sampler.sample(p0, iterations=max(0, n_steps - done), progress=False), start=done + 1):
+            if should_stop and should_stop(): break
+            now = time.perf_counter()
+            if callback and (now - last >= report_interval or step == n_steps):
+                callback(step, n_steps, (step - done) / max(now - start, 1e-9))
+                last = now
+            if tau_factor and step % check_interval == 0:
+                tau = sampler.get_autocorr_time(tol=0)
+                sampler.tau_history.append((step, tau))
+                # Con pocos pasos tau puede salir NaN: las comparaciones fallan y se sigue muestreando
+                sampler.converged = previous is not None and bool(np.all(tau_factor * tau < step)) \
+                    and bool(np.all(np.abs(previous - tau) < tau_tolerance * tau))
+                if autocorr_callback: autocorr_callback(step, tau, sampler.converged)
+                if sampler.converged: break
+                previous = tau
+    finally:
+        if hasattr(backend, "flush"): backend.flush()
+    sampler.steps_per_second = (step - done) / max(time.perf_counter() - start, 1e-9)
+    return sampler
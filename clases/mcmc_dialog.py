@@ -1,16 +1,22 @@
 # -*- coding: utf-8 -*-
+from contextlib import nullcontext
 import numpy as np
-import emcee
 import corner
 import matplotlib.pyplot as plt
 from PyQt5.QtWidgets import (
     QDialog, QVBoxLayout, QTabWidget, QWidget, QFormLayout, QSpinBox,
-    QDialogButtonBox, QTextEdit, QProgressBar, QPushButton, QMessageBox
+    QDialogButtonBox, QTextEdit, QProgressBar, QPushButton, QMessageBox, QComboBox,
+    QLineEdit, QCheckBox, QHBoxLayout, QFileDialog
 )
 from PyQt5.QtCore import QThread, pyqtSignal
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 
+from .mcmc import (BatchLogPosterior, make_mcmc_pool, run_sampler, open_chain_backend, partial_samples, chain_diagnostics,
+                   initial_walkers)
+from .smc import smc_posterior
+from .evaluators import default_worker_count, make_pool
+
 class MplCanvas(FigureCanvas):
     """Widget para incrustar un gráfico de Matplotlib en PyQt."""
     def __init__(self, parent=None, width=5, height=4, dpi=100):
@@ -23,54 +29,97 @@ class MCMCWorker(QThread):
     progress_signal = pyqtSignal(int, str)
     finished_signal = pyqtSignal(object)
 
-    def __init__(self, model, start_params, n_walkers, n_steps, n_burn, n_thin):
+    def __init__(self, model, start_params, n_walkers, n_steps, n_burn, n_thin, n_workers=None, parallel_mode="auto",
+                 chain_path=None, compact=False, resume=True, tau_factor=None, archive=None, archive_costs=None):
         super().__init__()
+        # Archivo final de ACOR (puntos y costos) para repartir los caminantes; None = bola alrededor de start_params
+        self.archive = archive
+        self.archive_costs = archive_costs
+        # Con `tau_factor` la parada, el quemado y el adelgazamiento salen de la autocorrelación
+        # y `n_steps` es sólo el máximo
+        self.tau_factor = tau_factor
+        # Cadena en disco (None = en memoria): se reanuda si ya tiene pasos y `resume`
+        self.chain_path = chain_path
+        self.compact = compact
+        self.resume = resume
         self.model = model
         self.start_params = start_params
         self.n_walkers = n_walkers
         self.n_steps = n_steps
         self.n_burn = n_burn
         self.n_thin = n_thin
+        self.n_workers = n_workers
+        self.parallel_mode = parallel_mode
         self._is_running = True
 
     def stop(self):
         self._is_running = False
 
-    def log_prob(self, theta):
-        # Penalización si los parámetros están fuera de los límites
-        if not np.all((self.model.LOW <= theta) & (theta <= self.model.HIGH)):
-            return -np.inf
-        
-        # La función de verosimilitud es proporcional a la inversa del error (MSE)
-        # log(prob) es proporcional a -MSE
-        fitness = self.model.fitness(theta)
-        return -fitness
+    def handle_progress(self, step, n_steps, rate):
+        self.progress_signal.emit(int(step * 100 / n_steps), f"Paso {step}/{n_steps} — {rate:.2f} pasos/s "
+                                                             f"({rate * self.n_walkers:.0f} evaluaciones/s)")
+
+    def handle_autocorr(self, step, tau, converged):
+        if not np.all(np.isfinite(tau)):
+            self.progress_signal.emit(int(step * 100 / self.n_steps), f"Paso {step}: cadena aún demasiado corta para estimar tau.")
+            return
+        state = "convergió" if converged else f"objetivo {self.tau_factor:g}"
+        self.progress_signal.emit(int(step * 100 / self.n_steps), f"Paso {step}: tau máx = {np.max(tau):.1f}, "
+                                                                  f"cadena = {step / np.max(tau):.1f} tau ({state}).")
+
+    def report_diagnostics(self, diag, labels):
+        lines = [f"Diagnóstico: {diag['steps']} pasos, cadena = {diag['chain_over_tau']:.1f} tau, "
+                 f"{diag['n_effective']:.0f} muestras efectivas, aceptación {diag['acceptance']:.2f}, "
+                 f"quemado {diag['burn']}, adelgazamiento {diag['thin']}."]
+        lines += [f"  tau[{label}] = {t:.1f}" for label, t in zip(labels, diag["tau"])]
+        if self.tau_factor and not diag["converged"]:
+            lines.append("  Aviso: se alcanzó el máximo de pasos sin converger; aumente el número de pasos.")
+        self.progress_signal.emit(100, "\n".join(lines))
 
     def run(self):
         try:
             ndim = self.model.DIM
-            # Inicializar caminantes en una pequeña bola alrededor de la mejor solución de ACOR
-            pos = self.start_params + 1e-4 * np.random.randn(self.n_walkers, ndim)
-            
-            sampler = emcee.EnsembleSampler(self.n_walkers, ndim, self.log_prob)
-            
-            self.progress_signal.emit(0, f"Ejecutando MCMC con {self.n_walkers} caminantes...")
-            
-            # Iterar y actualizar el progreso
-            for i, result in enumerate(sampler.sample(pos, iterations=self.n_steps, progress=False)):
-                if not self._is_running:
-                    self.progress_signal.emit(100, "Detenido por el usuario.")
-                    self.finished_signal.emit(None)
-                    return
-                
-                progress_pct = int((i + 1) * 100 / self.n_steps)
-                if i % 20 == 0: # Actualizar no tan frecuentemente para no ralentizar
-                    self.progress_signal.emit(progress_pct, f"Paso {i+1}/{self.n_steps} completado.")
-            
-            self.progress_signal.emit(100, "Muestreo completado. Procesando resultados...")
+            # Caminantes desde el archivo de ACOR (o, sin él, en una pequeña bola alrededor de la mejor solución)
+            bounds = self.model.guarded_bounds()
+            pos, n_archive = initial_walkers(self.n_walkers, self.start_params, bounds[:, 0], bounds[:, 1],
+                                             self.archive, self.archive_costs)
+            if n_archive:
+                self.progress_signal.emit(0, f"Caminantes iniciados desde {n_archive} puntos distintos del archivo de ACOR.")
+
+            backend = None
+            if self.chain_path:
+                backend = open_chain_backend(self.chain_path, self.compact, labels=self.model.labels)
+                if self.resume and backend.initialized and backend.iteration > 0:
+                    saved_labels = getattr(backend, "labels", None)
+                    if backend.shape[1] != ndim or (saved_labels and list(saved_labels) != list(self.model.labels)):
+                        raise ValueError("la cadena guardada corresponde a otra estructura de modelo.")
+                    self.n_walkers = backend.shape[0]
+                    self.progress_signal.emit(0, f"Reanudando la cadena de {self.chain_path} desde el paso {backend.iteration}.")
+
+            pool, info = make_mcmc_pool(self.model, pos[:5], self.n_walkers, self.n_workers, self.parallel_mode)
+            self.progress_signal.emit(0, f"Ejecutando MCMC con {self.n_walkers} caminantes "
+                                         f"(evaluación: {info['mode']}, {info['workers']} workers)...")
+            # La verosimilitud es proporcional a la inversa del error: log(prob) = -costo
+            with pool if pool is not None else nullcontext():
+                sampler = run_sampler(BatchLogPosterior(self.model, pool), pos, self.n_steps, self.handle_progress,
+                                      lambda: not self._is_running, backend=backend, resume=self.resume,
+                                      tau_factor=self.tau_factor, autocorr_callback=self.handle_autocorr)
+            if sampler.iteration > 0:
+                diag = chain_diagnostics(sampler)
+                self.report_diagnostics(diag, self.model.labels)
+                if self.tau_factor: self.n_burn, self.n_thin = diag["burn"], diag["thin"]
+            if not self._is_running:
+                # Lo muestreado hasta aquí no se pierde: queda en disco (si hay backend) y se grafica
+                where = f" La cadena quedó guardada en {self.chain_path} ({sampler.iteration} pasos)." if backend is not None else ""
+                self.progress_signal.emit(100, f"Detenido por el usuario. Resultados parciales.{where}")
+                self.finished_signal.emit(partial_samples(sampler, self.n_burn, self.n_thin))
+                return
+
+            self.progress_signal.emit(100, f"Muestreo completado ({sampler.steps_per_second:.2f} pasos/s, "
+                                           f"aceptación media {np.mean(sampler.acceptance_fraction):.2f}). Procesando resultados...")
             
             # Descartar el período de quemado y adelgazar la cadena
-            flat_samples = sampler.get_chain(discard=self.n_burn, thin=self.n_thin, flat=True)
+            flat_samples = partial_samples(sampler, self.n_burn, self.n_thin)
             
             self.progress_signal.emit(100, "Análisis finalizado.")
             self.finished_signal.emit(flat_samples)
@@ -79,12 +128,81 @@ class MCMCWorker(QThread):
             self.progress_signal.emit(0, f"Error en el worker MCMC: {e}")
             self.finished_signal.emit(None)
 
+class SMCWorker(QThread):
+    """Ejecuta el muestreador SMC con templado adaptativo en un hilo separado."""
+    progress_signal = pyqtSignal(int, str)
+    finished_signal = pyqtSignal(object)
+
+    def __init__(self, model, best_params, n_particles, n_workers=None, parallel_mode="auto", archive=None, archive_costs=None):
+        super().__init__()
+        self.model = model
+        self.best_params = best_params
+        self.n_particles = n_particles
+        self.n_workers = n_workers
+        self.parallel_mode = parallel_mode
+        # Archivo final de ACOR para ajustar la referencia inicial; None = partir del prior
+        self.archive = archive
+        self.archive_costs = archive_costs
+        self._is_running = True
+
+    def stop(self):
+        self._is_running = False
+
+    def handle_stage(self, stage, beta, ess, acceptance, log_z):
+        self.progress_signal.emit(int(beta * 100), f"Etapa {stage}: β = {beta:.4g}, ESS {ess:.0%}, "
+                                                   f"aceptación {acceptance:.2f}, log Z acumulado {log_z:.2f}")
+
+    def run(self):
+        try:
+            # Cada paso mueve todas las partículas a la vez: se calibra con lotes de la población entera
+            pool, info = make_mcmc_pool(self.model, np.asarray(self.best_params, dtype=float)[None], 2 * self.n_particles,
+                                        self.n_workers, self.parallel_mode)
+            start = "el archivo de ACOR" if self.archive is not None else "el prior"
+            self.progress_signal.emit(0, f"Ejecutando SMC con {self.n_particles} partículas desde {start} "
+                                         f"(evaluación: {info['mode']}, {info['workers']} workers)...")
+            with pool if pool is not None else nullcontext():
+                smc = smc_posterior(self.model, self.n_particles, pool, self.archive, self.archive_costs, self.best_params,
+                                    callback=self.handle_stage, should_stop=lambda: not self._is_running)
+            if not smc.completed:
+                self.progress_signal.emit(100, f"Detenido en β = {smc.betas[-1]:.4g}: las partículas son de una etapa "
+                                               "intermedia y la evidencia no es válida.")
+            else:
+                self.progress_signal.emit(100, f"SMC completado: {smc.n_stages} etapas, {smc.n_evaluations} evaluaciones "
+                                               f"en {smc.duration:.1f} s. log Z = {smc.log_evidence:.2f} "
+                                               f"(-2 log Z = {-2 * smc.log_evidence:.2f}, comparable con el BIC).")
+            self.finished_signal.emit(smc)
+        except Exception as e:
+            self.progress_signal.emit(0, f"Error en el worker SMC: {e}")
+            self.finished_signal.emit(None)
+
+class PredictiveWorker(QThread):
+    """Integra las muestras de la posterior y calcula las bandas de credibilidad en un hilo separado."""
+    finished_signal = pyqtSignal(object, str)
+
+    def __init__(self, model, samples, t):
+        super().__init__()
+        self.model = model
+        self.samples = samples
+        self.t = t
+
+    def run(self):
+        try:
+            # Con odeint cada muestra se integra por separado, repartidas entre procesos
+            pool = make_pool(mode="process") if self.model.engine != "discrete" else None
+            with pool if pool is not None else nullcontext():
+                bands = self.model.predictive_bands(self.samples, self.t, pool=pool)
+            self.finished_signal.emit(bands, "")
+        except Exception as e:
+            self.finished_signal.emit(None, str(e))
+
 class MCMCDialog(QDialog):
     def __init__(self, model, result, parent=None):
         super().__init__(parent)
         self.model = model
         self.result = result
         self.worker = None
+        self.samples = None
+        self.predictive_worker = None
         
         self.setWindowTitle("Análisis de Incertidumbre de Parámetros (MCMC)")
         self.setGeometry(450, 300, 900, 700)
@@ -98,14 +216,58 @@ class MCMCDialog(QDialog):
         # --- Pestaña de Configuración ---
         config_tab = QWidget()
         form_layout = QFormLayout(config_tab)
+        self.cb_sampler = QComboBox()
+        self.cb_sampler.addItem("Ensemble (emcee)", "emcee"); self.cb_sampler.addItem("SMC con templado adaptativo", "smc")
+        self.cb_sampler.setToolTip("SMC mueve una población de partículas en lotes, recorre modos separados y estima la evidencia\n"
+                                   "del modelo (log Z), con la verosimilitud gaussiana de AIC/BIC.")
+        self.cb_sampler.currentIndexChanged.connect(self.toggle_sampler)
+        self.spin_particles = QSpinBox(); self.spin_particles.setRange(100, 20000); self.spin_particles.setSingleStep(100)
+        self.spin_particles.setValue(1000); self.spin_particles.setEnabled(False)
+        form_layout.addRow("Muestreador:", self.cb_sampler)
+        form_layout.addRow("Partículas (SMC):", self.spin_particles)
         self.spin_walkers = QSpinBox(); self.spin_walkers.setRange(2 * self.model.DIM, 500); self.spin_walkers.setValue(50)
         self.spin_steps = QSpinBox(); self.spin_steps.setRange(100, 10000); self.spin_steps.setValue(1000)
         self.spin_burn = QSpinBox(); self.spin_burn.setRange(50, 5000); self.spin_burn.setValue(200)
         self.spin_thin = QSpinBox(); self.spin_thin.setRange(1, 100); self.spin_thin.setValue(15)
+        self.cb_parallel_mode = QComboBox()
+        for text, mode in (("Automático (calibrado)", "auto"), ("En serie", "serial"), ("Hilos", "thread"), ("Procesos", "process")):
+            self.cb_parallel_mode.addItem(text, mode)
+        self.cb_parallel_mode.setToolTip("Con el motor discreto los caminantes se evalúan vectorizados, sin pool.")
+        self.spin_workers = QSpinBox(); self.spin_workers.setRange(1, 256); self.spin_workers.setValue(default_worker_count())
         form_layout.addRow("Número de Caminantes:", self.spin_walkers)
+        self.chk_autocorr = QCheckBox("Detener al converger (autocorrelación)")
+        self.chk_autocorr.setToolTip("Se para cuando la cadena supera el múltiplo de tau indicado; el número de pasos pasa a ser un máximo\n"
+                                     "y el quemado y el adelgazamiento se eligen a partir de tau.")
+        self.spin_tau_factor = QSpinBox(); self.spin_tau_factor.setRange(10, 1000); self.spin_tau_factor.setValue(50)
+        self.spin_tau_factor.setEnabled(False)
+        self.chk_autocorr.toggled.connect(self.toggle_autocorr)
         form_layout.addRow("Número de Pasos:", self.spin_steps)
+        form_layout.addRow("", self.chk_autocorr)
+        form_layout.addRow("Largo mínimo (múltiplos de tau):", self.spin_tau_factor)
         form_layout.addRow("Pasos de Quemado (Burn-in):", self.spin_burn)
         form_layout.addRow("Adelgazamiento (Thinning):", self.spin_thin)
+        form_layout.addRow("Evaluación de caminantes:", self.cb_parallel_mode)
+        form_layout.addRow("Workers:", self.spin_workers)
+        chain_row = QHBoxLayout()
+        self.edit_chain_path = QLineEdit(); self.edit_chain_path.setPlaceholderText("(en memoria)")
+        self.edit_chain_path.setToolTip("Carpeta donde se guarda la cadena por trozos (.npz), o archivo .h5 si está h5py.")
+        btn_browse = QPushButton("..."); btn_browse.clicked.connect(self.browse_chain_path)
+        chain_row.addWidget(self.edit_chain_path); chain_row.addWidget(btn_browse)
+        form_layout.addRow("Cadena en disco:", chain_row)
+        self.chk_compact = QCheckBox("Guardar en float32 (la mitad de espacio)")
+        self.chk_resume = QCheckBox("Reanudar la cadena guardada si existe"); self.chk_resume.setChecked(True)
+        form_layout.addRow("", self.chk_compact)
+        form_layout.addRow("", self.chk_resume)
+        self.chk_from_archive = QCheckBox("Iniciar caminantes desde el archivo de ACOR")
+        self.chk_from_archive.setToolTip("Reparte los caminantes entre los puntos finales de las colonias, ponderados por costo.\n"
+                                         "Sin marcar (o sin archivo) se usa una bola pequeña alrededor del mejor punto.\n"
+                                         "Con SMC, la referencia inicial se ajusta a esos puntos en lugar de partir del prior.")
+        has_archive = getattr(self.result, "archive", None) is not None
+        self.chk_from_archive.setChecked(has_archive); self.chk_from_archive.setEnabled(has_archive)
+        form_layout.addRow("", self.chk_from_archive)
+        self.spin_horizon = QSpinBox(); self.spin_horizon.setRange(0, 520); self.spin_horizon.setValue(8)
+        self.spin_horizon.setToolTip("Semanas a proyectar después del último dato en las bandas predictivas.")
+        form_layout.addRow("Horizonte de Predicción (semanas):", self.spin_horizon)
         tabs.addTab(config_tab, "Configuración")
 
         # --- Pestaña de Progreso y Resultados ---
@@ -124,21 +286,30 @@ class MCMCDialog(QDialog):
         self.btn_run.clicked.connect(self.run_mcmc)
         self.btn_stop = QPushButton("Detener"); self.btn_stop.setEnabled(False)
         self.btn_stop.clicked.connect(self.stop_mcmc)
-        
+        self.btn_load = QPushButton("Ver Cadena Guardada")
+        self.btn_load.clicked.connect(self.load_saved_chain)
+        self.btn_bands = QPushButton("Bandas Predictivas"); self.btn_bands.setEnabled(False)
+        self.btn_bands.setToolTip("Integra las muestras de la posterior y superpone las bandas de I(t) y Rt en la ventana principal.")
+        self.btn_bands.clicked.connect(self.compute_bands)
+
         button_box = QDialogButtonBox()
         button_box.addButton(self.btn_run, QDialogButtonBox.ActionRole)
         button_box.addButton(self.btn_stop, QDialogButtonBox.ActionRole)
+        button_box.addButton(self.btn_load, QDialogButtonBox.ActionRole)
+        button_box.addButton(self.btn_bands, QDialogButtonBox.ActionRole)
         main_layout.addWidget(button_box)
 
     def log(self, message):
         self.log_text.append(message)
 
     def run_mcmc(self):
+        if self.cb_sampler.currentData() == "smc":
+            self.run_smc(); return
         n_walkers = self.spin_walkers.value()
         n_steps = self.spin_steps.value()
         n_burn = self.spin_burn.value()
         
-        if n_burn >= n_steps:
+        if n_burn >= n_steps and not self.chk_autocorr.isChecked():
             QMessageBox.warning(self, "Configuración Inválida", "El período de quemado debe ser menor que el número total de pasos.")
             return
 
@@ -152,12 +323,86 @@ class MCMCDialog(QDialog):
             n_walkers=n_walkers,
             n_steps=n_steps,
             n_burn=n_burn,
-            n_thin=self.spin_thin.value()
+            n_thin=self.spin_thin.value(),
+            n_workers=self.spin_workers.value(),
+            parallel_mode=self.cb_parallel_mode.currentData(),
+            chain_path=self.edit_chain_path.text().strip() or None,
+            compact=self.chk_compact.isChecked(),
+            resume=self.chk_resume.isChecked(),
+            tau_factor=self.spin_tau_factor.value() if self.chk_autocorr.isChecked() else None,
+            archive=self.result.archive if self.chk_from_archive.isChecked() else None,
+            archive_costs=self.result.archive_costs if self.chk_from_archive.isChecked() else None
         )
         self.worker.progress_signal.connect(self.update_progress)
         self.worker.finished_signal.connect(self.on_mcmc_finished)
         self.worker.start()
 
+    def run_smc(self):
+        self.btn_run.setEnabled(False)
+        self.btn_stop.setEnabled(True)
+        self.log("Iniciando análisis SMC...")
+        from_archive = self.chk_from_archive.isChecked()
+        self.worker = SMCWorker(self.model, self.result.best_params, self.spin_particles.value(), self.spin_workers.value(),
+                                self.cb_parallel_mode.currentData(),
+                                self.result.archive if from_archive else None, self.result.archive_costs if from_archive else None)
+        self.worker.progress_signal.connect(self.update_progress)
+        self.worker.finished_signal.connect(self.on_smc_finished)
+        self.worker.start()
+
+    def on_smc_finished(self, smc):
+        self.btn_run.setEnabled(True)
+        self.btn_stop.setEnabled(False)
+        self.worker = None
+        if smc is None:
+            self.log("El análisis no produjo resultados.")
+            return
+        if smc.completed:
+            self.result.evidence = smc
+            if np.isfinite(getattr(self.result, "bic", np.nan)):
+                self.log(f"BIC de la ejecución: {self.result.bic:.2f}.")
+        self.plot_samples(smc.samples)
+
+    def toggle_sampler(self):
+        smc = self.cb_sampler.currentData() == "smc"
+        self.spin_particles.setEnabled(smc)
+        for widget in (self.spin_walkers, self.spin_steps, self.chk_autocorr, self.edit_chain_path, self.chk_compact, self.chk_resume):
+            widget.setEnabled(not smc)
+        self.spin_tau_factor.setEnabled(not smc and self.chk_autocorr.isChecked())
+        self.spin_burn.setEnabled(not smc and not self.chk_autocorr.isChecked())
+        self.spin_thin.setEnabled(not smc and not self.chk_autocorr.isChecked())
+
+    def toggle_autocorr(self, enabled):
+        self.spin_tau_factor.setEnabled(enabled)
+        self.spin_burn.setEnabled(not enabled)
+        self.spin_thin.setEnabled(not enabled)
+        self.spin_steps.setRange(100, 100000 if enabled else 10000)
+
+    def browse_chain_path(self):
+        path = QFileDialog.getExistingDirectory(self, "Carpeta de la cadena MCMC")
+        if path: self.edit_chain_path.setText(path)
+
+    def load_saved_chain(self):
+        """Grafica una cadena guardada (completa o parcial) con el quemado y adelgazamiento actuales (o los de tau)."""
+        path = self.edit_chain_path.text().strip()
+        if not path:
+            QMessageBox.information(self, "Sin cadena", "Indique la carpeta o archivo de la cadena."); return
+        try:
+            backend = open_chain_backend(path, read_only=True)
+            if not backend.initialized or backend.iteration == 0:
+                self.log(f"{path} no contiene pasos guardados."); return
+            if self.chk_autocorr.isChecked():
+                diag = chain_diagnostics(backend)
+                n_burn, n_thin = diag["burn"], diag["thin"]
+                self.log(f"Quemado {n_burn} y adelgazamiento {n_thin} según tau (máx {np.max(diag['tau']):.1f}).")
+            else:
+                n_burn = self.spin_burn.value() if backend.iteration > self.spin_burn.value() else backend.iteration // 2
+                n_thin = self.spin_thin.value()
+            samples = backend.get_chain(discard=n_burn, thin=n_thin, flat=True)
+        except Exception as e:
+            self.log(f"Error al leer la cadena: {e}"); return
+        self.log(f"Cadena de {path}: {backend.iteration} pasos, {backend.shape[0]} caminantes.")
+        self.plot_samples(samples.astype(float))
+
     def stop_mcmc(self):
         if self.worker:
             self.worker.stop()
@@ -176,7 +421,30 @@ class MCMCDialog(QDialog):
         if samples is None:
             self.log("El análisis no produjo resultados.")
             return
-        
+        self.plot_samples(samples)
+
+    def compute_bands(self):
+        if self.samples is None or self.predictive_worker is not None: return
+        t0, t1 = float(self.model.t_data[0]), float(self.model.t_data[-1]) + self.spin_horizon.value()
+        self.btn_bands.setEnabled(False)
+        self.log(f"Integrando hasta {min(len(self.samples), 2000)} muestras de la posterior (t = {t0:g} a {t1:g})...")
+        self.predictive_worker = PredictiveWorker(self.model, self.samples, np.linspace(t0, t1, 300))
+        self.predictive_worker.finished_signal.connect(self.on_bands_finished)
+        self.predictive_worker.start()
+
+    def on_bands_finished(self, bands, error):
+        self.predictive_worker = None
+        self.btn_bands.setEnabled(self.samples is not None)
+        if bands is None:
+            self.log(f"Error al calcular las bandas: {error}"); return
+        self.result.predictive = bands
+        q = bands["quantiles"]
+        self.log(f"Bandas {q[0]:.1%}–{q[-1]:.1%} calculadas con {bands['n']} muestras.")
+        if hasattr(self.parent(), "show_predictive_bands"): self.parent().show_predictive_bands(self.result)
+
+    def plot_samples(self, samples):
+        self.samples = samples
+        self.btn_bands.setEnabled(self.predictive_worker is None)
         self.log("Generando gráfico de esquina (corner plot)...")
         
         # Limpiar el canvas anterior
@@ -1,7 +1,15 @@
 # -*- coding: utf-8 -*-
+from dataclasses import replace
+import numpy as np
+import psutil
 from PyQt5.QtWidgets import (
-    QDialog, QVBoxLayout, QFormLayout, QSpinBox, QDialogButtonBox, QLabel
+    QDialog, QVBoxLayout, QFormLayout, QSpinBox, QDialogButtonBox, QLabel, QProgressBar,
+    QTextEdit, QTableWidget, QTableWidgetItem, QHeaderView, QPushButton, QMessageBox
 )
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from .model_selection import run_harmonic_sweep
+from .evaluators import default_worker_count
 
 class ModelConfigDialog(QDialog):
     """Diálogo para configurar la estructura del modelo SEIR (número de armónicos)."""
@@ -45,3 +53,121 @@ class ModelConfigDialog(QDialog):
             'gamma': self.spin_gamma.value(),
             'sigma': self.spin_sigma.value()
         }
+
+class HarmonicSweepWorker(QThread):
+    """Ejecuta el barrido de estructuras armónicas en un hilo separado."""
+    progress_signal = pyqtSignal(int, str)
+    finished_signal = pyqtSignal(object)
+
+    def __init__(self, model, acor_config, max_terms, max_workers):
+        super().__init__()
+        self.model = model
+        self.acor_config = acor_config
+        self.max_terms = max_terms
+        self.max_workers = max_workers
+        self._is_running = True
+
+    def stop(self):
+        self._is_running = False
+
+    def run(self):
+        try:
+            def on_progress(done, total, result):
+                self.progress_signal.emit(int(done * 100 / total), f"[{done}/{total}] {result.name}: costo {result.best_cost:.4e}")
+            results = run_harmonic_sweep(self.model.t_data, self.model.I_data, self.model.N, self.acor_config, self.max_terms,
+                                         self.model.loss_type, self.model.huber_delta, self.max_workers,
+                                         callback=on_progress, should_stop=lambda: not self._is_running, engine=self.model.engine,
+                                         job_options=self.model.guard_options())
+            self.finished_signal.emit(results)
+        except Exception as e:
+            self.progress_signal.emit(0, f"Error en el barrido: {e}")
+            self.finished_signal.emit(None)
+
+class HarmonicSweepDialog(QDialog):
+    """Diálogo para ajustar todas las estructuras armónicas y compararlas por AIC/BIC."""
+    def __init__(self, model, acor_config, parent=None):
+        super().__init__(parent)
+        self.model = model
+        self.acor_config = acor_config
+        self.worker = None
+        self.results = []
+        self.setWindowTitle("Barrido de Estructuras del Modelo")
+        self.setGeometry(420, 260, 800, 600)
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel("Ajusta cada combinación de armónicos en paralelo. Cada estructura arranca desde\n"
+                                "la mejor estructura anidada más simple (armónicos nuevos con amplitud cero)."))
+        form_layout = QFormLayout()
+        self.spin_max_terms = QSpinBox(); self.spin_max_terms.setRange(1, 3); self.spin_max_terms.setValue(2)
+        self.spin_iters = QSpinBox(); self.spin_iters.setRange(10, 100000); self.spin_iters.setValue(min(300, acor_config.max_iter))
+        self.spin_workers = QSpinBox(); self.spin_workers.setRange(1, psutil.cpu_count(logical=True) or 1); self.spin_workers.setValue(default_worker_count())
+        form_layout.addRow("Máximo de armónicos por tasa:", self.spin_max_terms)
+        form_layout.addRow("Iteraciones por estructura:", self.spin_iters)
+        form_layout.addRow("Ajustes simultáneos (procesos):", self.spin_workers)
+        layout.addLayout(form_layout)
+
+        self.progress_bar = QProgressBar()
+        self.log_text = QTextEdit(); self.log_text.setReadOnly(True)
+        self.table = QTableWidget(0, 6)
+        self.table.setHorizontalHeaderLabels(["Estructura", "Parámetros", "Costo", "AIC", "BIC", "Tiempo (s)"])
+        self.table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        layout.addWidget(self.progress_bar)
+        layout.addWidget(self.log_text, 1)
+        layout.addWidget(self.table, 3)
+
+        self.btn_run = QPushButton("Ejecutar Barrido"); self.btn_run.clicked.connect(self.run_sweep)
+        self.btn_stop = QPushButton("Detener"); self.btn_stop.setEnabled(False); self.btn_stop.clicked.connect(self.stop_sweep)
+        self.btn_apply = QPushButton("Usar Estructura Seleccionada"); self.btn_apply.setEnabled(False); self.btn_apply.clicked.connect(self.accept)
+        button_box = QDialogButtonBox()
+        for btn in (self.btn_run, self.btn_stop, self.btn_apply): button_box.addButton(btn, QDialogButtonBox.ActionRole)
+        button_box.addButton(QDialogButtonBox.Close).clicked.connect(self.reject)
+        layout.addWidget(button_box)
+
+    def run_sweep(self):
+        if len(self.model.I_data) == 0:
+            QMessageBox.warning(self, "Datos faltantes", "Importe datos antes de ejecutar el barrido."); return
+        config = replace(self.acor_config, max_iter=self.spin_iters.value())
+        self.table.setRowCount(0); self.btn_apply.setEnabled(False)
+        self.btn_run.setEnabled(False); self.btn_stop.setEnabled(True)
+        self.log_text.append("Iniciando barrido de estructuras...")
+        self.worker = HarmonicSweepWorker(self.model, config, self.spin_max_terms.value(), self.spin_workers.value())
+        self.worker.progress_signal.connect(self.update_progress)
+        self.worker.finished_signal.connect(self.on_sweep_finished)
+        self.worker.start()
+
+    def stop_sweep(self):
+        if self.worker:
+            self.worker.stop()
+            self.log_text.append("Deteniendo: se terminarán los ajustes en curso...")
+            self.btn_stop.setEnabled(False)
+
+    def update_progress(self, pct, msg):
+        self.progress_bar.setValue(pct)
+        self.log_text.append(msg)
+
+    def on_sweep_finished(self, results):
+        self.btn_run.setEnabled(True); self.btn_stop.setEnabled(False)
+        self.worker = None
+        if not results:
+            self.log_text.append("El barrido no produjo resultados."); return
+        self.results = results
+        for r in results:
+            row = self.table.rowCount(); self.table.insertRow(row)
+            self.table.setItem(row, 0, QTableWidgetItem(r.name))
+            self.table.setItem(row, 1, QTableWidgetItem(str(len(r.labels))))
+            self.table.setItem(row, 2, QTableWidgetItem(f"{r.best_cost:.4e}"))
+            self.table.setItem(row, 3, QTableWidgetItem(f"{r.aic:.2f}" if np.isfinite(r.aic) else "N/A"))
+            self.table.setItem(row, 4, QTableWidgetItem(f"{r.bic:.2f}" if np.isfinite(r.bic) else "N/A"))
+            self.table.setItem(row, 5, QTableWidgetItem(f"{r.duration:.1f}"))
+        self.table.selectRow(0); self.btn_apply.setEnabled(True)
+        self.log_text.append(f"Barrido finalizado. Mejor estructura: {results[0].name}")
+
+    def get_selected_result(self):
+        row = self.table.currentRow()
+        return self.results[row] if 0 <= row < len(self.results) else None
+
+    def closeEvent(self, event):
+        self.stop_sweep()
+        super().closeEvent(event)
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+Barrido de estructuras armónicas (número de términos de beta, gamma y sigma) con ranking AIC/BIC.
+
+Las estructuras se ajustan por niveles (número total de armónicos). Todas las de un mismo nivel
+corren en paralelo, y cada una arranca (warm start) desde la mejor estructura anidada del nivel
+anterior, rellenando los armónicos nuevos con amplitud cero.
+"""
+import itertools
+from dataclasses import replace
+import numpy as np
+
+from .seir_model import SEIRModel, ENGINES, FREQUENCY_GUARDS
+from .fit_jobs import FitJob, run_jobs
+
+RATES = ('beta', 'gamma', 'sigma')
+
+def harmonic_configs(max_terms=2):
+    """Todas las combinaciones de 0..max_terms términos por tasa, ordenadas por número total de términos."""
+    configs = [dict(zip(RATES, combo)) for combo in itertools.product(range(max_terms + 1), repeat=3)]
+    return sorted(configs, key=lambda c: (sum(c.values()), c['beta'], c['gamma'], c['sigma']))
+
+def nested_parents(config):
+    """Estructuras con un armónico menos en exactamente una tasa."""
+    return [{**config, rate: config[rate] - 1} for rate in RATES if config[rate] > 0]
+
+def config_key(config):
+    return tuple(config[rate] for rate in RATES)
+
+def rank_results(results):
+    """Ordena resultados por AIC (luego BIC y costo); los que no tienen AIC van al final."""
+    def key(r):
+        aic = r.aic if np.isfinite(r.aic) else np.inf
+        bic = r.bic if np.isfinite(r.bic) else np.inf
+        return (aic, bic, r.best_cost)
+    return sorted([r for r in results if r is not None], key=key)
+
+def run_harmonic_sweep(t, I, N, acor_config, max_terms=2, loss_type="MSE", huber_delta=1.0,
+                       max_workers=None, tmax_seconds=None, plateau_K=None, callback=None, should_stop=None, engine="odeint",
+                       job_options=None):
+    """Ajusta todas las estructuras hasta `max_terms` armónicos por tasa y devuelve los resultados rankeados.
+
+    `callback(done, total, result)` informa del avance tras cada ajuste; `job_options` son campos
+    adicionales de cada `FitJob`.
+    """
+    configs = harmonic_configs(max_terms)
+    by_level = {}
+    for cfg in configs: by_level.setdefault(sum(cfg.values()), []).append(cfg)
+
+    fitted = {}
+    total, done = len(configs), 0
+    for level in sorted(by_level):
+        if should_stop and should_stop(): break
+        jobs = []
+        for cfg in by_level[level]:
+            warm = None
+            parents = [fitted[config_key(p)] for p in nested_parents(cfg) if config_key(p) in fitted]
+            parents = [p for p in parents if p.best_params is not None and np.isfinite(p.best_cost)]
+            if parents:
+                parent = min(parents, key=lambda r: r.best_cost)
+                warm = SEIRModel(cfg).expand_params(parent.best_params, parent.harmonic_config)
+            name = f"b{cfg['beta']}-g{cfg['gamma']}-s{cfg['sigma']}"
+            jobs.append(FitJob(name, t, I, N, replace(acor_config), cfg, loss_type, huber_delta,
+                               warm_start_params=warm, tmax_seconds=tmax_seconds, plateau_K=plateau_K, engine=engine,
+                               **(job_options or {})))
+
+        def level_callback(d, n, result, offset=done):
+            if callback: callback(offset + d, total, result)
+        for job, result in zip(jobs, run_jobs(jobs, max_workers, level_callback, should_stop)):
+            if result is not None: fitted[config_key(job.harmonic_config)] = result
+        done += len(jobs)
+
+    return rank_results(fitted.values())
+
+def main(argv=None):
+    """Barrido sin interfaz gráfica: python -m clases.model_selection datos.json --max-terms 2"""
+    import argparse, json
+    from .helpers import ACORConfig
+    from .datasets import load_dataset
+
+    parser = argparse.ArgumentParser(description="Barrido de estructuras armónicas SEIR con ranking AIC/BIC.")
+    parser.add_argument("dataset", help="Archivo .xlsx o .json con la serie (tiempo, infectados).")
+    parser.add_argument("--N", type=int, default=None, help="Población total (obligatoria para .xlsx).")
+    parser.add_argument("--max-terms", type=int, default=2)
+    parser.add_argument("--max-iter", type=int, default=ACORConfig.max_iter)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--loss", default="MSE", choices=["MSE", "MAE", "Huber"])
+    parser.add_argument("--engine", default="odeint", choices=ENGINES, help="Motor de integración del modelo.")
+    parser.add_argument("--frequency-guard", default="off", choices=FREQUENCY_GUARDS)
+    parser.add_argument("--out", default=None, help="Archivo JSON donde guardar la tabla de resultados.")
+    args = parser.parse_args(argv)
+
+    data = load_dataset(args.dataset, args.N)
+    config = ACORConfig(max_iter=args.max_iter)
+    results = run_harmonic_sweep(data["t"], data["I"], data["N"], config, args.max_terms, args.loss, max_workers=args.workers, engine=args.engine,
+                                 job_options={"frequency_guard": args.frequency_guard},
+                                 callback=lambda d, n, r: print(f"[{d}/{n}] {r.name}: costo {r.best_cost:.4e}", flush=True))
+    print(f"{'Estructura':<12} {'Params':>6} {'Costo':>12} {'AIC':>10} {'BIC':>10}")
+    for r in results:
+        print(f"{r.name:<12} {len(r.labels):>6} {r.best_cost:>12.4e} {r.aic:>10.2f} {r.bic:>10.2f}")
+    if args.out:
+        rows = [{"structure": r.harmonic_config, "cost": r.best_cost, "aic": r.aic, "bic": r.bic, "labels": r.labels,
+                 "best_params": None if r.best_params is None else r.best_params.tolist()} for r in results]
+        with open(args.out, "w") as f: json.dump(rows, f, indent=4)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,379 @@
+# -*- coding: utf-8 -*-
+"""
+Evaluación distribuida por TCP: un coordinador reparte los lotes de evaluaciones entre
+workers que pueden estar en otras máquinas.
+
+El coordinador corre en un proceso servidor de `multiprocessing.managers` y guarda la cola
+de trozos pendientes. Cada worker se conecta, pide trozos en préstamo (`lease`), los evalúa
+y devuelve los costos. Un worker que deja de dar señales de vida durante `worker_timeout`
+segundos se da por perdido y sus trozos vuelven a la cola, así que los workers pueden
+unirse y marcharse en cualquier momento.
+
+`RemotePool` sustituye a `EvaluationPool` en el optimizador y puede lanzar workers locales
+que hacen de nodos. En otra máquina (con este paquete instalado) se lanzan con:
+
+    python -m clases.remote HOST:PUERTO --authkey CLAVE --processes 8
+
+El protocolo usa pickle: quien conozca la clave puede ejecutar código en el coordinador y en
+los workers. Por omisión sólo se escucha en localhost con una clave aleatoria generada en cada
+corrida; para escuchar en otra interfaz hace falta una clave propia (no vacía ni la antigua
+clave por omisión) y una red de confianza.
+"""
+import ipaddress
+import itertools
+import os
+import pickle
+import secrets
+import socket
+import threading
+import time
+from collections import deque
+from multiprocessing import get_context
+from multiprocessing.managers import BaseManager
+
+from .evaluators import _evaluate_with, configure_worker, worker_environment
+
+DEFAULT_ADDRESS = "127.0.0.1:0"
+# Clave pública de versiones anteriores: nunca se acepta fuera de localhost
+INSECURE_AUTHKEYS = ("", "acor-seir")
+
+def generate_authkey():
+    """Clave aleatoria para una corrida (hexadecimal, para poder copiarla en la línea de órdenes)."""
+    return secrets.token_hex(16)
+
+def is_loopback(host):
+    if host == "localhost": return True
+    try: return ipaddress.ip_address(host).is_loopback
+    except ValueError: return False
+
+def parse_address(text):
+    """Convierte "host:puerto" en la tupla (host, puerto) que usan los managers."""
+    host, _, port = str(text).rpartition(":")
+    return (host or "127.0.0.1", int(port or 0))
+
+def format_address(address):
+    return f"{address[0]}:{address[1]}"
+
+class Coordinator:
+    """Cola de trozos con préstamos renovables; vive en el proceso servidor del manager.
+
+    Los métodos los llaman por proxy el `RemotePool` (abrir lotes y recoger resultados) y los
+    workers (pedir trozos, devolver resultados y dar señales de vida). Sólo hay un lote abierto
+    a la vez: los resultados que llegan tarde de un lote cerrado se descartan.
+    """
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._ids = itertools.count(1)
+        self._workers = {}   # id -> {"name", "seen"}
+        self._functions = {}  # versión -> función serializada
+        self._job = 0
+        self._queue = deque()
+        self._leases = {}    # trozo -> (worker, tarea)
+        self._done = set()
+        self._results = []
+        self.worker_timeout = 30.0
+
+    def configure(self, worker_timeout):
+        self.worker_timeout = float(worker_timeout)
+
+    def status(self):
+        with self._cond:
+            return {"workers": len(self._workers), "queued": len(self._queue), "leased": len(self._leases)}
+
+    # --- Lado del pool ---
+
+    def set_function(self, data):
+        """Publica la función de costo serializada y devuelve su versión."""
+        with self._cond:
+            version = next(self._ids)
+            self._functions = {version: data}
+            return version
+
+    def open_job(self, version, chunks):
+        with self._cond:
+            self._job += 1
+            self._queue = deque((self._job, version, k, chunk) for k, chunk in enumerate(chunks))
+            self._leases.clear(); self._done.clear(); self._results = []
+            self._cond.notify_all()
+            return self._job
+
+    def requeue(self, job):
+        """Devuelve a la cola todos los trozos prestados del lote (p. ej. a un worker colgado)."""
+        with self._cond:
+            if job != self._job: return
+            for k in sorted(self._leases, reverse=True): self._queue.appendleft(self._leases[k][1])
+            self._leases.clear()
+            self._cond.notify_all()
+
+    def close_job(self, job):
+        with self._cond:
+            if job != self._job: return
+            self._queue.clear(); self._leases.clear()
+
+    def collect(self, job, wait):
+        """Espera hasta `wait` segundos por resultados del lote. Devuelve (resultados, workers vivos)."""
+        deadline = time.monotonic() + wait
+        with self._cond:
+            while True:
+                self._expire()
+                remaining = deadline - time.monotonic()
+                if self._results or job != self._job or remaining <= 0: break
+                self._cond.wait(min(remaining, 1.0))
+            results, self._results = self._results, []
+            return results, len(self._workers)
+
+    # --- Lado del worker ---
+
+    def register(self, name):
+        with self._cond:
+            worker = next(self._ids)
+            self._workers[worker] = {"name": name, "seen": time.monotonic()}
+            return worker
+
+    def unregister(self, worker):
+        with self._cond:
+            self._workers.pop(worker, None)
+            self._release(worker)
+
+    def heartbeat(self, worker, name=None):
+        with self._cond: self._touch(worker, name)
+
+    def function(self, version):
+        with self._cond: return self._functions.get(version)
+
+    def lease(self, worker, wait):
+        """Presta el siguiente trozo al worker; espera hasta `wait` segundos si la cola está vacía."""
+        deadline = time.monotonic() + wait
+        with self._cond:
+            self._touch(worker)
+            while True:
+                self._expire()
+                if self._queue:
+                    task = self._queue.popleft()
+                    self._leases[task[2]] = (worker, task)
+                    return task
+                remaining = deadline - time.monotonic()
+                if remaining <= 0: return None
+                self._cond.wait(min(remaining, 1.0))
+
+    def complete(self, worker, job, k, results):
+        with self._cond:
+            self._touch(worker)
+            if job != self._job or k in self._done: return
+            self._done.add(k)
+            self._leases.pop(k, None)
+            # Un trozo reenviado que el worker original termina al fin ya no hace falta
+            self._queue = deque(task for task in self._queue if task[2] != k)
+            self._results.extend(results)
+            self._cond.notify_all()
+
+    # --- Internos (con el candado tomado) ---
+
+    def _touch(self, worker, name=None):
+        # Un worker dado por perdido que vuelve a aparecer se readmite
+        entry = self._workers.setdefault(worker, {"name": name or str(worker), "seen": 0.0})
+        entry["seen"] = time.monotonic()
+
+    def _release(self, worker):
+        lost = [k for k, (owner, _) in self._leases.items() if owner == worker]
+        for k in sorted(lost, reverse=True): self._queue.appendleft(self._leases.pop(k)[1])
+        if lost: self._cond.notify_all()
+
+    def _expire(self):
+        now = time.monotonic()
+        for worker in [w for w, entry in self._workers.items() if now - entry["seen"] > self.worker_timeout]:
+            del self._workers[worker]
+            self._release(worker)
+
+_coordinator = None
+
+def _get_coordinator():
+    global _coordinator
+    if _coordinator is None: _coordinator = Coordinator()
+    return _coordinator
+
+class CoordinatorManager(BaseManager):
+    """Manager que publica el `Coordinator` por TCP (servidor en el pool, cliente en los workers)."""
+
+CoordinatorManager.register("coordinator", callable=_get_coordinator)
+
+def _connect(address, authkey, retry=10.0):
+    """Conecta con el coordinador, reintentando durante `retry` segundos si aún no escucha."""
+    deadline = time.monotonic() + retry
+    while True:
+        manager = CoordinatorManager(address=tuple(address), authkey=authkey)
+        try:
+            manager.connect()
+            return manager
+        except (ConnectionError, OSError):
+            if time.monotonic() > deadline: raise
+            time.sleep(0.2)
+
+def run_worker(address, authkey, name=None, threads=1, heartbeat=5.0, retry=10.0):
+    """Bucle de un worker: pide trozos al coordinador, los evalúa y devuelve los costos.
+
+    Termina cuando el coordinador desaparece. Un hilo aparte da señales de vida cada
+    `heartbeat` segundos para que una evaluación larga no pase por un worker perdido.
+    """
+    if isinstance(address, str): address = parse_address(address)
+    if isinstance(authkey, str): authkey = authkey.encode()
+    configure_worker(threads)
+    name = name or f"{socket.gethostname()}:{os.getpid()}"
+    try:
+        coordinator = _connect(address, authkey, retry).coordinator()
+        worker = coordinator.register(name)
+    except (ConnectionError, OSError, EOFError):
+        return
+    stop = threading.Event()
+
+    def beat():
+        while not stop.wait(heartbeat):
+            try: coordinator.heartbeat(worker, name)
+            except (ConnectionError, OSError, EOFError): return
+
+    threading.Thread(target=beat, daemon=True).start()
+    cache = {}
+    try:
+        while True:
+            task = coordinator.lease(worker, 1.0)
+            if task is None: continue
+            job, version, k, chunk = task
+            if version not in cache:
+                cache = {version: pickle.loads(coordinator.function(version))}
+            coordinator.complete(worker, job, k, _evaluate_with(cache[version], chunk))
+    except (ConnectionError, OSError, EOFError):
+        pass
+    finally:
+        stop.set()
+        try: coordinator.unregister(worker)
+        except (ConnectionError, OSError, EOFError): pass
+
+class RemotePool:
+    """Pool de evaluación distribuido: sustituto de `EvaluationPool` que reparte por TCP.
+
+    Al crearse arranca el coordinador en `address` ("host:puerto"; puerto 0 = libre, ver
+    `self.address`) y `local_workers` workers locales. Se le pueden unir workers de otras
+    máquinas con `run_worker` y la misma `authkey` (`self.authkey`). Sin clave se genera una
+    aleatoria; una dirección que no es de localhost exige una clave propia (`ValueError` si no). Como en `EvaluationPool`, si durante
+    `timeout * chunksize + grace` segundos no llega ningún resultado los trozos prestados se
+    reenvían una vez y después reciben costo infinito. Si no queda ningún worker conectado
+    durante `no_worker_timeout` segundos, `map` lanza `RuntimeError`.
+    """
+    def __init__(self, address=DEFAULT_ADDRESS, authkey=None, local_workers=0, timeout=None, chunksize=1,
+                 grace=5.0, worker_timeout=30.0, worker_threads=1, no_worker_timeout=120.0):
+        if isinstance(address, str): address = parse_address(address)
+        if isinstance(authkey, bytes): authkey = authkey.decode()
+        if not is_loopback(address[0]) and (authkey or "") in INSECURE_AUTHKEYS:
+            raise ValueError(f"Para escuchar en {address[0]} (fuera de localhost) hace falta una clave de acceso propia.")
+        self.authkey = (authkey or generate_authkey()).encode()
+        self.timeout = timeout
+        self.chunksize = max(1, int(chunksize))
+        self.grace = grace
+        self.no_worker_timeout = no_worker_timeout
+        self.timeouts = 0
+        self.restarts = 0
+        self._func = None
+        self._version = None
+        self._manager = CoordinatorManager(address=address, authkey=self.authkey, ctx=get_context("spawn"))
+        self._manager.start()
+        self.address = self._manager.address
+        self._coordinator = self._manager.coordinator()
+        self._coordinator.configure(worker_timeout)
+        self._processes = []
+        self.add_local_workers(local_workers, worker_threads, heartbeat=min(5.0, worker_timeout / 3))
+
+    @property
+    def connect_address(self):
+        """Dirección a la que se conectan los workers (localhost si el servidor escucha en todas)."""
+        host, port = self.address
+        return ("127.0.0.1" if host in ("", "0.0.0.0") else host, port)
+
+    def add_local_workers(self, n, threads=1, heartbeat=5.0):
+        ctx = get_context("spawn")
+        with worker_environment(threads):
+            for _ in range(int(n or 0)):
+                process = ctx.Process(target=run_worker, args=(self.connect_address, self.authkey),
+                                      kwargs={"threads": threads, "heartbeat": heartbeat}, daemon=True)
+                process.start()
+                self._processes.append(process)
+
+    def status(self):
+        return self._coordinator.status()
+
+    def map(self, func, items):
+        items = list(items)
+        results = [float("inf")] * len(items)
+        if not items: return results
+        if func is not self._func:
+            self._version = self._coordinator.set_function(pickle.dumps(func))
+            self._func = func
+        tasks = [(i, x, self.timeout) for i, x in enumerate(items)]
+        chunks = [tasks[k:k + self.chunksize] for k in range(0, len(tasks), self.chunksize)]
+        job = self._coordinator.open_job(self._version, chunks)
+        pending = set(range(len(items)))
+        backstop = None if self.timeout is None else self.timeout * self.chunksize + self.grace
+        last_progress = alone_since = time.monotonic()
+        resent = False
+        try:
+            while pending:
+                received, live = self._coordinator.collect(job, 1.0)
+                now = time.monotonic()
+                for i, cost, timed_out in received:
+                    if i not in pending: continue
+                    results[i] = cost
+                    self.timeouts += timed_out
+                    pending.discard(i)
+                if received: last_progress = now
+                if live == 0:
+                    # Sin workers no corre el reloj de las evaluaciones: se espera a que alguno se una
+                    if now - alone_since > self.no_worker_timeout:
+                        raise RuntimeError(f"No hay workers conectados al coordinador en {format_address(self.address)}.")
+                    last_progress = now
+                    continue
+                alone_since = now
+                if backstop is not None and now - last_progress > backstop:
+                    if resent: break
+                    self._coordinator.requeue(job)
+                    self.restarts += 1
+                    resent, last_progress = True, now
+        finally:
+            self._coordinator.close_job(job)
+        self.timeouts += len(pending)
+        return results
+
+    def close(self):
+        for process in self._processes: process.terminate()
+        for process in self._processes: process.join()
+        self._processes = []
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+
+    def join(self): pass
+    def terminate(self): self.close()
+
+    def __enter__(self): return self
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Worker de evaluación remota para el optimizador SEIR-ACOR.")
+    parser.add_argument("address", help="Dirección del coordinador, HOST:PUERTO.")
+    parser.add_argument("--authkey", required=True, help="Clave que muestra el coordinador al arrancar.")
+    parser.add_argument("--processes", type=int, default=1, help="Workers a lanzar en esta máquina.")
+    parser.add_argument("--threads", type=int, default=1, help="Hilos de BLAS/OpenMP por worker.")
+    args = parser.parse_args(argv)
+    if args.processes <= 1:
+        run_worker(args.address, args.authkey, threads=args.threads)
+        return
+    ctx = get_context("spawn")
+    with worker_environment(args.threads):
+        processes = [ctx.Process(target=run_worker, args=(args.address, args.authkey), kwargs={"threads": args.threads})
+                     for _ in range(args.processes)]
+        for process in processes: process.start()
+    for process in processes: process.join()
+
+if __name__ == "__main__":
+    main()
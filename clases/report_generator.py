@@ -4,6 +4,7 @@ Contiene la l\u00f3gica para generar reportes en PDF de los resultados de una ej
 """
 import os
 from datetime import datetime
+import numpy as np
 from PyQt5.QtWidgets import QFileDialog, QMessageBox
 from PyQt5.QtGui import QPainter, QFont, QPen
 from PyQt5.QtCore import QRectF, Qt
@@ -83,6 +84,17 @@ class ReportGenerator:
             "Hormigas / Archivo": f"{self.config.n_ants} / {self.config.archive_size}",
             "Colonias / Migraci\u00f3n": f"{self.config.colonies_count} / {self.config.migration_interval} iters"
         }
+        bands = getattr(self.result, "predictive", None)
+        if bands is not None:
+            # Las bandas ya est\u00e1n dibujadas en los gr\u00e1ficos principal y de Rt
+            q = bands["quantiles"]
+            summary_data["Bandas Posteriores"] = f"{q[0]:.1%}\u2013{q[-1]:.1%}, {bands['n']} muestras, hasta t = {bands['t'][-1]:g}"
+        boot = getattr(self.result, "bootstrap", None)
+        if boot is not None:
+            summary_data["Bootstrap"] = f"{len(boot.samples)} reajustes ({boot.kind}), intervalos al {boot.level:.1%}"
+        smc = getattr(self.result, "evidence", None)
+        if smc is not None:
+            summary_data["Evidencia (SMC)"] = f"log Z = {smc.log_evidence:.2f} ({len(smc.samples)} part\u00edculas, {smc.n_stages} etapas)"
         self._draw_table(summary_data, col1_width=200)
 
     def _draw_plots_section(self):
@@ -116,6 +128,10 @@ class ReportGenerator:
         self.y_pos += 50
 
         params_data = {label: f"{val:.6f}" for label, val in zip(self.model.labels, self.result.best_params)}
+        laplace = getattr(self.result, "uncertainty", None)
+        if laplace is not None:
+            # Error est\u00e1ndar de la aproximaci\u00f3n de Laplace junto a cada valor
+            params_data = {label: f"{value:.6f} \u00b1 {se:.2e}" for label, value, se, _, _ in laplace.rows()}
         self._draw_table(params_data, col1_width=100, columns=2)
 
     def _draw_table(self, data, col1_width, columns=1):
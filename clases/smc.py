@@ -0,0 +1,272 @@
+# -*- coding: utf-8 -*-
+"""
+Muestreo de la posterior por Monte Carlo secuencial (SMC) con templado adaptativo.
+
+Una población de partículas pasa de una distribución de referencia q0 a la posterior por una
+sucesión de distribuciones q0^(1-β) · (prior · L)^β, con β de 0 a 1. En cada etapa el
+siguiente β se elige por bisección para que el tamaño efectivo de muestra (ESS) de los pesos
+incrementales baje a `ess_target` veces el número de partículas; después se remuestrea y las
+partículas se mueven con pasos de Metropolis de evolución diferencial (diferencias entre
+partículas de la población). Cada paso evalúa todas las partículas en un solo lote (`fitness_batch` o el pool de
+`mcmc.make_mcmc_pool`), así que el trabajo de una etapa se reparte entero, en lugar de los
+medios pasos secuenciales de `emcee`, y la población puede ocupar varios modos a la vez.
+
+La suma de los log-pesos incrementales estima la evidencia log Z = log ∫ prior · L, que sirve
+para comparar estructuras armónicas como AIC/BIC (-2 log Z ≈ BIC con muchos datos) sin la
+aproximación gaussiana. El prior es uniforme en los límites del modelo (con la guardia de
+frecuencias aplicada) y la verosimilitud es la de AIC/BIC, con errores normales de varianza
+perfilada: log L = -n/2 (log 2π + log MSE + 1). No es el log-posterior -costo de `emcee`.
+
+Las simetrías de los términos armónicos (signos de b y w, orden de los términos de una tasa)
+repiten cada modo 4^k · Π(n_tasa!) veces en la caja. El archivo de ACOR está en forma canónica y
+sólo cubre una de esas copias, así que el prior se restringe a la región canónica (la misma
+forma que `SEIRModel.canonicalize`) con densidad multiplicada por el número de copias: como la
+verosimilitud es simétrica, la evidencia es la misma que con el prior en toda la caja.
+
+La referencia puede ser el propio prior (uniforme en la región canónica) o, desde el archivo
+final de ACOR, una normal ajustada a sus puntos plausibles (uniforme en las fases). Las
+partículas de la referencia que caen fuera de la región tienen peso nulo; mientras q0 esté
+normalizada y cubra la región con verosimilitud apreciable, el estimador de Z no tiene sesgo, y
+una q0 cercana a la posterior necesita muchas menos etapas.
+"""
+import time
+from dataclasses import dataclass, field
+import numpy as np
+from scipy.linalg import solve_triangular
+from scipy.special import logsumexp
+
+from .acor_optimizer import wrap_periodic
+from .mcmc import BatchLogPosterior
+
+@dataclass
+class SMCResult:
+    """Partículas finales (pesos iguales), evidencia y la historia de las etapas."""
+    labels: list
+    samples: np.ndarray
+    log_likelihood: np.ndarray
+    log_evidence: float
+    betas: list = field(default_factory=list)
+    ess: list = field(default_factory=list)           # fracción de ESS tras reponderar en cada etapa
+    acceptance: list = field(default_factory=list)    # aceptación media de los movimientos de cada etapa
+    n_evaluations: int = 0
+    reference: str = "prior"
+    completed: bool = True
+    duration: float = 0.0
+
+    @property
+    def n_stages(self):
+        return len(self.betas) - 1
+
+def _is_canonical(X, canonicalize):
+    """Filas de X que ya están en forma canónica (todas, si no hay `canonicalize`)."""
+    if canonicalize is None: return np.ones(len(X), dtype=bool)
+    return np.all(np.abs(canonicalize(X) - X) <= 1e-9, axis=1)
+
+class Reference:
+    """Distribución inicial q0: normal multivariada en las coordenadas `gaussian`, uniforme en los límites en el resto.
+
+    Sin media ni covarianza es el prior uniforme; con `canonicalize` (que reúne `n_images`
+    soluciones equivalentes en una) es el prior uniforme en la región canónica.
+    """
+    def __init__(self, low, high, mean=None, cov=None, gaussian=None, canonicalize=None, n_images=1):
+        self.low, self.high = np.asarray(low, dtype=float), np.asarray(high, dtype=float)
+        # Plegar la muestra sólo conserva la forma de la densidad si ésta es invariante: sólo para el prior
+        self.canonicalize = canonicalize if mean is None else None
+        self.n_images = n_images if self.canonicalize is not None else 1
+        self.gaussian = np.zeros(len(self.low), dtype=bool) if gaussian is None or mean is None else np.asarray(gaussian, dtype=bool)
+        uniform = ~self.gaussian
+        self._log_uniform = -float(np.sum(np.log(self.high[uniform] - self.low[uniform]))) + np.log(self.n_images)
+        if np.any(self.gaussian):
+            self.mean = np.asarray(mean, dtype=float)
+            self._chol = np.linalg.cholesky(np.asarray(cov, dtype=float))
+            self._log_norm = -0.5 * len(self.mean) * np.log(2 * np.pi) - float(np.sum(np.log(np.diag(self._chol))))
+
+    @property
+    def is_prior(self):
+        return not np.any(self.gaussian)
+
+    def sample(self, n, rng):
+        X = self.low + (self.high - self.low) * rng.random((n, len(self.low)))
+        if np.any(self.gaussian):
+            X[:, self.gaussian] = self.mean + rng.standard_normal((n, len(self.mean))) @ self._chol.T
+        return X if self.canonicalize is None else self.canonicalize(X)
+
+    def log_pdf(self, X):
+        uniform = ~self.gaussian
+        inside = np.all((self.low[uniform] <= X[:, uniform]) & (X[:, uniform] <= self.high[uniform]), axis=1)
+        inside &= _is_canonical(X, self.canonicalize)
+        logq = np.where(inside, self._log_uniform, -np.inf)
+        if np.any(self.gaussian):
+            z = solve_triangular(self._chol, (X[:, self.gaussian] - self.mean).T, lower=True)
+            logq = logq + self._log_norm - 0.5 * np.sum(z ** 2, axis=0)
+        return logq
+
+def archive_reference(archive, costs, best_params, low, high, n_data, periodic=None, inflate=2.0):
+    """Referencia normal ajustada a los puntos plausibles del archivo de ACOR (costos MSE), uniforme en las fases.
+
+    Se toman los puntos cuya log-verosimilitud está a menos de 20 · max(1, n_dim / 2) de la
+    mejor (la misma franja que `mcmc.initial_walkers`) y su dispersión se ensancha `inflate`
+    veces para cubrir las colas de la posterior. Con menos puntos que dimensiones devuelve el prior.
+    """
+    low, high = np.asarray(low, dtype=float), np.asarray(high, dtype=float)
+    gaussian = ~np.asarray(periodic, dtype=bool) if periodic is not None else np.ones(len(low), dtype=bool)
+    points, costs = np.asarray(archive, dtype=float), np.asarray(costs, dtype=float)
+    valid = np.isfinite(costs) & (costs > 0) & np.all((low <= points) & (points <= high), axis=1)
+    points, costs = points[valid], costs[valid]
+    if len(points):
+        log_l = -0.5 * n_data * np.log(costs)
+        points = points[log_l >= log_l.max() - 20 * max(1.0, len(low) / 2)]
+    if best_params is not None: points = np.vstack([points, np.asarray(best_params, dtype=float)[None]])
+    if len(points) <= gaussian.sum(): return Reference(low, high)
+    span = (high - low)[gaussian]
+    cov = inflate ** 2 * np.cov(points[:, gaussian].T).reshape(len(span), len(span)) + np.diag((1e-3 * span) ** 2)
+    return Reference(low, high, points[:, gaussian].mean(axis=0), cov, gaussian)
+
+def _next_increment(r, remaining, target):
+    """Mayor Δβ <= `remaining` cuyo ESS de pesos exp(Δβ · r) no baja de `target` (bisección)."""
+    def ess(delta):
+        logw = delta * r
+        logw = logw - logw.max()
+        w = np.exp(logw)
+        return w.sum() ** 2 / np.sum(w ** 2)
+    if ess(remaining) >= target: return remaining
+    lo, hi = 0.0, remaining
+    for _ in range(60):
+        mid = 0.5 * (lo + hi)
+        if ess(mid) >= target: lo = mid
+        else: hi = mid
+    return max(lo, 1e-12 * remaining)
+
+def _systematic_resample(w, rng):
+    positions = (rng.random() + np.arange(len(w))) / len(w)
+    return np.minimum(np.searchsorted(np.cumsum(w), positions), len(w) - 1)
+
+def _differential_steps(X, scale, span, rng, jump_fraction=0.1):
+    """Saltos de evolución diferencial: `scale` por la diferencia entre dos partículas al azar, más un ruido mínimo.
+
+    La diferencia sigue la forma de la población dentro de cada modo; con probabilidad
+    `jump_fraction` la escala es 1, lo que permite saltar entre modos separados. Las dos
+    partículas son distintas de la que se mueve, así que el salto es simétrico dado el resto de
+    la población y la aceptación es la de Metropolis.
+    """
+    n = len(X)
+    first = rng.integers(1, n, size=n)
+    second = rng.integers(1, n - 1, size=n)
+    second += second >= first
+    a, b = (np.arange(n) + first) % n, (np.arange(n) + second) % n
+    gamma = np.where(rng.random(n) < jump_fraction, 1.0, scale)[:, None]
+    return gamma * (X[a] - X[b]) + 1e-6 * span * rng.standard_normal(X.shape)
+
+def run_smc(log_likelihood, low, high, n_particles=1000, reference=None, ess_target=0.5, max_moves=20, periodic=None,
+            max_stages=1000, rng=None, callback=None, should_stop=None, canonicalize=None, n_images=1):
+    """SMC con templado adaptativo del prior uniforme en [low, high] por la verosimilitud. Devuelve un `SMCResult`.
+
+    `log_likelihood(X)` recibe en un solo lote las filas dentro de los límites y devuelve su
+    log L (-inf si la evaluación falla). `reference` es la q0 inicial (`Reference`; por
+    defecto el prior). En cada etapa se dan pasos de Metropolis hasta que casi todas las
+    partículas se hayan movido (1 - (1 - aceptación)^pasos >= 0.99), como mucho `max_moves`.
+    Las coordenadas `periodic` se envuelven en sus límites. Con `canonicalize` (que devuelve la
+    forma canónica dentro de los límites y reúne `n_images` soluciones equivalentes) el prior es
+    uniforme en la región canónica, con densidad `n_images` / volumen, y los movimientos que
+    salen de ella se rechazan. `callback(etapa, β, ess, aceptación, log Z)` informa al final de
+    cada etapa y `should_stop()` la corta (el resultado queda con `completed=False` y su
+    evidencia no vale).
+    """
+    start = time.perf_counter()
+    rng = np.random.default_rng() if rng is None else rng
+    low, high = np.asarray(low, dtype=float), np.asarray(high, dtype=float)
+    periodic = np.zeros(len(low), dtype=bool) if periodic is None else np.asarray(periodic, dtype=bool)
+    reference = Reference(low, high, canonicalize=canonicalize, n_images=n_images) if reference is None else reference
+    log_prior = -float(np.sum(np.log(high - low))) + np.log(n_images)
+    n_evaluations = 0
+
+    def evaluate(X):
+        """(log L, r = log prior + log L - log q0) de cada fila; se evalúa sólo lo que cae en el soporte del prior."""
+        nonlocal n_evaluations
+        inside = np.all((low <= X) & (X <= high), axis=1)
+        inside[inside] = _is_canonical(X[inside], canonicalize)
+        log_l = np.full(len(X), -np.inf)
+        if np.any(inside):
+            log_l[inside] = log_likelihood(X[inside])
+            n_evaluations += int(inside.sum())
+        r = np.full(len(X), -np.inf)
+        ok = np.isfinite(log_l)
+        r[ok] = log_prior + log_l[ok] - reference.log_pdf(X[ok])
+        return log_l, r
+
+    X = reference.sample(n_particles, rng)
+    log_l, r = evaluate(X)
+    beta, log_z, scale = 0.0, 0.0, 2.38 / np.sqrt(2 * len(low))
+    betas, ess_history, acceptance = [0.0], [], []
+    completed = True
+    while beta < 1.0 and len(betas) <= max_stages:
+        if should_stop is not None and should_stop():
+            completed = False; break
+        finite = np.isfinite(r)
+        if not np.any(finite): raise ValueError("Ninguna partícula tiene verosimilitud finita: revise los límites o el modelo.")
+        # Las partículas sin verosimilitud tienen peso nulo: el objetivo de ESS se mide sobre las que quedan
+        delta = _next_increment(r[finite], 1.0 - beta, ess_target * finite.sum())
+        logw = np.where(finite, delta * np.where(finite, r, 0.0), -np.inf)
+        log_z += logsumexp(logw) - np.log(n_particles)
+        w = np.exp(logw - logw.max()); w /= w.sum()
+        ess_history.append(float(1.0 / np.sum(w ** 2) / n_particles))
+        beta = 1.0 if delta >= 1.0 - beta else beta + delta
+        betas.append(beta)
+        index = _systematic_resample(w, rng)
+        X, log_l, r = X[index], log_l[index], r[index]
+
+        log_target = reference.log_pdf(X) + beta * r
+        moves, accepted, needed = 0, 0.0, max_moves
+        while moves < needed:
+            proposal = X + _differential_steps(X, scale, high - low, rng)
+            proposal[:, periodic] = low[periodic] + (proposal[:, periodic] - low[periodic]) % (high - low)[periodic]
+            log_l_new, r_new = evaluate(proposal)
+            log_target_new = np.full(n_particles, -np.inf)
+            ok = np.isfinite(r_new)
+            log_target_new[ok] = reference.log_pdf(proposal[ok]) + beta * r_new[ok]
+            accept = np.log(rng.random(n_particles)) < log_target_new - log_target
+            X[accept], log_l[accept], r[accept], log_target[accept] = proposal[accept], log_l_new[accept], r_new[accept], log_target_new[accept]
+            moves += 1
+            accepted += accept.mean()
+            rate = accepted / moves
+            needed = max_moves if rate <= 0 else min(max_moves, int(np.ceil(np.log(0.01) / np.log1p(-min(rate, 0.99)))))
+        rate = accepted / moves
+        acceptance.append(float(rate))
+        # Ajuste de la escala hacia una aceptación de ~0.23 para la etapa siguiente
+        scale = float(np.clip(scale * np.exp(2 * (rate - 0.234)), 1e-3, 10.0))
+        if callback is not None: callback(len(betas) - 1, beta, ess_history[-1], rate, log_z)
+
+    return SMCResult([], X, log_l, float(log_z), betas, ess_history, acceptance, n_evaluations,
+                     "prior" if reference.is_prior else "archivo", completed and beta >= 1.0, time.perf_counter() - start)
+
+def smc_posterior(model, n_particles=1000, pool=None, archive=None, costs=None, best_params=None, ess_target=0.5,
+                  max_moves=20, rng=None, callback=None, should_stop=None):
+    """Ejecuta `run_smc` sobre `model` con la verosimilitud de AIC/BIC. Requiere la pérdida MSE.
+
+    Con `archive`/`costs` (el archivo final de ACOR) la referencia se ajusta a sus puntos y a
+    `best_params`; sin ellos parte del prior. En ambos casos el prior es el de la región canónica
+    de `SEIRModel.canonicalize`. `pool` es el de `mcmc.make_mcmc_pool` (None = `fitness_batch`).
+    """
+    if model.loss_type != "MSE": raise ValueError("La evidencia se calcula con la verosimilitud gaussiana: requiere la pérdida MSE.")
+    n = len(model.I_data)
+    bounds = model.guarded_bounds()
+    low, high = bounds[:, 0], bounds[:, 1]
+    posterior = BatchLogPosterior(model, pool)
+
+    def log_likelihood(X):
+        mse = -posterior(X)
+        with np.errstate(divide="ignore"):
+            return -0.5 * n * (np.log(2 * np.pi) + np.log(np.maximum(mse, 1e-300)) + 1)
+
+    periodic = model.periodic_mask
+    def canonicalize(X):
+        return wrap_periodic(model.canonicalize(X), low, high, periodic)
+
+    reference = None
+    if archive is not None and costs is not None:
+        reference = archive_reference(archive, costs, best_params, low, high, n, periodic)
+    result = run_smc(log_likelihood, low, high, n_particles, reference, ess_target, max_moves, periodic,
+                     rng=rng, callback=callback, should_stop=should_stop, canonicalize=canonicalize,
+                     n_images=model.symmetry_count())
+    result.labels = list(model.labels)
+    return result
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""
+Incertidumbre rápida por aproximación de Laplace alrededor del mejor ajuste.
+
+Con pérdida MSE y ruido gaussiano de varianza sigma^2 = n * MSE / (n - p), la log-verosimilitud
+cerca del óptimo es cuadrática y la covarianza de los parámetros es la inversa de la matriz de
+información. Se obtiene de dos formas, ambas con todas las evaluaciones en un solo lote:
+
+- "gauss-newton" (por defecto): sensibilidades dI/dθ por diferencias centrales (2p
+  simulaciones con `SEIRModel.simulate_ensemble`) e información J^T J / sigma^2. Siempre es
+  semidefinida positiva y no necesita derivadas segundas.
+- "hessian": Hessiano completo del MSE por diferencias centrales (1 + 2p + 2p(p-1) puntos)
+  e información n H / (2 sigma^2).
+
+Con odeint cada punto perturbado se integra por separado (en un pool de `evaluators` si se
+da) y con tolerancias `PRECISE_RTOL`/`PRECISE_ATOL` mucho más finas que las del ajuste: con
+las de por defecto el error del integrador es del orden de la perturbación y las diferencias
+centrales serían ruido.
+
+Los parámetros sin efecto sobre la curva (p. ej. la fase de un armónico de amplitud nula, o k,
+que sólo entra redondeado en E0) no tienen información: se marcan como no identificados y su
+error estándar es infinito.
+"""
+import time
+from dataclasses import dataclass, field
+import numpy as np
+from scipy.stats import norm
+from PyQt5.QtCore import QThread, pyqtSignal
+from .evaluators import make_pool
+
+LAPLACE_METHODS = ("gauss-newton", "hessian")
+PRECISE_RTOL, PRECISE_ATOL = 1e-10, 1e-8
+
+@dataclass
+class LaplaceResult:
+    """Errores estándar, correlaciones e intervalos aproximados de los parámetros."""
+    labels: list
+    params: np.ndarray
+    std_errors: np.ndarray
+    covariance: np.ndarray
+    correlation: np.ndarray
+    lower: np.ndarray
+    upper: np.ndarray
+    level: float = 0.95
+    method: str = "gauss-newton"
+    n_evaluations: int = 0
+    condition_number: float = float("inf")
+    unidentified: list = field(default_factory=list)
+    duration: float = 0.0
+
+    def rows(self):
+        """(etiqueta, valor, error estándar, límite inferior, límite superior) de cada parámetro."""
+        return list(zip(self.labels, self.params, self.std_errors, self.lower, self.upper))
+
+    def strongest_correlations(self, count=3):
+        """Los `count` pares de parámetros identificados con mayor |correlación|: [(a, b, r), ...]."""
+        i, j = np.triu_indices(len(self.labels), 1)
+        r = self.correlation[i, j]
+        order = [k for k in np.argsort(-np.abs(np.nan_to_num(r))) if np.isfinite(r[k])][:count]
+        return [(self.labels[i[k]], self.labels[j[k]], float(r[k])) for k in order]
+
+def finite_difference_steps(model, rel_step):
+    """Paso de cada parámetro: `rel_step` veces el ancho de sus límites."""
+    span = model.HIGH - model.LOW
+    return rel_step * np.where(span > 0, span, 1.0)
+
+def precise_curves(model, X, pool=None):
+    """Curvas I (n, n_datos) de cada fila de X, integradas con las tolerancias finas. NaN si fallan."""
+    return model.simulate_ensemble(X, model.t_data, pool=pool, rtol=PRECISE_RTOL, atol=PRECISE_ATOL)["I"]
+
+def precise_costs(model, X, pool=None):
+    """Como `fitness_batch` (infinito fuera de la guardia de frecuencias), pero con `precise_curves`."""
+    X = np.atleast_2d(X)
+    with np.errstate(all="ignore"):
+        losses = model._losses(model.I_data, precise_curves(model, X, pool))
+    ok = np.isfinite(losses)
+    if model.frequency_guard != "off": ok &= model.frequencies_resolvable(X, model.t_data)
+    return np.where(ok, losses, np.inf)
+
+def sensitivities(model, params, steps, pool=None):
+    """Jacobiano dI/dθ (n_datos, p) en los tiempos de los datos, con las 2p simulaciones en un lote."""
+    E = np.diag(steps)
+    I = precise_curves(model, np.vstack([params + E, params - E]), pool)
+    p = len(params)
+    return (I[:p] - I[p:]).T / (2 * steps)
+
+def hessian(evaluate, params, steps):
+    """Hessiano por diferencias centrales. `evaluate(X)` devuelve el costo de cada fila de X; se llama una vez."""
+    p = len(params)
+    E = np.diag(steps)
+    i, j = np.triu_indices(p, 1)
+    points = np.vstack([params[None], params + E, params - E,
+                        params + E[i] + E[j], params - E[i] - E[j], params + E[i] - E[j], params - E[i] + E[j]])
+    f = np.asarray(evaluate(points), dtype=float)
+    f0, plus, minus = f[0], f[1:1 + p], f[1 + p:1 + 2 * p]
+    pp, mm, pm, mp = f[1 + 2 * p:].reshape(4, -1)
+    H = np.diag((plus - 2 * f0 + minus) / steps ** 2)
+    H[i, j] = H[j, i] = (pp + mm - pm - mp) / (4 * steps[i] * steps[j])
+    return H, len(points)
+
+def _invert(info, tol=1e-10):
+    """Pseudo-inversa de la información en su parte positiva. Devuelve (covarianza, no identificados, condición)."""
+    info = 0.5 * (info + info.T)
+    w, V = np.linalg.eigh(info)
+    keep = w > tol * max(w.max(), 0.0)
+    cov = (V[:, keep] / w[keep]) @ V[:, keep].T
+    # Un parámetro está sin identificar si vive sobre todo en direcciones sin información (o de curvatura negativa)
+    unidentified = np.flatnonzero(np.sum(V[:, ~keep] ** 2, axis=1) > 0.5)
+    condition = float(w[keep].max() / w[keep].min()) if np.any(keep) else float("inf")
+    return cov, unidentified, condition
+
+def laplace_uncertainty(model, params, method="gauss-newton", level=0.95, pool=None, rel_step=None):
+    """Aproximación de Laplace en `params` (el mejor ajuste). Devuelve un `LaplaceResult`.
+
+    Requiere la pérdida MSE (como AIC/BIC y el MCMC). Con odeint las simulaciones de ambos
+    métodos se reparten en `pool` si se da (una por punto, con las tolerancias finas).
+    `rel_step` es el paso relativo al ancho de los límites (por defecto 1e-5 para las
+    sensibilidades y 1e-4 para el Hessiano).
+    """
+    if method not in LAPLACE_METHODS: raise ValueError(f"Método desconocido: {method!r}")
+    if model.loss_type != "MSE": raise ValueError("La aproximación de Laplace requiere la pérdida MSE.")
+    start = time.perf_counter()
+    params = np.asarray(params, dtype=float)
+    n, p = len(model.I_data), len(params)
+    if n <= p: raise ValueError(f"Hacen falta más datos ({n}) que parámetros ({p}).")
+    residuals = model.I_data - precise_curves(model, params[None], pool)[0]
+    sigma2 = float(np.sum(residuals ** 2)) / (n - p)
+    if not np.isfinite(sigma2) or sigma2 <= 0: raise ValueError("El ajuste no deja residuos con los que estimar el ruido.")
+
+    if method == "gauss-newton":
+        J = sensitivities(model, params, finite_difference_steps(model, rel_step or 1e-5), pool)
+        info, n_evaluations = J.T @ J / sigma2, 2 * p + 1
+    else:
+        H, n_evaluations = hessian(lambda X: precise_costs(model, X, pool), params,
+                                   finite_difference_steps(model, rel_step or 1e-4))
+        info = n * H / (2 * sigma2)
+    if not np.all(np.isfinite(info)):
+        raise ValueError("Alguna evaluación cerca del óptimo falló (fuera de límites o rechazada por la guardia de frecuencias).")
+
+    cov, unidentified, condition = _invert(info)
+    se = np.sqrt(np.maximum(np.diag(cov), 0.0))
+    se[unidentified] = np.inf
+    with np.errstate(invalid="ignore", divide="ignore"):
+        corr = cov / np.outer(se, se)
+    corr[unidentified, :] = corr[:, unidentified] = np.nan
+    np.fill_diagonal(corr, 1.0)
+    z = norm.ppf(0.5 + level / 2)
+    return LaplaceResult(list(model.labels), params, se, cov, corr, params - z * se, params + z * se, level, method,
+                         n_evaluations, condition, [model.labels[k] for k in unidentified], time.perf_counter() - start)
+
+class LaplaceWorker(QThread):
+    """Calcula la aproximación de Laplace de un resultado en un hilo separado."""
+    finished_signal = pyqtSignal(object, object, str)  # (RunResult, LaplaceResult o None, error)
+
+    def __init__(self, model, result, method="gauss-newton", level=0.95):
+        super().__init__()
+        self.model = model
+        self.result = result
+        self.method = method
+        self.level = level
+
+    def run(self):
+        try:
+            # Con odeint cada simulación perturbada es independiente: se reparten entre procesos
+            with make_pool(mode="process" if self.model.engine == "odeint" else "serial") as pool:
+                laplace = laplace_uncertainty(self.model, self.result.best_params, self.method, self.level, pool)
+            self.finished_signal.emit(self.result, laplace, "")
+        except Exception as e:
+            self.finished_signal.emit(self.result, None, str(e))
@@ -6,12 +6,11 @@ Versión que reemplaza manualmente el color de acento para máxima
 compatibilidad con versiones antiguas de qdarktheme.
 """
 
-import sys, os, json, time
+import sys, os, json, time, copy
 from functools import partial
 from dataclasses import dataclass, field
 import numpy as np
 import pandas as pd
-from scipy.integrate import odeint
 
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QSplitter,
@@ -29,14 +28,18 @@ import qdarktheme
 # Importaciones de clases refactorizadas
 from clases.helpers import ACORConfig
 from clases.seir_model import SEIRModel
-from clases.acor_optimizer import ACOROptimizer, ACORWorker
+from clases.acor_optimizer import ACORWorker
+from clases.engine import EngineClient, launch_engine, build_optimizer, save_session, load_session, forget_session
 from clases.dialogs import (
     AdvancedACORConfigDialog, ResidualsDialog, ConvergenceDialog, RtDialog,
     ArchiveDistributionDialog, SensitivityAnalysisDialog, ParametersDialog
 )
 from clases.report_generator import ReportGenerator
 from clases.mcmc_dialog import MCMCDialog
-from clases.model_config_dialog import ModelConfigDialog
+from clases.bootstrap_dialog import BootstrapDialog
+from clases.uncertainty import LaplaceWorker
+from clases.model_config_dialog import ModelConfigDialog, HarmonicSweepDialog
+from clases.batch_dialog import BatchDialog
 
 # --- CLASE PARA EL DIÁLOGO DE SELECCIÓN DE TEMA MEJORADO ---
 class ThemeSettingsDialog(QDialog):
@@ -133,9 +136,23 @@ class RunResult:
     duration: float = 0.0
     aic: float = 0.0
     bic: float = 0.0
+    timeouts: int = 0
+    parallel: dict = field(default_factory=dict)
+    # Archivos finales de todas las colonias (puntos y costos), para iniciar el MCMC y sembrar el bootstrap
+    archive: np.ndarray = None
+    archive_costs: np.ndarray = None
+    # Bandas posteriores de `SEIRModel.predictive_bands` (tras el MCMC)
+    predictive: dict = None
+    # Aproximación de Laplace (`uncertainty.LaplaceResult`), si está activada
+    uncertainty: object = None
+    # Intervalos por bootstrap (`bootstrap.BootstrapResult`)
+    bootstrap: object = None
+    # Evidencia y partículas del muestreo SMC (`smc.SMCResult`)
+    evidence: object = None
 
 class MainWindow(QMainWindow):
     DEFAULT_ACCENT = "#7750f8"
+    LEVEL_COLORS = {"success": "green", "warning": "orange", "error": "red"}
 
     def __init__(self):
         super().__init__()
@@ -143,6 +160,9 @@ class MainWindow(QMainWindow):
         self.model = SEIRModel()
         self.optimizer = None
         self.worker = None
+        self.engine = None
+        self.laplace_worker = None
+        self.laplace_pending = None  # (modelo, resultado, método) en espera mientras otro cálculo termina
         self.dialog_windows = []
         self.best_params_overall = None
         self.best_cost_overall = float('inf')
@@ -162,6 +182,7 @@ class MainWindow(QMainWindow):
         self.init_ui()
         self.setAcceptDrops(True)
         self._load_settings()
+        self._reconnect_engine()
 
     def init_ui(self):
         self.setWindowTitle("Interfaz de Optimización SEIR (v5.2)")
@@ -187,6 +208,7 @@ class MainWindow(QMainWindow):
         self.scatter_item = self.plot_widget.plot(pen=None, symbol='o', symbolBrush='r', symbolPen='k', name="Datos Observados")
         self.curve_item = self.plot_widget.plot(pen=pg.mkPen('b', width=2), name="Mejor Ajuste Global")
         self.comparison_curve_item = self.plot_widget.plot(pen=pg.mkPen('#888888', width=2, style=Qt.DashLine), name="Ajuste de Comparación")
+        self.band_items = self._add_band_items(self.plot_widget, (0, 100, 255), "Mediana Posterior")
         
         self.tabs = QTabWidget()
         config_tab = QWidget()
@@ -217,14 +239,26 @@ class MainWindow(QMainWindow):
         self.in_max_iter = self._add_validated_input(cfg_layout, 3, "Iteraciones:", str(default_config.max_iter), "Número máximo de iteraciones.", is_int=True)
         self.in_q = self._add_validated_input(cfg_layout, 4, "q:", str(default_config.q), "Factor de exploración.", is_float=True)
         cfg_layout.addWidget(QLabel("Loss:"), 5, 0); self.cb_loss = QComboBox(); self.cb_loss.addItems(["MSE", "MAE", "Huber"]); cfg_layout.addWidget(self.cb_loss, 5, 1)
-        self.in_plateau = self._add_validated_input(cfg_layout, 6, "Plateau K:", "200", "Iteraciones sin mejora para detener.", is_int=True, allow_empty=True)
-        self.in_tmax = self._add_validated_input(cfg_layout, 7, "T máx (min):", "", "Tiempo máximo de ejecución.", is_float=True, allow_empty=True)
-        self.chk_warm = QCheckBox("Warm-start"); self.chk_warm.setToolTip("Comenzar usando los últimos mejores parámetros."); cfg_layout.addWidget(self.chk_warm, 8, 0, 1, 2)
-        btn_advanced = QPushButton("Configuración Avanzada"); btn_advanced.clicked.connect(self.open_advanced_config); cfg_layout.addWidget(btn_advanced, 9, 0, 1, 2)
+        cfg_layout.addWidget(QLabel("Motor:"), 6, 0); self.cb_engine = QComboBox()
+        self.cb_engine.addItem("ODE (odeint)", "odeint"); self.cb_engine.addItem("Discreto (rápido)", "discrete")
+        self.cb_engine.setToolTip("Discreto: pasos exponenciales exactos evaluando todas las hormigas a la vez. Útil para barridos y exploración.")
+        cfg_layout.addWidget(self.cb_engine, 6, 1)
+        self.in_plateau = self._add_validated_input(cfg_layout, 7, "Plateau K:", "200", "Iteraciones sin mejora para detener.", is_int=True, allow_empty=True)
+        self.in_tmax = self._add_validated_input(cfg_layout, 8, "T máx (min):", "", "Tiempo máximo de ejecución.", is_float=True, allow_empty=True)
+        self.chk_warm = QCheckBox("Warm-start"); self.chk_warm.setToolTip("Comenzar usando los últimos mejores parámetros."); cfg_layout.addWidget(self.chk_warm, 9, 0)
+        self.chk_laplace = QCheckBox("Incertidumbre")
+        self.chk_laplace.setToolTip("Al terminar cada ejecución (MSE), estimar errores estándar e intervalos por aproximación de Laplace.")
+        cfg_layout.addWidget(self.chk_laplace, 9, 1)
+        cfg_layout.addWidget(QLabel("Laplace:"), 10, 0); self.cb_laplace = QComboBox()
+        self.cb_laplace.addItem("Gauss-Newton (2p simulaciones)", "gauss-newton"); self.cb_laplace.addItem("Hessiano completo (~2p² simulaciones)", "hessian")
+        self.cb_laplace.setToolTip("Gauss-Newton: rápido y siempre definido. Hessiano: incluye la curvatura de los residuos; más caro, útil si el ajuste no es bueno.")
+        cfg_layout.addWidget(self.cb_laplace, 10, 1)
+        btn_advanced = QPushButton("Configuración Avanzada"); btn_advanced.clicked.connect(self.open_advanced_config); cfg_layout.addWidget(btn_advanced, 11, 0, 1, 2)
         right_layout.addWidget(group_cfg)
 
         group_params = QGroupBox("Parámetros del Modelo"); p_layout = QVBoxLayout(group_params)
         btn_config_model = QPushButton("Configurar Estructura..."); btn_config_model.clicked.connect(self.open_model_config_dialog); p_layout.addWidget(btn_config_model)
+        btn_sweep = QPushButton("Barrido de Estructuras (AIC/BIC)..."); btn_sweep.clicked.connect(self.open_harmonic_sweep_dialog); p_layout.addWidget(btn_sweep)
         btn_params = QPushButton("Ajustar Límites de Parámetros"); btn_params.clicked.connect(self.open_params_dialog); p_layout.addWidget(btn_params)
         right_layout.addWidget(group_params)
 
@@ -232,6 +266,7 @@ class MainWindow(QMainWindow):
         run_buttons_layout = QHBoxLayout()
         self.btn_run = QPushButton("Correr"); self.btn_run.clicked.connect(self.run_optimization); run_buttons_layout.addWidget(self.btn_run)
         self.btn_stop = QPushButton("Detener"); self.btn_stop.clicked.connect(self.stop_optimization); self.btn_stop.setEnabled(False); run_buttons_layout.addWidget(self.btn_stop)
+        self.btn_pause = QPushButton("Pausar"); self.btn_pause.clicked.connect(self.toggle_pause); self.btn_pause.setEnabled(False); run_buttons_layout.addWidget(self.btn_pause)
         run_layout.addLayout(run_buttons_layout)
         log_layout = QHBoxLayout(); log_layout.addWidget(QLabel("Log:"))
         self.log_text = QTextEdit(readOnly=True)
@@ -270,13 +305,18 @@ class MainWindow(QMainWindow):
         btn_distribution = QPushButton("Distribución"); btn_distribution.clicked.connect(self.show_distribution_plot)
         btn_parallel = QPushButton("Análisis de Parámetros"); btn_parallel.clicked.connect(self.show_parallel_plot)
         btn_bounds = QPushButton("Análisis de Límites"); btn_bounds.clicked.connect(self.show_bounds_analysis_plot)
+        btn_diversity = QPushButton("Diversidad"); btn_diversity.clicked.connect(self.show_diversity_plot)
+        btn_allocation = QPushButton("Reparto de Hormigas"); btn_allocation.clicked.connect(self.show_allocation_plot)
         btn_mcmc = QPushButton("Análisis MCMC"); btn_mcmc.clicked.connect(self.show_mcmc_dialog)
         btn_mcmc.setToolTip("Ejecutar un análisis MCMC para explorar la incertidumbre de los parámetros (avanzado).")
+        btn_bootstrap = QPushButton("Bootstrap"); btn_bootstrap.clicked.connect(self.show_bootstrap_dialog)
+        btn_bootstrap.setToolTip("Intervalos de confianza reajustando series remuestreadas desde el mejor ajuste.")
 
         plots_layout.addWidget(btn_rt, 0, 0); plots_layout.addWidget(btn_residuals, 0, 1)
         plots_layout.addWidget(btn_convergence, 1, 0); plots_layout.addWidget(btn_distribution, 1, 1)
         plots_layout.addWidget(btn_parallel, 2, 0); plots_layout.addWidget(btn_bounds, 2, 1)
-        plots_layout.addWidget(btn_mcmc, 3, 0, 1, 2)
+        plots_layout.addWidget(btn_diversity, 3, 0); plots_layout.addWidget(btn_allocation, 3, 1)
+        plots_layout.addWidget(btn_mcmc, 4, 0); plots_layout.addWidget(btn_bootstrap, 4, 1)
         layout.addWidget(dashboard_plots_group, 1); layout.addStretch(1)
 
     def open_model_config_dialog(self):
@@ -294,12 +334,32 @@ class MainWindow(QMainWindow):
                                       "Los resultados de ejecuciones anteriores ya no son comparables. "
                                       "Se recomienda limpiar la sesión (Archivo > Limpiar Sesión) antes de ejecutar una nueva optimización.")
 
+    def open_harmonic_sweep_dialog(self):
+        """Ajusta todas las estructuras armónicas y permite adoptar la mejor según AIC/BIC."""
+        try:
+            self.model.N = int(self.pop_input.text())
+        except ValueError:
+            QMessageBox.warning(self, "Error de Entrada", "Población (N) inválida."); return
+        self.model.loss_type = self.cb_loss.currentText()
+        self.model.engine = self.cb_engine.currentData()
+        dlg = HarmonicSweepDialog(self.model, self.acor_config, self)
+        if dlg.exec_():
+            result = dlg.get_selected_result()
+            if result is None: return
+            self._reset_session_state()
+            self.model.configure_model(result.harmonic_config)
+            if result.best_params is not None:
+                self.best_params_overall = result.best_params; self.best_cost_overall = result.best_cost
+            self.log(f"Estructura {result.name} cargada desde el barrido ({self.model.DIM} parámetros).", "purple")
+            self.update_plot()
+
     def _create_menu_bar(self):
         menu_bar = self.menuBar()
         file_menu = menu_bar.addMenu("&Archivo")
         file_menu.addAction("Importar &XLSX...", lambda: self.import_xlsx())
         file_menu.addAction("Importar &JSON...", lambda: self.import_json())
         file_menu.addAction("&Exportar Sesión JSON...", self.export_json)
+        file_menu.addAction("Ajuste por &Lotes...", self.open_batch_dialog)
         self.export_pdf_action = QAction("Exportar Reporte PDF...", self, triggered=self._show_report_selection_dialog, enabled=False)
         file_menu.addAction(self.export_pdf_action)
         file_menu.addSeparator()
@@ -329,6 +389,8 @@ class MainWindow(QMainWindow):
         self.current_theme_name = self.settings.value("theme", "auto", type=str)
         self.current_accent_color = self.settings.value("accent_color", self.DEFAULT_ACCENT, type=str)
         self._set_theme(self.current_theme_name, self.current_accent_color)
+        self.chk_laplace.setChecked(self.settings.value("laplace", False, type=bool))
+        self.cb_laplace.setCurrentIndex(max(0, self.cb_laplace.findData(self.settings.value("laplace_method", "gauss-newton", type=str))))
 
     def _save_settings(self):
         self.settings.setValue("geometry", self.saveGeometry())
@@ -336,6 +398,8 @@ class MainWindow(QMainWindow):
         self.settings.setValue("theme", self.current_theme_name)
         self.settings.setValue("accent_color", self.current_accent_color)
         self.settings.setValue("recent_files", self.recent_files)
+        self.settings.setValue("laplace", self.chk_laplace.isChecked())
+        self.settings.setValue("laplace_method", self.cb_laplace.currentData())
 
     def _set_theme(self, theme_name="auto", accent_color=None):
         self.current_theme_name = theme_name
@@ -428,7 +492,7 @@ class MainWindow(QMainWindow):
             selected_result = list_widget.currentItem().data(Qt.UserRole)
             self._display_comparison_run(self.run_history.index(selected_result), 0)
             rt_plot_widget = pg.PlotWidget(title=f"Rt(t) - Ejecución #{selected_result.run_id}")
-            self._plot_rt_on_widget(rt_plot_widget, selected_result.best_params)
+            self._plot_rt_on_widget(rt_plot_widget, selected_result.best_params, selected_result.predictive)
             self._add_dashboard_plot("rt", rt_plot_widget)
             QApplication.processEvents()
             report_gen = ReportGenerator(self, self.model, selected_result, self.acor_config)
@@ -455,83 +519,177 @@ class MainWindow(QMainWindow):
         line_edit.setStyleSheet("" if valid else "border: 1px solid red;")
         return valid
 
-    def update_plot(self, comparison_params=None):
+    @staticmethod
+    def _add_band_items(plot_widget, color, name=None):
+        """Crea en `plot_widget` dos bandas (exterior e interior) y la mediana. Devuelve los bordes y la mediana."""
+        edges = [pg.PlotCurveItem(pen=pg.mkPen(None)) for _ in range(4)]
+        for (lower, upper), alpha in ((edges[:2], 40), (edges[2:], 70)):
+            plot_widget.addItem(lower); plot_widget.addItem(upper)
+            plot_widget.addItem(pg.FillBetweenItem(lower, upper, brush=pg.mkBrush(*color, alpha)))
+        median = plot_widget.plot(pen=pg.mkPen(color, width=1.5, style=Qt.DotLine), name=name)
+        return edges, median
+
+    @staticmethod
+    def _set_bands(items, bands, name):
+        """Dibuja los cuantiles de `bands[name]` (los extremos y los siguientes hacia dentro); sin bandas, las borra."""
+        edges, median = items
+        if bands is None or name not in bands:
+            for item in edges + [median]: item.setData([], [])
+            return
+        t, q = bands["t"], bands[name]
+        n = len(q)
+        for k, item in enumerate(edges):
+            row = (0, n - 1, 1, n - 2)[k]
+            if n >= 4 or k < 2: item.setData(t, q[row])
+            else: item.setData([], [])
+        median.setData(t, q[n // 2])
+
+    def update_plot(self, comparison_params=None, bands=None):
         if self.model.I_data is not None and len(self.model.I_data) > 0:
             self.scatter_item.setData(self.model.t_data, self.model.I_data)
         else:
             self.scatter_item.setData([], [])
         
         if self.best_params_overall is not None and len(self.model.I_data) > 0:
-            t_sim = np.linspace(float(self.model.t_data[0]), float(self.model.t_data[-1]), 300)
-            try:
-                k = self.best_params_overall[-1]
-                self.model.set_initial_conditions(k)
-                sol = odeint(self.model.seir_harmonic, self.model.y0, t_sim, args=tuple(self.best_params_overall[:-1]), mxstep=200_000)
-                self.curve_item.setData(t_sim, sol[:, 2])
+            try: self.curve_item.setData(*self.model.fit_curve(self.best_params_overall))
             except Exception as e: self.log(f"Error al graficar mejor ajuste: {e}", "red")
         else:
             self.curve_item.setData([], [])
 
         if comparison_params is not None and len(self.model.I_data) > 0:
-            t_sim = np.linspace(float(self.model.t_data[0]), float(self.model.t_data[-1]), 300)
-            try:
-                k = comparison_params[-1]
-                self.model.set_initial_conditions(k)
-                sol = odeint(self.model.seir_harmonic, self.model.y0, t_sim, args=tuple(comparison_params[:-1]), mxstep=200_000)
-                self.comparison_curve_item.setData(t_sim, sol[:, 2])
+            try: self.comparison_curve_item.setData(*self.model.fit_curve(comparison_params))
             except Exception as e: self.log(f"Error al graficar comparación: {e}", "red")
         else:
             self.comparison_curve_item.setData([], [])
+        self._set_bands(self.band_items, bands, "I")
+
+    def _read_run_inputs(self):
+        """Aplica los campos de la pestaña de configuración al modelo y a ACORConfig. Devuelve (plateau_K, tmax_seconds)."""
+        self.model.N = int(self.pop_input.text())
+        self.model.loss_type = self.cb_loss.currentText()
+        self.model.engine = self.cb_engine.currentData()
+        self.acor_config.n_ants = int(self.in_n_ants.text())
+        self.acor_config.archive_size = int(self.in_archive.text())
+        self.acor_config.max_iter = int(self.in_max_iter.text())
+        self.acor_config.q = float(self.in_q.text())
+        plateau_K = int(self.in_plateau.text()) if self.in_plateau.text().strip() else None
+        tmax_m = self.in_tmax.text().strip()
+        tmax_seconds = float(tmax_m) * 60.0 if tmax_m else None
+        return plateau_K, tmax_seconds
+
+    def open_batch_dialog(self):
+        """Ajusta una lista o carpeta de conjuntos de datos con la configuración actual."""
+        try:
+            plateau_K, tmax_seconds = self._read_run_inputs()
+        except (ValueError, TypeError) as e:
+            QMessageBox.critical(self, "Error de Entrada", f"Parámetros inválidos: {e}"); return
+        dlg = BatchDialog(self.model, self.acor_config, plateau_K, tmax_seconds, self)
+        dlg.exec_()
 
     def run_optimization(self):
         if len(self.model.I_data) == 0: QMessageBox.warning(self, "Datos faltantes", "Importe datos."); return
         try:
-            self.model.N = int(self.pop_input.text())
-            self.model.loss_type = self.cb_loss.currentText()
-            self.acor_config.n_ants = int(self.in_n_ants.text())
-            self.acor_config.archive_size = int(self.in_archive.text())
-            self.acor_config.max_iter = int(self.in_max_iter.text())
-            self.acor_config.q = float(self.in_q.text())
-            plateau_K = int(self.in_plateau.text()) if self.in_plateau.text().strip() else None
-            tmax_m = self.in_tmax.text().strip()
-            tmax_seconds = float(tmax_m) * 60.0 if tmax_m else None
+            plateau_K, tmax_seconds = self._read_run_inputs()
             warm_start_params = self.best_params_overall if self.chk_warm.isChecked() else None
 
-            self.start_time = time.time()
-            self.optimizer = ACOROptimizer(self.model.fitness, self.model.bounds, self.acor_config, warm_start_params)
-            self.worker = ACORWorker(self.optimizer, tmax_seconds, plateau_K)
-            self.worker.progress_signal.connect(self.update_progress)
-            self.worker.finished_signal.connect(self.optimization_finished)
             config_summary = f"<b>Iniciando Optimización #{self.run_counter + 1} ...</b>"
             self.log(config_summary, "blue")
-
-            self.btn_run.setEnabled(False); self.btn_stop.setEnabled(True)
+            try:
+                engine = self._ensure_engine()
+            except Exception as e:
+                engine = None
+                self.log(f"No se pudo iniciar el motor en un proceso aparte ({e}); se optimiza dentro de la interfaz.", "orange")
+            if engine is not None and engine.start_run(self.model, self.acor_config, warm_start_params, tmax_seconds, plateau_K):
+                self.worker = engine
+            else:
+                self.optimizer = build_optimizer(self.model, self.acor_config, warm_start_params)
+                self.worker = ACORWorker(self.optimizer, tmax_seconds, plateau_K)
+                self.worker.progress_signal.connect(self.update_progress)
+                self.worker.finished_signal.connect(self.optimization_finished)
+                self.worker.start()
+
+            self._set_running_buttons(True)
             self.tabs.setCurrentIndex(0)
             self.progress_label.setText("Mejor Costo: -")
-            self.worker.start()
         except (ValueError, TypeError) as e:
             self.log(f"Error de Entrada: {e}", "red"); QMessageBox.critical(self, "Error de Entrada", f"Parámetros inválidos: {e}")
 
     def stop_optimization(self):
         if self.worker: self.worker.stop(); self.log("Solicitud de detención enviada...", "orange")
 
-    def update_progress(self, progress, message, params):
-        self.progress_bar.setValue(progress)
-        cost_str = "-";
-        if "Best Cost:" in message:
-            try: cost_str = message.split("Best Cost:")[1].split("(")[0].strip()
-            except IndexError: pass
-        self.progress_label.setText(f"Mejor Costo: {cost_str}")
-        important_keywords = ["encontró mejora", "Detenido", "Límite de tiempo", "Plateau", "Error"]
-        if any(keyword in message for keyword in important_keywords):
-            color = "green" if "mejora" in message else "orange" if "Detenido" in message or "Plateau" in message else "red"
-            self.log(message, color)
-        if params is not None: self.update_plot(comparison_params=params)
+    def toggle_pause(self):
+        if not self.worker: return
+        if self.btn_pause.text() == "Pausar": self.worker.pause(); self.btn_pause.setText("Reanudar")
+        else: self.worker.resume(); self.btn_pause.setText("Pausar")
+
+    def _set_running_buttons(self, running, paused=False):
+        self.btn_run.setEnabled(not running); self.btn_stop.setEnabled(running); self.btn_pause.setEnabled(running)
+        self.btn_pause.setText("Reanudar" if paused else "Pausar")
+
+    # --- Motor de optimización en un proceso aparte ---
+
+    def _connect_engine(self, address, authkey, timeout=5.0):
+        client = EngineClient(address, authkey, timeout)
+        client.progress_signal.connect(self.update_progress)
+        client.finished_signal.connect(self.optimization_finished)
+        client.state_signal.connect(self._on_engine_state)
+        client.disconnected_signal.connect(self._on_engine_lost)
+        client.start()
+        self.engine = client
+        # Para volver a conectarse a una corrida en curso tras reiniciar la interfaz (archivo 0600, no QSettings)
+        save_session(address, authkey)
+        return client
+
+    def _ensure_engine(self):
+        if self.engine is not None: return self.engine
+        return self._connect_engine(*launch_engine())
+
+    def _forget_engine(self):
+        self.engine = None
+        forget_session()
+
+    def _reconnect_engine(self):
+        # Versiones anteriores guardaban la clave en claro en la configuración compartida
+        for key in ("engine/host", "engine/port", "engine/authkey"): self.settings.remove(key)
+        session = load_session()
+        if session is None: return
+        try:
+            self._connect_engine(*session, timeout=0.5)
+        except Exception:
+            self._forget_engine()
+
+    def _on_engine_state(self, state):
+        if state["state"] not in ("running", "paused", "finished"): return
+        if len(self.model.I_data) == 0 and state.get("model") is not None:
+            self.model = state["model"]; self.update_plot()
+        if state["state"] == "finished": return
+        self.worker = self.engine
+        self._set_running_buttons(True, paused=state["state"] == "paused")
+        self.log(f"Reconectado a una optimización en curso en el motor (PID {state['pid']}).", "blue")
+        if state.get("progress"): self.update_progress(state["progress"])
+
+    def _on_engine_lost(self):
+        engine = self.engine
+        self._forget_engine()
+        if self.worker is not None and self.worker is engine:
+            self.worker = None
+            self._set_running_buttons(False)
+            self.log("El motor de optimización terminó inesperadamente; la interfaz sigue disponible.", "red")
+
+    def update_progress(self, event):
+        """Muestra un `ProgressEvent`: ya llega agrupado por tiempo y con la curva del mejor ajuste calculada."""
+        self.progress_bar.setValue(event.percent)
+        if np.isfinite(event.best_cost): self.progress_label.setText(f"Mejor Costo: {event.best_cost:.3e}")
+        if event.message and event.level in self.LEVEL_COLORS: self.log(event.message, self.LEVEL_COLORS[event.level])
+        if event.trajectory is not None: self.comparison_curve_item.setData(*event.trajectory)
 
     def optimization_finished(self, optimizer):
         self.run_counter += 1
-        duration = time.time() - self.start_time
-        result = RunResult(run_id=self.run_counter, best_cost=optimizer.best_cost_global, best_params=optimizer.best_params_global, cost_history=optimizer.history_best_cost, duration=duration)
+        duration = optimizer.duration
+        result = RunResult(run_id=self.run_counter, best_cost=optimizer.best_cost_global, best_params=optimizer.best_params_global, cost_history=optimizer.history_best_cost, duration=duration,
+                           timeouts=optimizer.n_timeouts, parallel=dict(optimizer.parallel_info),
+                           archive=np.vstack(optimizer.archives) if optimizer.archives else None,
+                           archive_costs=np.concatenate(optimizer.colony_costs) if optimizer.colony_costs else None)
         
         if result.best_cost != float('inf') and self.model.loss_type == "MSE":
             num_params = self.model.DIM
@@ -545,18 +703,60 @@ class MainWindow(QMainWindow):
             
         self.run_history.append(result)
         self.log(f"<b>Optimización #{self.run_counter} finalizada. Costo final: {result.best_cost:.4e}</b>", "blue")
+        self.log(f"Evaluaciones: {optimizer.n_evaluations} (duplicados descartados: {optimizer.duplicates_skipped}, aciertos de caché: {optimizer.cache_hits}, "
+                 f"agotaron el tiempo: {optimizer.n_timeouts})", "purple")
+        info = optimizer.parallel_info
+        if "eval_time" in info:
+            self.log(f"Evaluación: {info['mode']} ({info['workers']} workers, trozos de {info['chunksize']}) — "
+                     f"{info['eval_time'] * 1e3:.2f} ms por evaluación, {info['ipc_overhead'] * 1e3:.3f} ms por envío", "purple")
+        elif info.get("mode") == "remote":
+            self.log(f"Evaluación: remota en {info.get('address', '?')} ({info['workers']} workers locales, trozos de {info['chunksize']})", "purple")
+        elif info:
+            self.log(f"Evaluación: {info['mode']} ({info['workers']} workers)", "purple")
+        for c, diag in enumerate(optimizer.colony_diagnostics):
+            state = "activa" if diag["active"] else "retirada"
+            self.log(f"Colonia {c + 1} ({state}): dispersión máx {diag['max_spread']:.2e}, sigma {diag['sigma']:.2e}, sin mejora {diag['stall']} iters", "purple")
         params_header = "<b>Mejores Parámetros Encontrados:</b>"
         params_list = "\n".join([f"  - {label}: {val:.6f}" for label, val in zip(self.model.labels, result.best_params)])
         self.log(f"{params_header}\n<pre>{params_list}</pre>")
-        self.btn_run.setEnabled(True); self.btn_stop.setEnabled(False); self.export_pdf_action.setEnabled(True)
+        self._set_running_buttons(False); self.export_pdf_action.setEnabled(True)
         if result.best_cost < self.best_cost_overall:
             self.best_cost_overall = result.best_cost; self.best_params_overall = result.best_params
             self.log("<b>¡Nuevo mejor resultado global encontrado!</b>", "green")
         self.worker = None; self.optimizer = optimizer
         self._update_dashboard(); self.update_plot()
+        if self.chk_laplace.isChecked() and not np.isnan(result.aic): self._start_laplace(result)
         for dlg in self.dialog_windows:
             if hasattr(dlg, 'update_contents'): dlg.update_contents()
 
+    def _start_laplace(self, result):
+        # Copia del modelo: el usuario puede reconfigurarlo mientras el hilo calcula
+        request = (copy.deepcopy(self.model), result, self.cb_laplace.currentData())
+        if self.laplace_worker is not None:
+            self.laplace_pending = request; return  # se lanza al terminar el actual (sólo la última petición)
+        self._run_laplace(*request)
+
+    def _run_laplace(self, model, result, method):
+        self.laplace_worker = LaplaceWorker(model, result, method)
+        self.laplace_worker.finished_signal.connect(self._on_laplace_finished)
+        self.laplace_worker.start()
+
+    def _on_laplace_finished(self, result, laplace, error):
+        self.laplace_worker = None
+        if self.laplace_pending is not None:
+            request, self.laplace_pending = self.laplace_pending, None
+            self._run_laplace(*request)
+        if laplace is None:
+            self.log(f"No se pudo estimar la incertidumbre de la ejecución #{result.run_id}: {error}", "orange"); return
+        result.uncertainty = laplace
+        rows = "\n".join(f"  - {label}: {value:.6f} ± {se:.2e}  [{lo:.4f}, {hi:.4f}]" for label, value, se, lo, hi in laplace.rows())
+        self.log(f"<b>Incertidumbre (Laplace, {laplace.method}, {laplace.level:.0%}) de la ejecución #{result.run_id}</b> — "
+                 f"{laplace.n_evaluations} evaluaciones en {laplace.duration:.2f} s, condición {laplace.condition_number:.1e}:\n<pre>{rows}</pre>", "purple")
+        pairs = ", ".join(f"{a}–{b}: {r:+.2f}" for a, b, r in laplace.strongest_correlations())
+        if pairs: self.log(f"Correlaciones más fuertes: {pairs}", "purple")
+        if laplace.unidentified:
+            self.log(f"Sin información en los datos (error infinito): {', '.join(laplace.unidentified)}", "orange")
+
     def _update_dashboard(self):
         self.tabs.setTabEnabled(1, True); self.history_table.setRowCount(0)
         for result in reversed(self.run_history):
@@ -574,11 +774,12 @@ class MainWindow(QMainWindow):
         result = self._get_selected_run_result()
         if result:
             self.log(f"Seleccionada Ejecución #{result.run_id} para comparación y análisis.", "purple")
-            self.update_plot(comparison_params=result.best_params); self._clear_dashboard_plots()
+            self.update_plot(comparison_params=result.best_params, bands=result.predictive); self._clear_dashboard_plots()
 
-    def _plot_rt_on_widget(self, plot_widget, params):
+    def _plot_rt_on_widget(self, plot_widget, params, bands=None):
         if params is None or len(self.model.I_data) == 0: return
         plot_widget.clear()
+        if bands is not None: self._set_bands(self._add_band_items(plot_widget, (200, 0, 200)), bands, "Rt")
         plot_widget.addItem(pg.InfiniteLine(angle=0, pos=1.0, pen=pg.mkPen('b', style=Qt.DashLine)))
         t_sim = np.linspace(self.model.t_data[0], self.model.t_data[-1], 300)
         
@@ -603,9 +804,7 @@ class MainWindow(QMainWindow):
             p_idx += 3
         gamma_t = np.exp(log_gamma_vals)
 
-        k = params[-1]
-        self.model.set_initial_conditions(k)
-        sol = odeint(self.model.seir_harmonic, self.model.y0, t_sim, args=tuple(p), mxstep=200_000)
+        sol = self.model.simulate(params, t_sim)
         S = sol[:, 0]
         Rt = beta_t * S / (gamma_t * self.model.N)
         plot_widget.plot(t_sim, Rt, pen=pg.mkPen('m', width=2))
@@ -740,7 +939,14 @@ class MainWindow(QMainWindow):
         result = self._get_selected_run_result()
         if not result: return
         plot_widget = pg.PlotWidget(title=f"Rt(t) - Ejecución #{result.run_id}")
-        self._plot_rt_on_widget(plot_widget, result.best_params)
+        self._plot_rt_on_widget(plot_widget, result.best_params, result.predictive)
+        self._add_dashboard_plot("rt", plot_widget)
+
+    def show_predictive_bands(self, result):
+        """Superpone las bandas posteriores de `result` en el gráfico principal y en Rt(t)."""
+        self.update_plot(comparison_params=result.best_params, bands=result.predictive)
+        plot_widget = pg.PlotWidget(title=f"Rt(t) con Bandas Posteriores - Ejecución #{result.run_id}")
+        self._plot_rt_on_widget(plot_widget, result.best_params, result.predictive)
         self._add_dashboard_plot("rt", plot_widget)
 
     def show_residuals_plot(self):
@@ -752,9 +958,7 @@ class MainWindow(QMainWindow):
         if params is not None and len(self.model.I_data) > 0:
             t = self.model.t_data
             try:
-                k = params[-1]
-                self.model.set_initial_conditions(k)
-                I_pred = odeint(self.model.seir_harmonic, self.model.y0, t, args=tuple(params[:-1]), mxstep=200_000)[:, 2]
+                I_pred = self.model.simulate(params, t)[:, 2]
                 resid = self.model.I_data - I_pred
                 plot_widget.plot(t, resid, pen=None, symbol='o', symbolBrush='b', symbolPen='k')
                 plot_widget.addLine(y=0, pen=pg.mkPen('k', style=Qt.DashLine))
@@ -812,6 +1016,27 @@ class MainWindow(QMainWindow):
         plot_widget.addLine(y=0.05, pen=pg.mkPen('r', style=Qt.DashLine)); plot_widget.addLine(y=0.15, pen=pg.mkPen('y', style=Qt.DashLine))
         self._add_dashboard_plot("bounds", plot_widget)
 
+    def show_diversity_plot(self):
+        if not self.optimizer or not self.optimizer.history_diversity: QMessageBox.warning(self, "Sin Datos", "No hay historial de diversidad."); return
+        plot_widget = pg.PlotWidget(title="Diversidad del Archivo por Colonia")
+        plot_widget.setLabel('left', 'Distancia Normalizada Media'); plot_widget.setLabel('bottom', 'Iteración')
+        plot_widget.addLegend()
+        div = np.vstack(self.optimizer.history_diversity)
+        for c in range(div.shape[1]):
+            plot_widget.plot(div[:, c], pen=pg.mkPen(pg.intColor(c, div.shape[1]), width=2), name=f"Colonia {c + 1}")
+        self.log(f"Evaluaciones: {self.optimizer.n_evaluations} — duplicados descartados: {self.optimizer.duplicates_skipped}", "purple")
+        self._add_dashboard_plot("diversity", plot_widget)
+
+    def show_allocation_plot(self):
+        if not self.optimizer or not self.optimizer.history_allocation: QMessageBox.warning(self, "Sin Datos", "No hay historial de reparto."); return
+        plot_widget = pg.PlotWidget(title="Hormigas Asignadas por Colonia")
+        plot_widget.setLabel('left', 'Hormigas'); plot_widget.setLabel('bottom', 'Iteración')
+        plot_widget.addLegend()
+        alloc = np.vstack(self.optimizer.history_allocation)
+        for c in range(alloc.shape[1]):
+            plot_widget.plot(alloc[:, c], pen=pg.mkPen(pg.intColor(c, alloc.shape[1]), width=2), name=f"Colonia {c + 1}")
+        self._add_dashboard_plot("allocation", plot_widget)
+
     def show_mcmc_dialog(self):
         result = self._get_selected_run_result()
         if not result: return
@@ -825,8 +1050,25 @@ class MainWindow(QMainWindow):
         # self.dialog_windows.append(dlg) # Descomentar cuando el diálogo sea más complejo
         dlg.show()
 
+    def show_bootstrap_dialog(self):
+        result = self._get_selected_run_result()
+        if not result: return
+        try:
+            plateau_K, _ = self._read_run_inputs()
+        except (ValueError, TypeError) as e:
+            QMessageBox.critical(self, "Error de Entrada", f"Parámetros inválidos: {e}"); return
+        self.log("Abriendo diálogo de bootstrap...", "purple")
+        dlg = BootstrapDialog(self.model, result, self.acor_config, plateau_K, self)
+        dlg.show()
+
     def closeEvent(self, event):
         self._save_settings();
+        self.laplace_pending = None
+        if self.laplace_worker is not None: self.laplace_worker.wait()
+        if self.engine is not None:
+            # Una corrida en curso sigue en el motor y se recupera al volver a abrir la interfaz
+            if self.worker is self.engine: self.engine.close()
+            else: self.engine.shutdown(); self._forget_engine()
         for win in self.dialog_windows[:]: win.close()
         super().closeEvent(event)
 
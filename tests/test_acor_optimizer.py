@@ -0,0 +1,173 @@
+import numpy as np
+from clases.helpers import ACORConfig
+from clases.acor_optimizer import ACOROptimizer, find_duplicates
+
+def sphere(x):
+    return float(np.sum(np.asarray(x) ** 2))
+
+class SerialPool:
+    def map(self, func, items):
+        return [func(x) for x in items]
+
+def make_optimizer(**overrides):
+    bounds = np.array([[-1.0, 1.0]] * 3)
+    config = ACORConfig(**{"n_ants": 8, "archive_size": 6, "max_iter": 5, "colonies_count": 2, **overrides})
+    return ACOROptimizer(sphere, bounds, config)
+
+def test_find_duplicates_against_reference_and_batch():
+    low, rng = np.zeros(2), np.ones(2)
+    reference = np.array([[0.5, 0.5]])
+    candidates = np.array([[0.5, 0.5], [0.1, 0.1], [0.1, 0.1 + 1e-7], [0.9, 0.2]])
+    dup = find_duplicates(candidates, reference, low, rng, 1e-4)
+    assert dup.tolist() == [True, False, True, False]
+
+def test_insert_into_archive_rejects_clones():
+    opt = make_optimizer()
+    archive = np.linspace(-0.5, 0.5, 18).reshape(6, 3)
+    costs = np.array([sphere(x) for x in archive])
+    order = np.argsort(costs)
+    archive, costs = archive[order], costs[order]
+    clones = np.repeat(archive[:1], 3, axis=0)
+    new_archive, new_costs = opt._insert_into_archive(archive, costs, clones, np.full(3, costs[0]))
+    assert new_archive.shape == archive.shape
+    assert np.all(np.diff(new_costs) >= 0)
+    assert not find_duplicates(new_archive, None, opt.LOW, opt.RANGE, opt.config.dedup_tolerance).any()
+
+def test_filter_duplicates_counts_skipped():
+    opt = make_optimizer()
+    archive = np.zeros((1, 3))
+    sols = np.array([[0.0, 0.0, 0.0], [0.3, 0.3, 0.3], [0.3, 0.3, 0.3]])
+    kept = opt._filter_duplicates(sols, archive)
+    assert len(kept) == 1
+    assert opt.duplicates_skipped == 2
+
+def test_archive_diversity_is_zero_for_collapsed_archive():
+    opt = make_optimizer()
+    assert opt._archive_diversity(np.zeros((6, 3))) == 0.0
+    assert opt._archive_diversity(np.array([[-1.0] * 3, [1.0] * 3])) > 0.9
+
+def test_initial_design_splits_points_between_colonies():
+    for method in ["sobol", "halton", "lhs", "uniform"]:
+        opt = make_optimizer(init_method=method, init_seed=7)
+        designs = opt._initial_design(5)
+        assert len(designs) == 2
+        points = np.vstack(designs)
+        assert points.shape == (10, 3)
+        assert np.all(points >= opt.LOW) and np.all(points <= opt.HIGH)
+        assert not find_duplicates(points, None, opt.LOW, opt.RANGE, 1e-6).any()
+
+def test_initial_design_gives_each_colony_its_own_region():
+    for colonies, shape in ((2, [2, 1, 1]), (6, [2, 3, 1]), (8, [2, 2, 2])):
+        opt = make_optimizer(init_method="lhs", init_seed=3, colonies_count=colonies)
+        assert opt._colony_grid().tolist() == shape
+        cells = [{tuple(np.floor((p - opt.LOW) / opt.RANGE * shape).astype(int)) for p in d} for d in opt._initial_design(4)]
+        assert all(len(c) == 1 for c in cells) and len(set.union(*cells)) == colonies
+
+def test_initialize_colonies_uses_warm_start_and_obl():
+    opt = make_optimizer(init_method="sobol", init_seed=1)
+    opt.warm_start_params = np.zeros(3)
+    opt._initialize_colonies(SerialPool())
+    assert len(opt.archives) == 2
+    assert opt.best_cost_global == 0.0
+    assert opt.n_evaluations + opt.cache_hits == 2 * 6
+
+    # Archivo sembrado: la colonia 0 evalúa sus semillas (completadas con el diseño), sin OBL
+    seeds = np.array([[0.1, 0.0, 0.0], [0.0, 0.2, 0.0]])
+    opt = ACOROptimizer(sphere, np.array([[-1.0, 1.0]] * 3), opt.config, np.zeros(3), initial_archive=seeds)
+    opt._initialize_colonies(SerialPool())
+    assert np.allclose(opt.archives[0][:3], np.vstack([np.zeros(3), seeds]))
+    assert opt.n_evaluations + opt.cache_hits == 2 * 6
+    # Con OBL el diseño sólo tiene la mitad de filas: también hacen falta sus opuestos para llenar el archivo
+    opt = ACOROptimizer(sphere, np.array([[-1.0, 1.0]] * 3), ACORConfig(n_ants=8, archive_size=10, max_iter=5, colonies_count=2),
+                        initial_archive=seeds[:1])
+    opt._initialize_colonies(SerialPool())
+    assert [len(a) for a in opt.archives] == [10, 10] and [len(c) for c in opt.colony_costs] == [10, 10]
+    opt.optimize()
+
+def test_collapsed_colony_is_retired_and_run_ends_when_all_converge():
+    from clases.colony_scheduler import ColonyScheduler
+    opt = make_optimizer(colony_patience=3)
+    opt._initialize_colonies(SerialPool())
+    scheduler = ColonyScheduler(2, 16)
+    opt.archives[0] = np.full((6, 3), 0.2)
+    opt.colony_costs[0] = np.full(6, sphere(opt.archives[0][0]))
+    opt.colony_stall = [3, 0]
+    opt.colony_diagnostics = [opt._colony_diagnostics(c, scheduler) for c in range(2)]
+    assert opt.colony_diagnostics[0]["max_spread"] == 0.0
+    assert opt._retire_converged_colonies(1, scheduler) is False
+    assert opt.colony_active == [False, True]
+    # La colonia retirada ahorra sus hormigas; repartirlas es opcional
+    assert scheduler.allocate().tolist() == [0, 8]
+
+    opt.archives[1] = np.full((6, 3), 0.1)
+    opt.colony_stall = [3, 3]
+    opt.colony_diagnostics = [opt._colony_diagnostics(c, scheduler) for c in range(2)]
+    assert opt._retire_converged_colonies(2, scheduler) is True
+
+def test_progress_events_carry_the_diagnostics_of_their_iteration():
+    opt = make_optimizer(progress_interval=0.0, max_iter=4)
+    seen = []
+    opt.progress_callback = lambda e: seen.append(([d["stall"] for d in e.colony_diagnostics], list(opt.colony_stall))) if not e.message else None
+    opt.optimize()
+    assert len(seen) == 4 and all(diag == stall for diag, stall in seen)
+
+def test_periodic_parameters_wrap_and_use_circular_distance():
+    from clases.acor_optimizer import wrap_periodic, normalized_distances
+    low, high = np.array([-np.pi, -1.0]), np.array([np.pi, 1.0])
+    periodic = np.array([True, False])
+    wrapped = wrap_periodic(np.array([[np.pi + 0.1, 2.0]]), low, high, periodic)
+    assert np.allclose(wrapped, [[-np.pi + 0.1, 1.0]])
+    d = normalized_distances(np.array([[np.pi - 0.01, 0.0]]), np.array([[-np.pi + 0.01, 0.0]]), low, high - low, periodic)
+    assert d[0, 0] < 0.01
+
+def test_evaluation_cache_skips_repeated_solutions():
+    opt = make_optimizer()
+    sols = np.array([[0.1, 0.2, 0.3], [0.1, 0.2, 0.3], [0.4, 0.5, 0.6]])
+    costs = opt._evaluate(SerialPool(), sols)
+    assert np.allclose(costs, [sphere(x) for x in sols])
+    assert opt.n_evaluations == 2 and opt.cache_hits == 1
+
+def test_batch_fitness_evaluates_whole_batches_in_process():
+    calls = []
+    def batch_sphere(X):
+        calls.append(len(X))
+        return np.sum(X ** 2, axis=1)
+    bounds = np.array([[-1.0, 1.0]] * 3)
+    config = ACORConfig(n_ants=8, archive_size=6, max_iter=3, colonies_count=2, n_workers=4)
+    opt = ACOROptimizer(None, bounds, config, batch_fitness=batch_sphere)
+    best, cost = opt.optimize()
+    assert np.isclose(cost, sphere(best))
+    assert sum(calls) == opt.n_evaluations and max(calls) > 1
+
+def test_parallelism_decision_is_recorded():
+    opt = make_optimizer(n_workers=1)
+    opt.optimize()
+    assert opt.parallel_info["mode"] == "serial" and opt.parallel_info["workers"] == 1
+    opt = make_optimizer(n_workers=4, parallel_mode="auto")
+    assert opt._choose_parallelism()["mode"] == "serial"  # la esfera es más barata que un envío
+
+def test_remote_mode_evaluates_through_tcp_workers():
+    opt = make_optimizer(n_workers=2, parallel_mode="remote")
+    best, cost = opt.optimize()
+    assert np.isclose(cost, sphere(best))
+    assert opt.parallel_info["mode"] == "remote" and opt.parallel_info["address"].startswith("127.0.0.1:")
+
+def test_progress_events_are_coalesced_and_carry_the_best_fit_curve():
+    events, curves = [], []
+    opt = make_optimizer(progress_interval=60.0)
+    opt.progress_callback = events.append
+    opt.trajectory_func = lambda p: curves.append(p.copy()) or (np.arange(3.0), p)
+    opt.optimize()
+    # Con un intervalo largo sólo sale la primera iteración y, al terminar, la última
+    iterations = [e for e in events if not e.message]
+    assert [e.iteration for e in iterations] == [1, 5]
+    assert iterations[-1].best_cost == opt.best_cost_global and iterations[-1].percent == 100
+    assert len(iterations[-1].colony_best) == 2
+    assert iterations[0].trajectory is not None and len(curves) in (1, 2)
+
+    events.clear(); curves.clear()
+    opt.config.progress_interval = 0.0
+    opt.optimize()
+    assert len([e for e in events if not e.message]) == 5
+    # La curva sólo se recalcula cuando cambia el mejor
+    assert len(curves) == len({tuple(p) for p in curves}) <= 5
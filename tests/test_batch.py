@@ -0,0 +1,22 @@
+import json
+import numpy as np
+from clases.helpers import ACORConfig
+from clases.batch import build_batch_jobs
+from clases.datasets import collect_dataset_paths
+
+def test_collect_dataset_paths_skips_lock_files(tmp_path):
+    for name in ["a.json", "b.xlsx", "~$b.xlsx", "notes.txt"]:
+        (tmp_path / name).write_text("")
+    found = [p.split("/")[-1] for p in collect_dataset_paths(str(tmp_path))]
+    assert found == ["a.json", "b.xlsx"]
+
+def test_build_batch_jobs_keeps_source_and_reports_errors(tmp_path):
+    good = tmp_path / "2020.json"
+    good.write_text(json.dumps({"t": [1, 2, 3], "I": [1, 2, 4], "N": 1000}))
+    bad = tmp_path / "2021.json"
+    bad.write_text(json.dumps({"t": [1, 2, 3], "I": [1, 2, 4]}))
+    jobs, errors = build_batch_jobs(str(tmp_path), ACORConfig(max_iter=5))
+    assert [j.name for j in jobs] == ["2020"]
+    assert jobs[0].source.endswith("2020.json") and jobs[0].N == 1000
+    assert np.allclose(jobs[0].I, [1, 2, 4])
+    assert errors and errors[0][0].endswith("2021.json")
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+from clases.bootstrap import bootstrap_series, run_bootstrap, refit_archive, align_terms
+from clases.helpers import ACORConfig
+from clases.seir_model import SEIRModel
+
+def make_model():
+    model = SEIRModel({'beta': 1, 'gamma': 0, 'sigma': 0})
+    model.N = 100000
+    model.engine = "discrete"
+    model.t_data = np.arange(1.0, 41.0)
+    theta = np.array([0.6, 0.3, 0.4, 0.5, -0.3, 0.2, 1.0])
+    model.I_data = np.full(40, 50.0)
+    clean = model.simulate(theta)[:, 2]
+    model.I_data = clean + 0.02 * clean.max() * np.random.default_rng(0).standard_normal(40)
+    model.I_data[0] = clean[0]
+    return model, theta
+
+def test_bootstrap_series_keep_the_initial_condition_and_the_noise_level():
+    model, theta = make_model()
+    fitted = model.simulate(theta)[:, 2]
+    rng = np.random.default_rng(1)
+    for kind in ("residual", "parametric"):
+        series = bootstrap_series(model, theta, 300, kind, rng)
+        assert series.shape == (300, 40) and np.all(series[:, 0] == model.I_data[0]) and np.all(series >= 0)
+        spread = np.std(series[:, 1:] - fitted[1:])
+        assert 0.8 < spread / np.std(model.I_data[1:] - fitted[1:]) < 1.5
+    with pytest.raises(ValueError):
+        bootstrap_series(model, theta, 3, "jackknife")
+
+def test_run_bootstrap_refits_in_parallel_from_the_best_fit():
+    model, theta = make_model()
+    config = ACORConfig(n_ants=10, archive_size=8, colonies_count=3)
+    seen = []
+    archive = theta + 0.01 * np.random.default_rng(5).standard_normal((12, model.DIM))
+    result = run_bootstrap(model, theta, config, n_samples=6, refit_iter=4, max_workers=2, seed=2,
+                           callback=lambda done, total, r: seen.append((done, total)),
+                           archive=archive, archive_costs=model.fitness_batch(archive))
+    assert sorted(seen) == [(d, 6) for d in range(1, 7)]
+    assert result.samples.shape == (6, model.DIM) and result.n_failed == 0
+    assert np.all(result.lower <= result.median) and np.all(result.median <= result.upper)
+    # Las fases se expresan cerca del mejor ajuste, sin saltos de 2π
+    phase = model.periodic_mask
+    assert np.all(np.abs(result.samples[:, phase] - theta[phase]) <= np.pi)
+    assert [row[0] for row in result.rows()] == model.labels
+
+def test_refit_archive_and_term_alignment():
+    model, theta = make_model()
+    archive = theta + 0.01 * np.random.default_rng(3).standard_normal((5, model.DIM))
+    costs = np.array([3.0, 1.0, np.inf, 2.0, 0.5])
+    seeds = refit_archive(model, theta, 8, np.vstack([theta, archive]), np.concatenate([[0.0], costs]), rng=np.random.default_rng(4))
+    # Los mejores puntos finitos del archivo (sin repetir el mejor ajuste) y el resto alrededor de theta
+    assert seeds.shape == (7, model.DIM) and np.allclose(seeds[:4], archive[[4, 1, 3, 0]])
+    assert np.all(np.abs(seeds[4:] - theta) < 0.1 * (model.HIGH - model.LOW))
+
+    model = SEIRModel({'beta': 2, 'gamma': 0, 'sigma': 0})
+    reference = np.array([0.6, 0.3, 0.40, 0.5, 0.2, 0.42, -0.3, 0.2, 0.2, 1.0])
+    swapped = reference[[0, 4, 5, 6, 1, 2, 3, 7, 8, 9]] + 1e-3
+    swapped[3] += 2 * np.pi - 1e-3  # la fase equivale a la del término que le corresponde
+    aligned = align_terms(model, np.vstack([reference, swapped]), reference)
+    assert np.allclose(aligned[0], reference)
+    assert np.allclose(aligned[1][[1, 2, 4, 5]], reference[[1, 2, 4, 5]] + 1e-3)
+    assert np.isclose(np.cos(aligned[1][6]), np.cos(reference[6]))
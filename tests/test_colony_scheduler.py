@@ -0,0 +1,42 @@
+import numpy as np
+from clases.colony_scheduler import ColonyScheduler
+
+def test_allocation_preserves_total_budget():
+    scheduler = ColonyScheduler(4, 360)
+    alloc = scheduler.allocate()
+    assert alloc.sum() == 360
+    assert np.all(alloc == 90)
+
+def test_improving_colony_gets_more_ants_but_others_keep_minimum():
+    scheduler = ColonyScheduler(3, 300, min_share=0.3)
+    for _ in range(20):
+        alloc = scheduler.allocate()
+        scheduler.update(0, 100.0, 90.0, alloc[0])
+        scheduler.update(1, 100.0, 100.0, alloc[1])
+        scheduler.update(2, 100.0, 100.0, alloc[2])
+        scheduler.step()
+    alloc = scheduler.allocate()
+    assert alloc.sum() == 300
+    assert alloc[0] > alloc[1]
+    assert alloc[1] >= 30 and alloc[2] >= 30
+
+def test_colony_without_valid_evaluations_does_not_poison_rewards():
+    scheduler = ColonyScheduler(3, 30)
+    scheduler.update(0, np.inf, 5.0, 10)
+    scheduler.update(1, 100.0, 99.0, 10)
+    scheduler.update(2, np.inf, np.inf, 10)
+    assert np.all(np.isfinite(scheduler.rewards))
+    assert scheduler.rewards[0] > scheduler.rewards[1] > scheduler.rewards[2] == 0.0
+    alloc = scheduler.allocate()
+    assert alloc.sum() == 30 and alloc[0] > alloc[2]
+
+def test_retired_colony_budget_is_saved_unless_redistributed():
+    scheduler = ColonyScheduler(3, 30)
+    scheduler.retire(1)
+    alloc = scheduler.allocate()
+    assert alloc[1] == 0 and alloc.sum() == 20
+    scheduler.retire(1)
+    assert scheduler.allocate().sum() == 20
+    shared = ColonyScheduler(3, 30)
+    shared.retire(1, redistribute=True)
+    assert shared.allocate().sum() == 30
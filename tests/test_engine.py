@@ -0,0 +1,65 @@
+from multiprocessing.connection import Client
+import numpy as np
+import pytest
+from clases.engine import EngineServer, launch_engine, save_session, load_session, forget_session
+from clases.helpers import ACORConfig
+from clases.seir_model import SEIRModel
+
+def make_model():
+    model = SEIRModel()
+    model.N = 100000
+    model.engine = "discrete"
+    model.t_data = np.arange(1.0, 53.0)
+    model.I_data = 50 + 400 * np.exp(-((model.t_data - 20) / 6) ** 2)
+    return model
+
+def events_until(conn, kind, timeout=60.0):
+    seen = []
+    while conn.poll(timeout):
+        event = conn.recv()
+        seen.append(event)
+        if event[0] == kind: return seen
+    raise AssertionError(f"no llegó el evento {kind!r}: {[e[0] for e in seen]}")
+
+def test_engine_runs_out_of_process_and_survives_a_client_restart():
+    address, authkey = launch_engine()
+    conn = Client(address, authkey=authkey)
+    try:
+        assert events_until(conn, "state")[-1][1]["state"] == "idle"
+        config = ACORConfig(n_ants=8, archive_size=6, max_iter=3, colonies_count=2)
+        conn.send(("start", {"model": make_model(), "config": config}))
+        seen = events_until(conn, "finished")
+        assert any(kind == "progress" for kind, _ in seen)
+        optimizer = seen[-1][1]
+        assert np.isfinite(optimizer.best_cost_global) and len(optimizer.history_best_cost) == 3
+
+        # Una corrida larga sigue en el motor aunque la interfaz se desconecte
+        conn.send(("start", {"model": make_model(), "config": ACORConfig(n_ants=8, archive_size=6, max_iter=100000, colonies_count=2)}))
+        events_until(conn, "progress")
+        conn.send(("pause", None))
+        conn.close()
+        conn = Client(address, authkey=authkey)
+        state = events_until(conn, "state")[-1][1]
+        assert state["state"] == "paused" and state["progress"] is not None
+        assert state["model"].DIM == make_model().DIM
+        conn.send(("stop", None))
+        assert events_until(conn, "finished")[-1][1].best_cost_global < float("inf")
+    finally:
+        conn.send(("shutdown", None))
+        conn.close()
+
+def test_engine_server_refuses_to_listen_without_a_key():
+    with pytest.raises(ValueError):
+        EngineServer(authkey=None)
+
+def test_engine_session_is_private_to_the_user(tmp_path):
+    import os, stat
+    path = str(tmp_path / "sesion" / "engine.json")
+    assert load_session(path) is None
+    save_session(("127.0.0.1", 5000), b"\x01\x02", path)
+    assert load_session(path) == (("127.0.0.1", 5000), b"\x01\x02")
+    if os.name == "posix":
+        assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+    forget_session(path)
+    assert load_session(path) is None
+    forget_session(path)
@@ -0,0 +1,78 @@
+import os
+import time
+import numpy as np
+import psutil
+from threadpoolctl import threadpool_info
+from clases.evaluators import (EvaluationPool, SerialPool, calibrate, check_deadline, default_worker_count,
+                               make_pool, timed_call, worker_cores, THREAD_ENV_VARS)
+
+def cooperative(x):
+    """Duerme `x` segundos consultando el tiempo límite, como hace la EDO del modelo."""
+    end = time.monotonic() + x
+    while time.monotonic() < end:
+        check_deadline()
+        time.sleep(0.01)
+    return x
+
+def stubborn(x):
+    """Duerme `x` segundos sin consultar el tiempo límite."""
+    time.sleep(x)
+    return x
+
+def worker_report(_):
+    """Hilos de BLAS/OpenMP y núcleos permitidos dentro del worker."""
+    return (os.environ.get("OMP_NUM_THREADS"), max((p["num_threads"] for p in threadpool_info()), default=1),
+            tuple(psutil.Process().cpu_affinity()))
+
+def test_timed_call_abandons_cooperative_evaluations():
+    assert timed_call(cooperative, 0.0, timeout=1.0) == (0.0, False)
+    start = time.monotonic()
+    cost, timed_out = timed_call(cooperative, 5.0, timeout=0.1)
+    assert cost == float("inf") and timed_out
+    assert time.monotonic() - start < 1.0
+
+def test_serial_pool_counts_timeouts():
+    pool = SerialPool(timeout=0.1)
+    assert pool.map(cooperative, [0.0, 5.0, 0.0]) == [0.0, float("inf"), 0.0]
+    assert pool.timeouts == 1
+
+def test_evaluation_pool_keeps_order_and_penalizes_slow_evaluations():
+    with EvaluationPool(2, timeout=0.3, grace=1.0) as pool:
+        assert pool.map(cooperative, [0.05, 5.0, 0.0, 0.1]) == [0.05, float("inf"), 0.0, 0.1]
+        assert pool.timeouts == 1 and pool.restarts == 0
+        # Una evaluación que ignora el tiempo límite hace saltar el reinicio del pool
+        costs = pool.map(stubborn, [0.0, 30.0, 0.0])
+        assert costs[0] == 0.0 and costs[2] == 0.0 and costs[1] == float("inf")
+        assert pool.restarts >= 1
+        assert np.allclose(pool.map(stubborn, [0.0, 0.01]), [0.0, 0.01])
+
+def test_calibration_keeps_cheap_functions_serial():
+    info = calibrate(lambda x: 0.0, np.zeros((5, 3)), n_workers=4, batch_size=64)
+    assert info["mode"] == "serial" and info["workers"] == 1
+    assert info["ipc_overhead"] > info["eval_time"]
+
+def test_calibration_detects_gil_releasing_functions():
+    # time.sleep libera el GIL, como una integración fuera de Python
+    info = calibrate(lambda x: time.sleep(0.02), np.zeros((5, 3)), n_workers=4, batch_size=64)
+    assert info["thread_speedup"] > 1.5
+    assert info["mode"] in ("thread", "process") and info["workers"] == 4
+
+def test_thread_pool_evaluates_in_process():
+    calls = []
+    with make_pool(3, timeout=0.2, mode="thread") as pool:
+        assert pool.map(lambda x: calls.append(x) or x, [1.0, 2.0, 3.0]) == [1.0, 2.0, 3.0]
+        assert pool.map(cooperative, [0.0, 5.0]) == [0.0, float("inf")] and pool.timeouts == 1
+    with EvaluationPool(2, chunksize=3) as pool:
+        assert pool.map(stubborn, [0.0] * 7) == [0.0] * 7
+    assert sorted(calls) == [1.0, 2.0, 3.0]
+
+def test_workers_limit_thread_pools_and_leave_reserved_cores():
+    before = {var: os.environ.get(var) for var in THREAD_ENV_VARS}
+    with EvaluationPool(2, pin=True, reserved_cores=1) as pool:
+        reports = pool.map(worker_report, range(4))
+    assert {var: os.environ.get(var) for var in THREAD_ENV_VARS} == before
+    cores = worker_cores(1)
+    for omp, blas_threads, affinity in reports:
+        assert omp == "1" and blas_threads == 1
+        assert len(affinity) == 1 and affinity[0] in cores
+    assert default_worker_count(reserved_cores=1) <= max(1, (psutil.cpu_count(logical=True) or 1) - 1)
@@ -0,0 +1,125 @@
+import numpy as np
+import pytest
+from clases.evaluators import SerialPool, make_pool
+from clases.mcmc import BatchLogPosterior, run_sampler, open_chain_backend, chain_diagnostics, initial_walkers
+from clases.seir_model import SEIRModel
+
+def make_model(engine="discrete"):
+    model = SEIRModel()
+    model.N = 100000
+    model.engine = engine
+    model.t_data = np.arange(1.0, 53.0)
+    model.I_data = 50 + 400 * np.exp(-((model.t_data - 20) / 6) ** 2)
+    return model
+
+def test_batch_log_posterior_matches_single_evaluations():
+    model = make_model()
+    rng = np.random.default_rng(0)
+    thetas = model.LOW + rng.random((4, model.DIM)) * (model.HIGH - model.LOW)
+    thetas[1, 0] = model.HIGH[0] + 1.0  # fuera de los límites
+    logp = BatchLogPosterior(model)(thetas)
+    assert logp[1] == -np.inf
+    assert np.allclose(logp[[0, 2, 3]], [-model.fitness(t) for t in thetas[[0, 2, 3]]])
+    with make_pool(2, mode="thread") as pool:
+        pooled = BatchLogPosterior(model, pool)
+        assert np.allclose(pooled(thetas), logp)
+        assert pooled.n_evaluations == 3
+
+def test_batch_log_posterior_uses_the_guarded_bounds():
+    model = make_model()
+    model.min_samples_per_period = 40
+    model.frequency_guard = "bounds"
+    w = model.frequency_indices[0]
+    theta = 0.5 * (model.LOW + model.HIGH)
+    theta[w] = min(model.HIGH[w], 2 * model.max_frequency())
+    posterior = BatchLogPosterior(model)
+    assert np.allclose(posterior.high, model.guarded_bounds()[:, 1])
+    # Fuera de los límites con guardia: se descarta sin integrar
+    assert posterior(theta[None])[0] == -np.inf and posterior.n_evaluations == 0
+
+def test_run_sampler_reports_steps_per_second():
+    model = make_model()
+    rng = np.random.default_rng(1)
+    center = model.LOW + 0.5 * (model.HIGH - model.LOW)
+    p0 = center + 1e-4 * rng.standard_normal((2 * model.DIM + 2, model.DIM))
+    reports = []
+    log_prob = BatchLogPosterior(model, SerialPool())
+    sampler = run_sampler(log_prob, p0, 5, lambda *r: reports.append(r), report_interval=0.0)
+    assert sampler.get_chain().shape == (5, len(p0), model.DIM)
+    assert [r[0] for r in reports] == [1, 2, 3, 4, 5] and all(r[2] > 0 for r in reports)
+    # emcee evalúa también el estado inicial
+    assert sampler.steps_per_second > 0 and log_prob.n_evaluations == 6 * len(p0)
+
+def gaussian(thetas):
+    return -0.5 * np.sum(np.atleast_2d(thetas) ** 2, axis=1)
+
+def test_chunked_backend_streams_to_disk_and_resumes(tmp_path):
+    p0 = np.random.default_rng(2).standard_normal((8, 3))
+    np.random.seed(3)
+    memory = run_sampler(gaussian, p0, 25)
+
+    # Misma semilla: la cadena en disco (trozos de 10 pasos) coincide con la de memoria
+    np.random.seed(3)
+    path = tmp_path / "cadena"
+    stored = run_sampler(gaussian, p0, 25, backend=open_chain_backend(path, chunk_steps=10, labels=["a", "b", "c"]))
+    assert sorted(f.name for f in path.iterdir() if f.name.startswith("chunk_")) == \
+        ["chunk_000000.npz", "chunk_000001.npz", "chunk_000002.npz"]
+    assert np.array_equal(stored.get_chain(discard=4, thin=3), memory.get_chain(discard=4, thin=3))
+    assert np.array_equal(stored.get_log_prob(flat=True), memory.get_log_prob(flat=True))
+
+    # Detenida a los 12 pasos y reabierta desde disco, se completa hasta 30 en total
+    calls = []
+    partial = run_sampler(gaussian, p0, 30, should_stop=lambda: calls.append(1) or len(calls) >= 12,
+                          backend=open_chain_backend(tmp_path / "parcial", chunk_steps=10))
+    assert partial.iteration == 12
+    reopened = open_chain_backend(tmp_path / "parcial")
+    assert reopened.iteration == 12 and reopened.shape == (8, 3)
+    viewed = open_chain_backend(tmp_path / "parcial", read_only=True)
+    assert viewed.iteration == 12 and np.array_equal(viewed.get_chain(), reopened.get_chain())
+    # Ver una carpeta inexistente no la crea
+    with pytest.raises(FileNotFoundError):
+        open_chain_backend(tmp_path / "errata", read_only=True)
+    assert not (tmp_path / "errata").exists()
+    assert np.array_equal(reopened.get_chain(), partial.get_chain())
+    resumed = run_sampler(gaussian, None, 30, backend=reopened)
+    assert resumed.get_chain().shape == (30, 8, 3)
+    assert np.array_equal(resumed.get_chain()[:12], partial.get_chain())
+
+def test_compact_backend_stores_float32(tmp_path):
+    p0 = np.random.default_rng(4).standard_normal((6, 2))
+    sampler = run_sampler(gaussian, p0, 5, backend=open_chain_backend(tmp_path, compact=True))
+    chain = open_chain_backend(tmp_path).get_chain()
+    assert chain.dtype == np.float32 and chain.shape == (5, 6, 2)
+    assert np.allclose(chain, sampler.get_chain(), atol=1e-6)
+
+def test_sampler_stops_once_the_chain_is_long_compared_to_tau():
+    np.random.seed(5)
+    p0 = np.random.default_rng(5).standard_normal((16, 2))
+    estimates = []
+    sampler = run_sampler(gaussian, p0, 20000, tau_factor=20, check_interval=50, tau_tolerance=0.2,
+                          autocorr_callback=lambda *e: estimates.append(e))
+    assert sampler.converged and sampler.iteration < 20000
+    step, tau, converged = estimates[-1]
+    assert converged and step == sampler.iteration and np.all(20 * tau < step)
+    diag = chain_diagnostics(sampler)
+    assert diag["burn"] == int(np.ceil(2 * np.max(tau))) and diag["thin"] == max(1, int(0.5 * np.min(tau)))
+    assert diag["chain_over_tau"] > 20 and diag["n_effective"] > 0 and diag["converged"]
+
+def test_initial_walkers_come_from_the_archive_and_fall_back_to_a_ball():
+    rng = np.random.default_rng(6)
+    low, high = np.zeros(3), np.ones(3)
+    good = rng.random((10, 3))
+    archive = np.vstack([good, good[:4], [[2.0, 0.5, 0.5]]])  # duplicados por migración y un punto fuera de límites
+    costs = np.concatenate([np.arange(10.0), np.arange(4.0), [0.0]])
+    pos, n_archive = initial_walkers(8, good[0], low, high, archive, costs, rng=rng)
+    assert n_archive == 8 and pos.shape == (8, 3)
+    assert all(any(np.array_equal(p, g) for g in good) for p in pos)
+    assert len(np.unique(pos, axis=0)) == 8
+
+    # Más caminantes que puntos: el resto se reparte alrededor de los elegidos, dentro de los límites
+    pos, n_archive = initial_walkers(30, good[0], low, high, archive, costs, rng=rng)
+    assert n_archive == 10 and pos.shape == (30, 3) and len(np.unique(pos, axis=0)) == 30
+    assert np.all((low <= pos) & (pos <= high))
+
+    pos, n_archive = initial_walkers(6, good[0], low, high, rng=rng)
+    assert n_archive == 0 and np.allclose(pos, good[0], atol=1e-3)
@@ -0,0 +1,12 @@
+from clases.model_selection import harmonic_configs, nested_parents
+
+def test_harmonic_configs_cover_all_structures_in_level_order():
+    configs = harmonic_configs(2)
+    assert len(configs) == 27
+    levels = [sum(c.values()) for c in configs]
+    assert levels == sorted(levels)
+    assert configs[0] == {'beta': 0, 'gamma': 0, 'sigma': 0}
+
+def test_nested_parents_remove_one_term():
+    parents = nested_parents({'beta': 1, 'gamma': 0, 'sigma': 2})
+    assert parents == [{'beta': 0, 'gamma': 0, 'sigma': 2}, {'beta': 1, 'gamma': 0, 'sigma': 1}]
@@ -0,0 +1,61 @@
+import threading
+import time
+from multiprocessing import get_context
+import numpy as np
+import pytest
+from clases.remote import RemotePool, parse_address, run_worker
+from clases.evaluators import check_deadline
+
+def nap(x):
+    """Duerme `x` segundos consultando el tiempo límite y devuelve `x`."""
+    end = time.monotonic() + x
+    while time.monotonic() < end:
+        check_deadline()
+        time.sleep(0.01)
+    return x
+
+def square(x):
+    return float(np.sum(np.asarray(x) ** 2))
+
+def start_worker(address, authkey):
+    process = get_context("spawn").Process(target=run_worker, args=(address, authkey), kwargs={"heartbeat": 0.2}, daemon=True)
+    process.start()
+    return process
+
+def test_parse_address():
+    assert parse_address("127.0.0.1:5000") == ("127.0.0.1", 5000)
+    assert parse_address(":0") == ("127.0.0.1", 0)
+
+def test_remote_pool_keeps_order_and_penalizes_slow_evaluations():
+    with RemotePool(local_workers=2, timeout=0.3, chunksize=2) as pool:
+        xs = [np.full(3, i, dtype=float) for i in range(7)]
+        assert pool.map(square, xs) == [square(x) for x in xs]
+        assert pool.map(nap, [0.0, 5.0, 0.05]) == [0.0, float("inf"), 0.05]
+        assert pool.timeouts == 1
+        assert pool.status()["workers"] == 2
+
+def test_remote_pool_survives_workers_leaving_and_joining():
+    with RemotePool(local_workers=0, worker_timeout=1.0) as pool:
+        first = start_worker(pool.connect_address, pool.authkey)
+        joined = []
+
+        def swap():
+            # El primer worker desaparece a mitad de lote sin avisar y otro ocupa su lugar
+            first.kill()
+            joined.append(start_worker(pool.connect_address, pool.authkey))
+
+        timer = threading.Timer(1.5, swap)
+        timer.start()
+        try:
+            assert pool.map(nap, [0.3] * 8) == [0.3] * 8
+        finally:
+            timer.cancel()
+            for process in joined: process.kill()
+        assert joined
+
+def test_remote_pool_generates_a_key_and_refuses_public_binds_without_one():
+    with RemotePool() as pool:
+        assert len(pool.authkey) == 32 and pool.authkey != b"acor-seir"
+    for key in (None, "", "acor-seir"):
+        with pytest.raises(ValueError):
+            RemotePool("0.0.0.0:0", key)
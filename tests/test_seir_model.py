@@ -1,5 +1,6 @@
 
 import numpy as np
+from clases.evaluators import make_pool
 from clases.seir_model import SEIRModel
 
 def test_seir_model_initialization():
@@ -51,3 +52,187 @@ def test_seir_harmonic_equation_runs():
     assert len(derivatives) == 4
     assert all(isinstance(d, float) for d in derivatives)
 
+
+def test_phase_parameters_are_periodic():
+    model = SEIRModel()
+    mask = model.periodic_mask
+    assert [model.labels[i] for i in np.flatnonzero(mask)] == ["p1", "p2", "p3", "p4", "p5", "p6"]
+    assert np.allclose(model.bounds[mask], [-np.pi, np.pi])
+
+def test_canonicalize_preserves_rates_and_orders_terms():
+    model = SEIRModel()
+    rng = np.random.default_rng(0)
+    params = rng.uniform(model.LOW, model.HIGH)
+    canon = model.canonicalize(params)
+    for terms in model.harmonic_groups.values():
+        assert all(canon[w] >= 0 and canon[b] >= 0 for b, w, _ in terms)
+        freqs = [canon[w] for _, w, _ in terms]
+        assert freqs == sorted(freqs)
+
+    t = np.linspace(0, 52, 200)
+    def rate(p, terms, base):
+        return p[base] + sum(p[b] * np.cos(p[w] * t + p[ph]) for b, w, ph in terms)
+    for name, base in [('beta', 0), ('gamma', 7), ('sigma', 14)]:
+        terms = model.harmonic_groups[name]
+        assert np.allclose(rate(params, terms, base), rate(canon, terms, base))
+
+def test_canonicalize_accepts_batches():
+    model = SEIRModel()
+    batch = np.tile(model.bounds.mean(axis=1), (4, 1))
+    batch[:, 2] = -0.5
+    canon = model.canonicalize(batch)
+    assert canon.shape == batch.shape
+    assert np.all(canon[:, model.harmonic_groups['beta'][1][1]] >= 0)
+
+def test_expand_params_pads_zero_amplitude_harmonics():
+    simple = SEIRModel({'beta': 1, 'gamma': 0, 'sigma': 1})
+    rich = SEIRModel({'beta': 2, 'gamma': 1, 'sigma': 1})
+    params = np.arange(simple.DIM, dtype=float) + 1.0
+    expanded = rich.expand_params(params, simple.harmonic_config)
+    assert len(expanded) == rich.DIM
+    values = dict(zip(rich.labels, expanded))
+    for label, value in zip(simple.labels, params):
+        if label.startswith(('w', 'p')): continue
+        assert values[label] == value
+    assert values['b2'] == 0.0 and values['g1'] == 0.0
+    assert expanded[-1] == params[-1]
+
+def test_harmonic_rates_match_ode_right_hand_side():
+    model = SEIRModel()
+    model.N = 1000
+    params = model.bounds.mean(axis=1) + 0.1
+    beta, gamma, sigma = model.harmonic_rates(params, [0.0, 3.5])
+    y = (900.0, 50.0, 40.0, 10.0)
+    dS, dE, dI, dR = model.seir_harmonic(y, 3.5, *params[:-1])
+    assert np.isclose(dS, -beta[0, 1] * 900.0 * 40.0 / 1000)
+    assert np.isclose(dR, gamma[0, 1] * 40.0)
+
+def test_joint_fit_shares_declared_parameters():
+    model = SEIRModel({'beta': 1, 'gamma': 0, 'sigma': 0})
+    t = np.arange(1.0, 11.0)
+    model.set_series([{'t': t, 'I': np.linspace(5, 50, 10), 'N': 1000, 'name': 'a'},
+                      {'t': t, 'I': np.linspace(8, 20, 10), 'N': 2000, 'name': 'b'}], shared_params=['sigma0', 'k'])
+    labels, bounds, index_map = model.joint_layout()
+    assert len(labels) == 2 + 2 * (model.DIM - 2)
+    assert 'k' in labels and 'beta0[a]' in labels and 'beta0[b]' in labels
+    joint = bounds.mean(axis=1)
+    P = model.split_joint_params(joint)
+    assert P.shape == (2, model.DIM)
+    assert np.all(P[0, -1] == P[1, -1])
+
+    # La integración conjunta coincide con integrar cada serie por separado
+    preds = model.joint_predictions(joint)
+    for s, serie in enumerate(model.series):
+        single = SEIRModel({'beta': 1, 'gamma': 0, 'sigma': 0})
+        single.t_data, single.I_data, single.N = serie['t'], serie['I'], serie['N']
+        single.set_initial_conditions(P[s, -1])
+        from scipy.integrate import odeint
+        ref = odeint(single.seir_harmonic, single.y0, single.t_data, args=tuple(P[s, :-1]))[:, 2]
+        assert np.allclose(preds[s], ref, rtol=1e-4)
+    assert np.isfinite(model.joint_fitness(joint))
+
+def make_weekly_model():
+    model = SEIRModel()
+    model.N = 100000
+    model.t_data = np.arange(1.0, 53.0)
+    model.I_data = 50 + 400 * np.exp(-((model.t_data - 20) / 6) ** 2)
+    return model
+
+def test_discrete_engine_matches_odeint():
+    model = make_weekly_model()
+    rng = np.random.default_rng(1)
+    P = model.LOW + rng.random((20, model.DIM)) * (model.HIGH - model.LOW)
+    errors = [model.engine_error(p) for p in P]
+    assert np.median(errors) < 1e-3
+    # Las tasas extremas necesitan más subpasos; el error disminuye con h^4
+    assert max(model.engine_error(p, substeps=16) for p in P) < 2e-2
+
+def test_fitness_batch_matches_single_evaluations():
+    model = make_weekly_model()
+    model.engine = "discrete"
+    model.loss_type = "Huber"
+    rng = np.random.default_rng(2)
+    P = model.LOW + rng.random((6, model.DIM)) * (model.HIGH - model.LOW)
+    batch = model.fitness_batch(P)
+    assert batch.shape == (6,)
+    assert np.allclose(batch, [model.fitness(p) for p in P])
+    # Con el motor discreto, el costo queda cerca del de odeint
+    model.engine = "odeint"
+    assert np.allclose(batch, model.fitness_batch(P), rtol=5e-2)
+
+def test_frequency_guard_rejects_unresolvable_harmonics_before_integrating():
+    model = make_weekly_model()
+    # Por defecto la guardia es más estricta que los límites ±1.5 con datos semanales
+    limit = model.max_frequency()
+    assert np.isclose(limit, 2 * np.pi / 8) and limit < model.bounds[model.frequency_indices, 1].min()
+    assert model.step_budget is None
+    params = model.bounds.mean(axis=1)
+    fast = params.copy(); fast[model.frequency_indices[0]] = 1.4
+    assert model.frequencies_resolvable(params) and not model.frequencies_resolvable(fast)
+    assert np.isfinite(model.fitness(fast))
+    # Con muestreo semanal 1.4 rad/semana es indistinguible (en los datos) de 2π - 1.4 ≈ 4.9
+    t = model.t_data
+    assert np.allclose(np.cos(1.4 * t + 0.3), np.cos((2 * np.pi - 1.4) * t - 0.3))
+    model.frequency_guard = "penalty"
+    assert model.fitness(fast) == float("inf") and np.isfinite(model.fitness(params))
+    model.frequency_guard = "bounds"
+    guarded = model.guarded_bounds()
+    assert np.allclose(guarded[model.frequency_indices], [-limit, limit])
+    assert np.allclose(np.delete(guarded, model.frequency_indices, axis=0), np.delete(model.bounds, model.frequency_indices, axis=0))
+
+def test_step_budget_abandons_expensive_integrations():
+    model = make_weekly_model()
+    params = model.bounds.mean(axis=1)
+    model.step_budget = 10
+    assert model.fitness(params) == float("inf")
+    model.step_budget = None
+    assert np.isfinite(model.fitness(params))
+
+def test_fitness_is_stateless_and_thread_safe():
+    from concurrent.futures import ThreadPoolExecutor
+    model = make_weekly_model()
+    rng = np.random.default_rng(3)
+    P = model.LOW + rng.random((16, model.DIM)) * (model.HIGH - model.LOW)
+    serial = [model.fitness(p) for p in P]
+    assert model.y0 is None
+    with ThreadPoolExecutor(4) as ex:
+        assert list(ex.map(model.fitness, P)) == serial
+    # Los datos y la población se pueden pasar de forma explícita
+    other = model.fitness(P[0], t=model.t_data[:20], I=model.I_data[:20] * 2, N=2 * model.N)
+    assert np.isfinite(other) and other != serial[0]
+    assert np.allclose(model.simulate(P[0])[:, 2], model.simulate(P[0], engine="discrete")[:, 2], rtol=0.1, atol=1.0)
+
+def test_simulate_ensemble_matches_single_runs_and_extends_past_the_data():
+    model = make_weekly_model()
+    rng = np.random.default_rng(3)
+    center = model.LOW + 0.5 * (model.HIGH - model.LOW)
+    P = center + 0.02 * (model.HIGH - model.LOW) * rng.standard_normal((7, model.DIM))
+    t = np.linspace(model.t_data[0], model.t_data[-1] + 8, 120)
+    for engine in ("odeint", "discrete"):
+        model.engine = engine
+        ensemble = model.simulate_ensemble(P, t, batch_size=3)
+        single = np.array([model.simulate(p, t) for p in P])
+        assert ensemble["I"].shape == (7, 120)
+        assert np.allclose(ensemble["I"], single[:, :, 2], rtol=1e-3, atol=1e-3 * single[:, :, 2].max())
+        beta, gamma, _ = model.harmonic_rates(P, t)
+        assert np.allclose(ensemble["Rt"], beta * single[:, :, 0] / (gamma * model.N), rtol=1e-3)
+
+    # Una muestra que odeint no puede integrar sólo anula su propia fila, también repartiendo en un pool
+    model.engine = "odeint"
+    bad = P.copy()
+    bad[2, 0] = np.nan
+    with make_pool(2, mode="thread") as pool:
+        ensemble = model.simulate_ensemble(bad, t, pool=pool, chunk_size=3)
+        # Los trozos usan siempre la misma función: el pool no se reinicia entre llamadas
+        workers = pool._pool
+        again = model.simulate_ensemble(P, t, pool=pool, chunk_size=3)
+        assert pool._pool is workers and pool.restarts == 0
+    assert np.all(np.isfinite(again["I"]))
+    failed = ~np.all(np.isfinite(ensemble["I"]), axis=1)
+    assert failed.tolist() == [i == 2 for i in range(7)]
+    single = np.array([model.simulate(p, t) for p in P])
+    assert np.allclose(ensemble["I"][~failed], single[~failed, :, 2], rtol=1e-3, atol=1e-3 * single[:, :, 2].max())
+
+    bands = model.predictive_bands(P, t, quantiles=(0.1, 0.5, 0.9))
+    assert bands["n"] == 7 and bands["I"].shape == (3, 120) and bands["Rt"].shape == (3, 120)
+    assert np.all(bands["I"][0] <= bands["I"][1]) and np.all(bands["I"][1] <= bands["I"][2])
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+from clases.smc import run_smc, smc_posterior, archive_reference, Reference
+from clases.seir_model import SEIRModel
+from tests.test_bootstrap import make_model
+
+SIGMA = 0.5
+
+def gaussian_log_likelihood(X):
+    # Normalizada: con el prior uniforme en [-10, 10]^2 la evidencia es 1/400
+    return -0.5 * np.sum(X ** 2, axis=1) / SIGMA ** 2 - np.log(2 * np.pi * SIGMA ** 2)
+
+def test_smc_recovers_the_evidence_from_the_prior_and_from_a_reference():
+    low, high = -10 * np.ones(2), 10 * np.ones(2)
+    calls = []
+    def log_l(X):
+        calls.append(len(X))
+        return gaussian_log_likelihood(X)
+    result = run_smc(log_l, low, high, 1000, rng=np.random.default_rng(0))
+    assert result.completed and result.betas[0] == 0.0 and result.betas[-1] == 1.0
+    assert abs(result.log_evidence + np.log(400)) < 0.3
+    assert np.allclose(result.samples.std(axis=0), SIGMA, rtol=0.15)
+    # Una evaluación por lote: la población inicial y cada paso de Metropolis
+    assert calls[0] == 1000 and max(calls) <= 1000 and sum(calls) == result.n_evaluations
+
+    points = np.random.default_rng(1).normal(0.3, 0.2, (40, 2))
+    reference = archive_reference(points, np.ones(40), np.zeros(2), low, high, n_data=50)
+    assert not reference.is_prior
+    guided = run_smc(gaussian_log_likelihood, low, high, 1000, reference, rng=np.random.default_rng(2))
+    assert abs(guided.log_evidence + np.log(400)) < 0.3 and guided.n_stages < result.n_stages
+
+def test_smc_keeps_separated_modes_and_can_be_stopped():
+    low, high = -10 * np.ones(2), 10 * np.ones(2)
+    def bimodal(X):
+        modes = [-0.5 * np.sum((X - c) ** 2, axis=1) / SIGMA ** 2 for c in (4.0, -4.0)]
+        return np.logaddexp(*modes) - np.log(4 * np.pi * SIGMA ** 2)
+    result = run_smc(bimodal, low, high, 2000, rng=np.random.default_rng(3))
+    assert 0.4 < np.mean(result.samples[:, 0] > 0) < 0.6
+    assert abs(result.log_evidence + np.log(400)) < 0.3
+
+    stages = []
+    stopped = run_smc(bimodal, low, high, 200, rng=np.random.default_rng(4),
+                      callback=lambda *args: stages.append(args), should_stop=lambda: len(stages) >= 2)
+    assert not stopped.completed and stopped.n_stages == 2 and len(stages) == 2
+
+def test_smc_posterior_on_the_model_requires_mse():
+    model, theta = make_model()
+    archive = theta + 0.02 * np.random.default_rng(5).standard_normal((30, model.DIM))
+    result = smc_posterior(model, 300, archive=archive, costs=model.fitness_batch(archive), best_params=theta,
+                           max_moves=5, rng=np.random.default_rng(6))
+    assert result.labels == model.labels and result.samples.shape == (300, model.DIM)
+    assert result.reference == "archivo" and np.isfinite(result.log_evidence)
+    assert np.all(np.isfinite(result.log_likelihood))
+    model.loss_type = "MAE"
+    with pytest.raises(ValueError):
+        smc_posterior(model, 100)
+
+def test_archive_and_prior_starts_agree_on_the_evidence():
+    # Un armónico con b y w lejos de cero: los 4 modos espejo (signos de b y w) están separados
+    model = SEIRModel({'beta': 1, 'gamma': 0, 'sigma': 0})
+    model.N, model.engine, model.t_data = 100000, "discrete", np.arange(1.0, 21.0)
+    theta = np.array([0.6, 0.8, 0.4, 0.5, -0.3, 0.2, 1.0])
+    model.I_data = np.full(20, 50.0)
+    clean = model.simulate(theta)[:, 2]
+    model.I_data = clean + 0.1 * clean.max() * np.random.default_rng(0).standard_normal(20)
+    model.I_data[0] = clean[0]
+    assert model.symmetry_count() == 4
+    prior = smc_posterior(model, 400, ess_target=0.9, rng=np.random.default_rng(1))
+    # El prior vive en la región canónica, como el archivo de ACOR
+    assert np.allclose(model.canonicalize(prior.samples), prior.samples)
+    archive = prior.samples[:100]
+    guided = smc_posterior(model, 400, archive=archive, costs=model.fitness_batch(archive), best_params=theta,
+                           rng=np.random.default_rng(2))
+    assert guided.reference == "archivo" and guided.n_stages < prior.n_stages
+    # Sin corregir por las copias espejo la referencia del archivo quedaría log 4 por debajo
+    assert abs(guided.log_evidence - prior.log_evidence) < 0.4
+
+def test_reference_density_is_normalized():
+    low, high = np.array([0.0, -np.pi]), np.array([2.0, np.pi])
+    reference = Reference(low, high, np.array([1.0]), np.array([[0.04]]), np.array([True, False]))
+    X = reference.sample(200000, np.random.default_rng(7))
+    assert np.all((X[:, 1] >= -np.pi) & (X[:, 1] <= np.pi))
+    # Integral de q0 en la caja por importancia uniforme
+    U = low + (high - low) * np.random.default_rng(8).random((200000, 2))
+    assert abs(np.mean(np.exp(reference.log_pdf(U))) * np.prod(high - low) - 1.0) < 0.02
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+from clases.evaluators import make_pool
+from clases.seir_model import SEIRModel
+from clases.uncertainty import laplace_uncertainty
+
+def make_model(engine="discrete", noise=1e-6):
+    model = SEIRModel({'beta': 1, 'gamma': 0, 'sigma': 0})
+    model.N = 100000
+    model.engine = engine
+    model.t_data = np.arange(1.0, 53.0)
+    model.I_data = np.full(52, 50.0)
+    theta = np.array([0.6, 0.3, 0.4, 0.5, -0.3, 0.2, 1.0])
+    clean = model.simulate(theta)[:, 2]
+    model.I_data = clean + noise * clean.max() * np.random.default_rng(0).standard_normal(len(clean))
+    model.I_data[0] = clean[0]
+    return model, theta
+
+def test_gauss_newton_and_hessian_agree_when_residuals_are_small():
+    model, theta = make_model()
+    fast = laplace_uncertainty(model, theta)
+    full = laplace_uncertainty(model, theta, method="hessian")
+    assert fast.n_evaluations == 2 * model.DIM + 1 and full.n_evaluations == 1 + 2 * model.DIM ** 2
+    # k sólo entra redondeado en E0: sin información, error infinito
+    assert fast.unidentified == full.unidentified == ["k"] and np.isinf(fast.std_errors[-1])
+    assert np.allclose(full.std_errors[:-1], fast.std_errors[:-1], rtol=0.05)
+    assert np.allclose(np.diag(fast.correlation), 1.0) and np.all(np.abs(fast.correlation[:-1, :-1]) <= 1 + 1e-9)
+    assert np.all(fast.lower[:-1] < theta[:-1]) and np.all(theta[:-1] < fast.upper[:-1])
+    a, b, r = fast.strongest_correlations(1)[0]
+    assert abs(r) == np.nanmax(np.abs(fast.correlation - np.eye(model.DIM)))
+
+def test_hessian_evaluations_can_go_through_a_pool():
+    model, theta = make_model("odeint")
+    with make_pool(2, mode="thread") as pool:
+        pooled = laplace_uncertainty(model, theta, method="hessian", pool=pool)
+        fast = laplace_uncertainty(model, theta, pool=pool)
+    assert np.allclose(pooled.std_errors[:-1], laplace_uncertainty(model, theta, method="hessian").std_errors[:-1])
+    # Con las tolerancias finas el error de odeint no contamina las diferencias centrales
+    assert np.allclose(pooled.std_errors[:-1], fast.std_errors[:-1], rtol=0.03)
+    model.loss_type = "MAE"
+    with pytest.raises(ValueError):
+        laplace_uncertainty(model, theta)